@@ -1,21 +1,77 @@
 #!/usr/bin/env python3
-"""Simple HTTP runner that executes LifeHub automation commands."""
+"""Simple HTTP runner that executes LifeHub automation commands.
+
+Each request is served on its own thread, and the tasks in a ``/run`` batch
+run concurrently on a shared, bounded pool. A task may list the ids of other
+tasks in the same batch under ``dependsOn``; it starts once they have all
+succeeded and is skipped if any of them fails. Ids that are not part of the
+batch are ignored, so "stats after sweep" only waits when both are queued.
+
+``POST /run`` answers when the whole batch has finished. ``POST /jobs`` takes
+the same payload but answers at once with a job id; ``GET /jobs/<id>``
+reports progress and ``GET /jobs/<id>/stream`` streams task status changes
+and output lines as Server-Sent Events (resumable via ``Last-Event-ID``).
+Only a bounded tail of each command's output is kept in memory.
+
+Finished runs are appended to ``automation/logs/runs.ndjson`` (see
+``scripts/lib/runlog.py``); ``GET /runs`` lists recent runs, filterable with
+``?limit=&status=ok|failed&command=&before=``, and ``GET /runs/<runId>``
+returns one run with its full output.
+"""
 from __future__ import annotations
 
 import json
+import multiprocessing
+import os
 import subprocess
+import sys
+import threading
+import uuid
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timezone
 from dataclasses import dataclass
-from http.server import BaseHTTPRequestHandler, HTTPServer
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Deque, Optional
+from urllib.parse import parse_qs, urlsplit
 
 ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "scripts"))
+
+from lib.inprocess import parse_script_command, run_script, warm_worker  # noqa: E402
+from lib.runlog import RunLog  # noqa: E402
+
 LOG_DIR = ROOT / "automation" / "logs"
-HISTORY_FILE = LOG_DIR / "history.json"
+RUN_LOG = RunLog(LOG_DIR)
 ALLOWED_COMMANDS_FILE = ROOT / "automation" / "allowed_commands.json"
 SERVER_HOST = "127.0.0.1"
 SERVER_PORT = 8766
+# Commands are mostly I/O-bound subprocesses; a few at a time keeps the disk
+# from thrashing while one slow sweep no longer blocks every other button.
+TASK_WORKERS = max(2, min(4, os.cpu_count() or 1))
+TASK_POOL = ThreadPoolExecutor(max_workers=TASK_WORKERS, thread_name_prefix="automation-task")
+# Characters of stdout/stderr kept per task; the full stream goes to /jobs/<id>/stream.
+OUTPUT_TAIL_CHARS = 64 * 1024
+MAX_JOB_EVENTS = 5000
+MAX_FINISHED_JOBS = 50
+STREAM_KEEPALIVE_SECONDS = 15
+# Plain `python3 scripts/<name>.py ...` commands run main() in warm worker
+# processes instead of a new shell + interpreter; LIFEHUB_INPROCESS=0 disables.
+IN_PROCESS_SCRIPTS = os.environ.get("LIFEHUB_INPROCESS", "1") != "0"
+SCRIPT_WORKERS = TASK_WORKERS
+SCRIPT_POOL: Optional[ProcessPoolExecutor] = None
+SCRIPT_POOL_LOCK = threading.Lock()
+# Workers stream output lines through this queue (one per pool) to the WorkerRun
+# registered under the run's token.
+SCRIPT_OUTPUT: Any = None
+WORKER_RUNS: dict[str, "WorkerRun"] = {}
+WORKER_RUNS_LOCK = threading.Lock()
+# How long to wait for a dying worker's last messages before deciding whether its script had started.
+WORKER_GRACE_SECONDS = 1.0
+
+Emit = Callable[[str, dict[str, Any]], None]
 
 
 @dataclass
@@ -30,15 +86,9 @@ class AllowedCommand:
         return candidate == self.command
 
 
-def load_allowed_commands() -> list[AllowedCommand]:
-    if not ALLOWED_COMMANDS_FILE.exists():
-        return []
-    try:
-        commands = json.loads(ALLOWED_COMMANDS_FILE.read_text())
-    except json.JSONDecodeError:
-        return []
+def parse_allowed_commands(commands: Any) -> list[AllowedCommand]:
     parsed: list[AllowedCommand] = []
-    for entry in commands:
+    for entry in commands if isinstance(commands, list) else []:
         if isinstance(entry, str):
             value = entry.strip()
             if value:
@@ -51,118 +101,592 @@ def load_allowed_commands() -> list[AllowedCommand]:
     return parsed
 
 
-def ensure_history_file() -> None:
-    LOG_DIR.mkdir(parents=True, exist_ok=True)
-    if not HISTORY_FILE.exists():
-        HISTORY_FILE.write_text("[]\n")
+class CommandAllowlist:
+    """Allowlist compiled for O(len(command)) checks.
+
+    Plain entries live in a dict; ``allowArguments`` entries form a character
+    trie in which a node holding ``END`` accepts the command itself or the
+    command followed by a space and any arguments.
+    """
+
+    END = ""
+
+    def __init__(self, entries: list[AllowedCommand]):
+        self.commands = [entry.command for entry in entries]
+        self.exact: set[str] = set()
+        self.prefixes: dict[str, Any] = {}
+        for entry in entries:
+            self.exact.add(entry.command)
+            if entry.allow_arguments:
+                node = self.prefixes
+                for char in entry.command:
+                    node = node.setdefault(char, {})
+                node[self.END] = True
+
+    def __len__(self) -> int:
+        return len(self.commands)
+
+    def matches(self, candidate: str) -> bool:
+        candidate = candidate.strip()
+        if candidate in self.exact:
+            return True
+        node = self.prefixes
+        for char in candidate:
+            if char == " " and self.END in node:
+                return True
+            node = node.get(char)
+            if node is None:
+                return False
+        return self.END in node
+
+
+class AllowlistFile:
+    """Serves the compiled allowlist, recompiling when the file's mtime changes."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.allowlist = CommandAllowlist([])
+        self.stamp = self.file_stamp()
+        self.reload()
+
+    def file_stamp(self) -> Optional[tuple[int, int]]:
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def current(self) -> CommandAllowlist:
+        stamp = self.file_stamp()
+        if stamp != self.stamp:
+            with self.lock:
+                if stamp != self.stamp:
+                    self.stamp = stamp
+                    self.reload()
+                    print(f"Reloaded {self.path.name} ({len(self.allowlist)} commands)")
+        return self.allowlist
+
+    def reload(self) -> None:
+        if self.stamp is None:
+            self.allowlist = CommandAllowlist([])
+            return
+        try:
+            commands = json.loads(self.path.read_text())
+        except (OSError, json.JSONDecodeError) as error:
+            # Keep serving the previous list while the file is mid-edit.
+            print(f"Ignoring unreadable {self.path.name}: {error}", file=sys.stderr)
+            return
+        self.allowlist = CommandAllowlist(parse_allowed_commands(commands))
+
+
+ALLOWLIST = AllowlistFile(ALLOWED_COMMANDS_FILE)
+
+
+def append_history(new_runs: list[dict[str, Any]], job_id: Optional[str] = None) -> None:
+    RUN_LOG.append(new_runs, job_id=job_id)
 
 
-def read_history() -> list[dict[str, Any]]:
-    ensure_history_file()
+def now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def failed_run(task: dict[str, Any], exit_code: int, message: str) -> dict[str, Any]:
+    timestamp = now_iso()
+    return {
+        "id": task.get("id"),
+        "label": task.get("label"),
+        "command": task.get("command"),
+        "exitCode": exit_code,
+        "stdout": "",
+        "stderr": message,
+        "startedAt": timestamp,
+        "finishedAt": timestamp,
+        "durationMs": 0,
+    }
+
+
+class OutputTail:
+    """Keeps only the last ``limit`` characters written to it."""
+
+    def __init__(self, limit: int = OUTPUT_TAIL_CHARS):
+        self.limit = limit
+        self.parts: Deque[str] = deque()
+        self.size = 0
+        self.dropped = 0
+
+    def add(self, text: str) -> None:
+        self.parts.append(text)
+        self.size += len(text)
+        while self.size > self.limit and len(self.parts) > 1:
+            removed = self.parts.popleft()
+            self.size -= len(removed)
+            self.dropped += len(removed)
+
+    def text(self) -> str:
+        body = "".join(self.parts)
+        if self.dropped:
+            return f"[… {self.dropped} earlier characters omitted …]\n{body}"
+        return body
+
+
+def pump_output(pipe: Any, stream: str, tail: OutputTail, task_id: Any, emit: Optional[Emit]) -> None:
+    for line in pipe:
+        tail.add(line)
+        if emit:
+            emit("output", {"id": task_id, "stream": stream, "text": line})
+    pipe.close()
+
+
+def run_in_shell(command: str, workdir: Path, task_id: Any, emit: Optional[Emit]) -> tuple[int, str, str]:
+    process = subprocess.Popen(
+        command,
+        shell=True,
+        cwd=workdir,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        errors="replace",
+    )
+    tails = {"stdout": OutputTail(), "stderr": OutputTail()}
+    readers = [
+        threading.Thread(target=pump_output, args=(pipe, name, tails[name], task_id, emit), daemon=True)
+        for name, pipe in (("stdout", process.stdout), ("stderr", process.stderr))
+    ]
+    for reader in readers:
+        reader.start()
+    exit_code = process.wait()
+    for reader in readers:
+        reader.join()
+    return exit_code, tails["stdout"].text(), tails["stderr"].text()
+
+
+class WorkerRun:
+    """Output of one script running in the warm pool, fed by :func:`pump_worker_output`."""
+
+    def __init__(self, task_id: Any, emit: Optional[Emit]):
+        self.task_id = task_id
+        self.emit = emit
+        self.tails = {"stdout": OutputTail(), "stderr": OutputTail()}
+        self.started = threading.Event()
+        self.finished = threading.Event()
+
+    def handle(self, kind: str, text: str) -> None:
+        if kind == "started":
+            self.started.set()
+        elif kind == "finished":
+            self.finished.set()
+        else:
+            for line in text.splitlines(keepends=True):
+                self.tails[kind].add(line)
+                if self.emit:
+                    self.emit("output", {"id": self.task_id, "stream": kind, "text": line})
+
+
+def pump_worker_output(output: Any) -> None:
+    while True:
+        message = output.get()
+        if message is None:
+            return
+        token, kind, text = message
+        with WORKER_RUNS_LOCK:
+            run = WORKER_RUNS.get(token)
+        if run is not None:
+            run.handle(kind, text)
+
+
+def script_pool() -> ProcessPoolExecutor:
+    global SCRIPT_POOL, SCRIPT_OUTPUT
+    with SCRIPT_POOL_LOCK:
+        if SCRIPT_POOL is None:
+            parsed = (parse_script_command(command, ROOT) for command in ALLOWLIST.current().commands)
+            scripts = [str(script) for script, _ in filter(None, parsed)]
+            # spawn, not fork: the server is multi-threaded by the time a pool is (re)created.
+            context = multiprocessing.get_context("spawn")
+            SCRIPT_OUTPUT = context.SimpleQueue()  # puts reach the pipe before the script goes on
+            threading.Thread(target=pump_worker_output, args=(SCRIPT_OUTPUT,), daemon=True).start()
+            SCRIPT_POOL = ProcessPoolExecutor(
+                max_workers=SCRIPT_WORKERS,
+                mp_context=context,
+                initializer=warm_worker,
+                initargs=(scripts, SCRIPT_OUTPUT),
+            )
+        return SCRIPT_POOL
+
+
+def discard_script_pool(pool: ProcessPoolExecutor) -> None:
+    global SCRIPT_POOL, SCRIPT_OUTPUT
+    with SCRIPT_POOL_LOCK:
+        if SCRIPT_POOL is pool:
+            SCRIPT_OUTPUT.put(None)  # stops its pump thread
+            SCRIPT_POOL = SCRIPT_OUTPUT = None
+
+
+def run_in_worker(
+    script: Path, args: list[str], workdir: Path, task_id: Any, emit: Optional[Emit]
+) -> Optional[tuple[int, str, str]]:
+    """Run a LifeHub script's main() in the warm pool, relaying its output lines as they are printed.
+
+    Returns None when the script has no ``main()`` or the pool broke before
+    the script started (the caller falls back to the shell in both cases). A pool that breaks while the script runs is
+    reported as a failure rather than retried, since the script may already
+    have moved files.
+    """
+    pool = script_pool()
+    token = uuid.uuid4().hex
+    run = WorkerRun(task_id, emit)
+    with WORKER_RUNS_LOCK:
+        WORKER_RUNS[token] = run
     try:
-        return json.loads(HISTORY_FILE.read_text())
-    except json.JSONDecodeError:
-        return []
+        try:
+            result = pool.submit(run_script, str(script), args, str(workdir), token).result()
+        except BrokenProcessPool:
+            discard_script_pool(pool)
+            if not run.started.wait(WORKER_GRACE_SECONDS):
+                return None
+            message = "Worker process died while the script was running; not retried.\n"
+            run.handle("stderr", message)
+            return 1, run.tails["stdout"].text(), run.tails["stderr"].text()
+        if result is None:
+            return None
+        run.finished.wait(WORKER_GRACE_SECONDS)  # the last lines may still be in the queue
+    finally:
+        with WORKER_RUNS_LOCK:
+            WORKER_RUNS.pop(token, None)
+    return result[0], run.tails["stdout"].text(), run.tails["stderr"].text()
+
+
+def execute_task(task: dict[str, Any], workdir: Path, emit: Optional[Emit] = None) -> dict[str, Any]:
+    command = task["command"]
+    started = datetime.now(timezone.utc)
+    if emit:
+        emit("task", {"id": task.get("id"), "status": "running", "startedAt": started.isoformat()})
+    parsed = parse_script_command(command, workdir) if IN_PROCESS_SCRIPTS else None
+    outcome = run_in_worker(*parsed, workdir, task.get("id"), emit) if parsed else None
+    if outcome is None:
+        outcome = run_in_shell(command, workdir, task.get("id"), emit)
+    exit_code, stdout, stderr = outcome
+    finished = datetime.now(timezone.utc)
+    run = {
+        "id": task.get("id"),
+        "label": task.get("label"),
+        "command": command,
+        "exitCode": exit_code,
+        "stdout": stdout,
+        "stderr": stderr,
+        "startedAt": started.isoformat(),
+        "finishedAt": finished.isoformat(),
+        "durationMs": int((finished - started).total_seconds() * 1000),
+    }
+    if emit:
+        emit("task", task_event(run))
+    return run
+
+
+def task_event(run: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "id": run.get("id"),
+        "status": "done" if run.get("exitCode") == 0 else "error",
+        "exitCode": run.get("exitCode"),
+        "finishedAt": run.get("finishedAt"),
+        "durationMs": run.get("durationMs"),
+    }
+
+
+def task_dependencies(task: dict[str, Any], batch_ids: set[str]) -> set[str]:
+    raw = task.get("dependsOn") or []
+    if isinstance(raw, str):
+        raw = [raw]
+    return {str(dep) for dep in raw if str(dep) in batch_ids and str(dep) != str(task.get("id"))}
+
+
+def run_tasks(
+    tasks: list[dict[str, Any]],
+    workdir: Path,
+    allowed: CommandAllowlist,
+    emit: Optional[Emit] = None,
+) -> list[dict[str, Any]]:
+    """Run a batch as a dependency graph on TASK_POOL; results keep the request order.
+
+    ``emit(kind, data)`` receives ``task`` status changes and ``output`` lines as they happen.
+    """
+    tasks = [task for task in tasks if isinstance(task, dict) and task.get("command")]
+    results: dict[int, dict[str, Any]] = {}
+    keys = [str(task.get("id")) if task.get("id") is not None else f"#{idx}" for idx, task in enumerate(tasks)]
+    batch_ids = set(keys)
+    index_of = {key: idx for idx, key in enumerate(keys)}
+    waiting: dict[int, set[str]] = {}
+    for idx, task in enumerate(tasks):
+        if not allowed.matches(task["command"]):
+            results[idx] = failed_run(task, 126, "Command not allowed by automation_server.")
+            if emit:
+                emit("task", task_event(results[idx]))
+        else:
+            waiting[idx] = task_dependencies(task, batch_ids)
+
+    running: dict[Future, int] = {}
+    while waiting or running:
+        for idx in [idx for idx, deps in waiting.items() if all(index_of[dep] in results for dep in deps)]:
+            deps = waiting.pop(idx)
+            failed = sorted(dep for dep in deps if results[index_of[dep]]["exitCode"] != 0)
+            if failed:
+                results[idx] = failed_run(tasks[idx], 125, f"Skipped: dependency {', '.join(failed)} did not succeed.")
+                if emit:
+                    emit("task", task_event(results[idx]))
+            else:
+                running[TASK_POOL.submit(execute_task, tasks[idx], workdir, emit)] = idx
+        if not running:
+            if waiting:
+                # Whatever is left waits on itself through a cycle.
+                for idx in list(waiting):
+                    results[idx] = failed_run(tasks[idx], 125, "Skipped: circular dependsOn.")
+                    if emit:
+                        emit("task", task_event(results[idx]))
+                waiting.clear()
+            break
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            idx = running.pop(future)
+            try:
+                results[idx] = future.result()
+            except Exception as error:  # noqa: BLE001
+                results[idx] = failed_run(tasks[idx], 1, f"automation_server failed to run the command: {error}")
+                if emit:
+                    emit("task", task_event(results[idx]))
+    return [results[idx] for idx in range(len(tasks))]
+
+
+class Job:
+    """A batch started via ``POST /jobs``: runs in the background and records progress events."""
+
+    def __init__(self, tasks: list[dict[str, Any]], workdir: Path):
+        self.id = uuid.uuid4().hex[:12]
+        self.tasks = [
+            {**task, "id": task.get("id") if task.get("id") is not None else f"task-{idx}"}
+            for idx, task in enumerate(tasks)
+            if isinstance(task, dict) and task.get("command")
+        ]
+        self.workdir = workdir
+        self.status = "queued"
+        self.created_at = now_iso()
+        self.finished_at: Optional[str] = None
+        self.runs: list[dict[str, Any]] = []
+        self.task_states = {
+            str(task["id"]): {"id": task["id"], "label": task.get("label"), "command": task["command"], "status": "queued"}
+            for task in self.tasks
+        }
+        self.events: Deque[tuple[int, str, dict[str, Any]]] = deque(maxlen=MAX_JOB_EVENTS)
+        self.seq = 0
+        self.condition = threading.Condition()
 
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
 
-def write_history(runs: list[dict[str, Any]]) -> None:
-    ensure_history_file()
-    HISTORY_FILE.write_text(json.dumps(runs, indent=2))
+    def emit(self, kind: str, data: dict[str, Any]) -> None:
+        with self.condition:
+            self.seq += 1
+            self.events.append((self.seq, kind, data))
+            if kind == "task" and str(data.get("id")) in self.task_states:
+                self.task_states[str(data["id"])].update(data)
+            self.condition.notify_all()
 
+    def events_after(self, seq: int, timeout: float) -> tuple[list[tuple[int, str, dict[str, Any]]], bool]:
+        """Events newer than ``seq``, waiting up to ``timeout`` for one; also whether the job is over."""
+        with self.condition:
+            if self.seq <= seq and not self.finished:
+                self.condition.wait(timeout)
+            return [event for event in self.events if event[0] > seq], self.finished
 
-def append_history(new_runs: list[dict[str, Any]]) -> None:
-    history = new_runs + read_history()
-    history = history[:100]
-    write_history(history)
+    def summary(self) -> dict[str, Any]:
+        with self.condition:
+            return {
+                "id": self.id,
+                "status": self.status,
+                "createdAt": self.created_at,
+                "finishedAt": self.finished_at,
+                "tasks": [dict(state) for state in self.task_states.values()],
+                "runs": self.runs,
+            }
+
+    def run(self, allowed: CommandAllowlist) -> None:
+        with self.condition:
+            self.status = "running"
+        self.emit("status", {"status": "running"})
+        try:
+            runs = run_tasks(self.tasks, self.workdir, allowed, emit=self.emit)
+            append_history(runs, job_id=self.id)
+            status = "done" if all(run["exitCode"] == 0 for run in runs) else "failed"
+        except Exception as error:  # noqa: BLE001
+            runs, status = [], "failed"
+            self.emit("status", {"status": "failed", "error": str(error)})
+        with self.condition:
+            self.runs = runs
+            self.finished_at = now_iso()
+            self.status = status
+        self.emit("done", self.summary())
+
+
+JOBS: dict[str, Job] = {}
+JOBS_LOCK = threading.Lock()
+
+
+def start_job(tasks: list[dict[str, Any]], workdir: Path, allowed: CommandAllowlist) -> Job:
+    job = Job(tasks, workdir)
+    with JOBS_LOCK:
+        finished = [job_id for job_id, existing in JOBS.items() if existing.finished]
+        for job_id in finished[: max(0, len(finished) - MAX_FINISHED_JOBS + 1)]:
+            del JOBS[job_id]
+        JOBS[job.id] = job
+    threading.Thread(target=job.run, args=(allowed,), name=f"automation-job-{job.id}", daemon=True).start()
+    return job
+
+
+def get_job(job_id: str) -> Optional[Job]:
+    with JOBS_LOCK:
+        return JOBS.get(job_id)
 
 
 class AutomationHandler(BaseHTTPRequestHandler):
     server_version = "LifeHubAutomation/1.0"
-    allowed_commands = load_allowed_commands()
 
-    def _set_headers(self, status: int = 200) -> None:
+    def _set_headers(self, status: int = 200, content_type: str = "application/json") -> None:
         self.send_response(status)
-        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Type", content_type)
         self.send_header("Access-Control-Allow-Origin", "*")
-        self.send_header("Access-Control-Allow-Methods", "POST, OPTIONS")
-        self.send_header("Access-Control-Allow-Headers", "Content-Type")
+        self.send_header("Access-Control-Allow-Methods", "GET, POST, OPTIONS")
+        self.send_header("Access-Control-Allow-Headers", "Content-Type, Last-Event-ID")
         self.end_headers()
 
-    def do_OPTIONS(self) -> None:  # noqa: N802
-        self._set_headers(204)
+    def _send_json(self, payload: Any, status: int = 200) -> None:
+        self._set_headers(status)
+        self.wfile.write(json.dumps(payload).encode("utf-8"))
 
-    def do_POST(self) -> None:  # noqa: N802
-        if self.path.rstrip("/") != "/run":
-            self._set_headers(404)
-            self.wfile.write(b'{"error":"not_found"}')
-            return
+    def _read_payload(self) -> Optional[dict[str, Any]]:
         content_length = int(self.headers.get("Content-Length", 0))
         try:
             payload = json.loads(self.rfile.read(content_length) or b"{}")
         except json.JSONDecodeError:
+            payload = None
+        if not isinstance(payload, dict):
             self._set_headers(400)
             self.wfile.write(b'{"error":"invalid_json"}')
-            return
+            return None
+        return payload
+
+    @staticmethod
+    def _batch(payload: dict[str, Any]) -> tuple[list[dict[str, Any]], Path]:
         tasks = payload.get("tasks") or []
         workdir = Path(payload.get("workdir") or ROOT).expanduser()
         workdir = workdir if workdir.exists() else ROOT
-        runs: list[dict[str, Any]] = []
-        for task in tasks:
-            command = task.get("command")
-            if not command:
-                continue
-            if not any(allowed.matches(command) for allowed in self.allowed_commands):
-                runs.append(
-                    {
-                        "id": task.get("id"),
-                        "label": task.get("label"),
-                        "command": command,
-                        "exitCode": 126,
-                        "stdout": "",
-                        "stderr": "Command not allowed by automation_server.",
-                        "startedAt": datetime.now(timezone.utc).isoformat(),
-                        "finishedAt": datetime.now(timezone.utc).isoformat(),
-                        "durationMs": 0,
-                    }
-                )
-                continue
-            started = datetime.now(timezone.utc)
-            result = subprocess.run(
-                command,
-                shell=True,
-                cwd=workdir,
-                capture_output=True,
-                text=True,
-            )
-            finished = datetime.now(timezone.utc)
-            runs.append(
+        return (tasks if isinstance(tasks, list) else []), workdir
+
+    def do_OPTIONS(self) -> None:  # noqa: N802
+        self._set_headers(204)
+
+    def do_GET(self) -> None:  # noqa: N802
+        url = urlsplit(self.path)
+        parts = [part for part in url.path.split("/") if part]
+        if parts and parts[0] == "runs":
+            self._send_runs(parts[1:], parse_qs(url.query))
+            return
+        job = get_job(parts[1]) if len(parts) in (2, 3) and parts[0] == "jobs" else None
+        if job is None or (len(parts) == 3 and parts[2] != "stream"):
+            self._set_headers(404)
+            self.wfile.write(b'{"error":"not_found"}')
+            return
+        if len(parts) == 2:
+            self._send_json(job.summary())
+            return
+        self._stream_job(job)
+
+    def _send_runs(self, rest: list[str], query: dict[str, list[str]]) -> None:
+        if rest:
+            run = RUN_LOG.get(rest[0]) if len(rest) == 1 else None
+            if run is None:
+                self._set_headers(404)
+                self.wfile.write(b'{"error":"not_found"}')
+                return
+            self._send_json(run)
+            return
+        def option(name: str) -> Optional[str]:
+            return (query.get(name) or [None])[0]
+
+        try:
+            limit = max(1, min(500, int(option("limit") or 20)))
+        except ValueError:
+            limit = 20
+        runs = RUN_LOG.query(limit=limit, status=option("status"), command=option("command"), before=option("before"))
+        self._send_json({"runs": runs})
+
+    def _stream_job(self, job: Job) -> None:
+        try:
+            seq = int(self.headers.get("Last-Event-ID") or 0)
+        except ValueError:
+            seq = 0
+        self._set_headers(200, "text/event-stream")
+        try:
+            while True:
+                events, finished = job.events_after(seq, STREAM_KEEPALIVE_SECONDS)
+                if events:
+                    chunk = "".join(
+                        f"id: {event_seq}\nevent: {kind}\ndata: {json.dumps(data)}\n\n"
+                        for event_seq, kind, data in events
+                    )
+                    seq = events[-1][0]
+                    self.wfile.write(chunk.encode("utf-8"))
+                elif not finished:
+                    self.wfile.write(b": keepalive\n\n")
+                self.wfile.flush()
+                if finished and not events:
+                    return
+        except (BrokenPipeError, ConnectionResetError):
+            return
+
+    def do_POST(self) -> None:  # noqa: N802
+        route = self.path.split("?", 1)[0].rstrip("/")
+        if route not in ("/run", "/jobs"):
+            self._set_headers(404)
+            self.wfile.write(b'{"error":"not_found"}')
+            return
+        payload = self._read_payload()
+        if payload is None:
+            return
+        tasks, workdir = self._batch(payload)
+        if route == "/jobs":
+            job = start_job(tasks, workdir, ALLOWLIST.current())
+            self._send_json(
                 {
-                    "id": task.get("id"),
-                    "label": task.get("label"),
-                    "command": command,
-                    "exitCode": result.returncode,
-                    "stdout": result.stdout,
-                    "stderr": result.stderr,
-                    "startedAt": started.isoformat(),
-                    "finishedAt": finished.isoformat(),
-                    "durationMs": int((finished - started).total_seconds() * 1000),
-                }
+                    "jobId": job.id,
+                    "status": job.status,
+                    "statusUrl": f"/jobs/{job.id}",
+                    "streamUrl": f"/jobs/{job.id}/stream",
+                },
+                202,
             )
+            return
+        runs = run_tasks(tasks, workdir, ALLOWLIST.current())
         append_history(runs)
-        self._set_headers()
-        self.wfile.write(json.dumps({"runs": runs}).encode("utf-8"))
+        self._send_json({"runs": runs})
 
 
 def run_server() -> None:
-    ensure_history_file()
-    server = HTTPServer((SERVER_HOST, SERVER_PORT), AutomationHandler)
-    print(f"LifeHub automation runner listening on http://{SERVER_HOST}:{SERVER_PORT}/run")
+    server = ThreadingHTTPServer((SERVER_HOST, SERVER_PORT), AutomationHandler)
+    server.daemon_threads = True
+    if IN_PROCESS_SCRIPTS:
+        pool = script_pool()
+        for _ in range(SCRIPT_WORKERS):
+            pool.submit(os.getpid)  # start and warm the workers before the first click
+    print(f"LifeHub automation runner listening on http://{SERVER_HOST}:{SERVER_PORT}/run (jobs API at /jobs)")
     try:
         server.serve_forever()
     except KeyboardInterrupt:
         print("\nShutting down automation runner.")
     finally:
         server.server_close()
+        TASK_POOL.shutdown(wait=False, cancel_futures=True)
+        if SCRIPT_POOL is not None:
+            SCRIPT_POOL.shutdown(wait=False, cancel_futures=True)
 
 
 if __name__ == "__main__":
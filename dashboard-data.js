@@ -257,21 +257,22 @@ window.LIFEHUB_DATA.automations = [
     id: "sweep-downloads",
     label: "Sweep Downloads into Inbox",
     description: "Moves everything from ~/Downloads into LifeHub/Inbox, skipping dmg/pkg installers.",
-    command: "python3 LifeHub/scripts/sweep_downloads.py",
+    command: "python3 scripts/sweep_downloads.py",
     durationSeconds: 25,
   },
   {
     id: "update-stats",
     label: "Refresh Dashboard Stats",
     description: "Rebuilds dashboard-stats.json + wellbeing summary.",
-    command: "python3 LifeHub/scripts/update_dashboard_stats.py && python3 LifeHub/scripts/update_welltory_summary.py",
+    command: "python3 scripts/update_dashboard_stats.py && python3 scripts/update_welltory_summary.py",
     durationSeconds: 45,
+    dependsOn: ["sweep-downloads"],
   },
   {
     id: "archive-quarter",
     label: "Refresh recent files",
     description: "Scans LifeHub areas and rebuilds recent-files.json for the dashboard widget.",
-    command: "python3 LifeHub/scripts/generate_recent_files.py",
+    command: "python3 scripts/generate_recent_files.py",
     durationSeconds: 35,
   },
 ];
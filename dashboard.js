@@ -676,6 +676,7 @@ const automationListElement = document.querySelector("#automation-list");
 const openAutomationButton = document.querySelector("#open-automation-modal");
 const automationCloseButton = document.querySelector("#automation-close");
 const AUTOMATION_SERVER_URL = "http://127.0.0.1:8766/run";
+const AUTOMATION_SERVER_BASE = AUTOMATION_SERVER_URL.replace(/\/run$/, "");
 window.LIFEHUB_AUTOMATION_URL = AUTOMATION_SERVER_URL;
 const automationSchedulerList = document.querySelector("#automation-scheduler-list");
 const automationQueueList = document.querySelector("#automation-queue");
@@ -763,7 +764,7 @@ const wellbeingDeltaFields = {
 const CHECKLIST_STATE_KEY = "lifehub-checklist";
 const CHECKLIST_WEEK_KEY = "lifehub-checklist-week";
 const CHECKLIST_HISTORY_KEY = "lifehub-checklist-history";
-const STATS_COMMAND = "python3 LifeHub/scripts/update_dashboard_stats.py";
+const STATS_COMMAND = "python3 scripts/update_dashboard_stats.py";
 const TEXT_GAME_SOURCE_URL = "scripts/fun_text_game_base.py";
 const TEXT_GAME_V2_SOURCE_URL = "scripts/fun_text_game_v2.py";
 const TEXT_GAME_SAVE_PREFIX = "lifehub-game-save";
@@ -1537,7 +1538,7 @@ const TIMELINE_FILTER_KEY = "lifehub-timeline-filters";
 let timelineFilters = loadTimelineFilters();
 let kioskPanels = [];
 let kioskActiveIndex = 0;
-let searchIndex = Array.isArray(getInlineData("searchIndex")) ? getInlineData("searchIndex") : [];
+let searchIndex = normalizeSearchIndex(getInlineData("searchIndex"));
 let searchIndexRequested = false;
 let kioskRotationInterval = Number(localStorage.getItem(KIOSK_INTERVAL_KEY)) || 8000;
 let xpState = loadXpState();
@@ -6250,16 +6251,15 @@ function handleCopilotQuery(rawQuery = "") {
     });
   });
 
-  searchIndex.forEach((entry) => {
-    if (!entry?.path) return;
-    const haystack = `${entry.path} ${entry.snippet || ""}`.toLowerCase();
-    const isMatch = tokens.every((token) => haystack.includes(token));
-    if (!isMatch) return;
+  const rerunWhenShardsLoad = () => {
+    if ((copilotInput?.value || "").trim().toLowerCase() === query) handleCopilotQuery(copilotInput.value);
+  };
+  querySearchIndex(query, rerunWhenShardsLoad).forEach(({ entry, relevance }) => {
     const pathKey = entry.path.toLowerCase();
     const scoreBoost = seenPaths.has(pathKey) ? 0 : 3;
     matches.push({
       type: "search",
-      score: 3 + scoreBoost,
+      score: 3 + scoreBoost + relevance,
       label: `Search hit: ${entry.path.split("/").pop() || entry.path}`,
       description: entry.snippet || entry.path,
       meta: entry.area ? `${entry.area} · text match` : "Text match",
@@ -6338,21 +6338,194 @@ function buildCopilotHints() {
   }));
 }
 
+const SEARCH_TOKEN_PATTERN = /[\p{L}\p{N}]+/gu;
+const SEARCH_SHARD_DIR = "search-index/";
+const SEARCH_BM25_K1 = 1.2;
+const SEARCH_BM25_B = 0.75;
+const SEARCH_PREFIX_EXPANSION_LIMIT = 12;
+const SEARCH_RESULT_LIMIT = 20;
+const searchShardRequests = new Map();
+const searchSortedTerms = new Map();
+
+// Mirrors scripts/lib/inverted_index.py tokenize().
+function tokenizeSearchText(text) {
+  return (String(text || "").toLowerCase().match(SEARCH_TOKEN_PATTERN) || []).filter(
+    (token) => token.length >= 2 && token.length <= 40
+  );
+}
+
+// Mirrors scripts/lib/inverted_index.py shard_key().
+function searchShardKey(term, prefixLength) {
+  const prefix = Array.from(term).slice(0, prefixLength).join("");
+  if (/^[a-z0-9]+$/.test(prefix)) return prefix;
+  const bytes = new TextEncoder().encode(prefix);
+  return `u${Array.from(bytes, (byte) => byte.toString(16).padStart(2, "0")).join("")}`;
+}
+
+// The sharded index is loaded lazily from search-index/*.js; older inline snapshots may still carry a flat list.
+function normalizeSearchIndex(payload) {
+  return { legacy: Array.isArray(payload) ? payload : null, manifest: null };
+}
+
+function getSearchShard(name) {
+  const shards = window.LIFEHUB_SEARCH_SHARDS;
+  return shards && Object.prototype.hasOwnProperty.call(shards, name) ? shards[name] : undefined;
+}
+
+// Shards are plain scripts (not JSON) so they also load when the dashboard is opened via file://.
+function loadSearchShard(name, version) {
+  const loaded = getSearchShard(name);
+  if (loaded !== undefined) return Promise.resolve(loaded);
+  if (searchShardRequests.has(name)) return searchShardRequests.get(name);
+  const request = new Promise((resolve, reject) => {
+    const script = document.createElement("script");
+    script.src = `${SEARCH_SHARD_DIR}${name}.js?v=${encodeURIComponent(version || Date.now())}`;
+    script.async = true;
+    script.onload = () => {
+      script.remove();
+      const shard = getSearchShard(name);
+      if (shard === undefined) {
+        searchShardRequests.delete(name);
+        reject(new Error(`Search shard ${name} did not register`));
+      } else {
+        resolve(shard);
+      }
+    };
+    script.onerror = () => {
+      script.remove();
+      searchShardRequests.delete(name);
+      reject(new Error(`Failed to load search shard ${name}`));
+    };
+    document.head.appendChild(script);
+  });
+  searchShardRequests.set(name, request);
+  return request;
+}
+
+// Returns the loaded shards, or kicks off loading the missing ones and calls onReady once they arrive.
+function requireSearchShards(names, onReady) {
+  const manifest = searchIndex.manifest;
+  const missing = names.filter((name) => getSearchShard(name) === undefined);
+  if (!missing.length) return true;
+  Promise.all(missing.map((name) => loadSearchShard(name, manifest?.files?.[name])))
+    .then(() => onReady?.())
+    .catch(() => {
+      // Missing shards just mean no text matches; cards and recent files still render.
+    });
+  return false;
+}
+
+// Posting lists are [docDelta, tf, posDelta x tf, ...]; only tf is needed for ranking.
+function decodeSearchPostings(encoded) {
+  const postings = new Map();
+  let docId = 0;
+  let idx = 0;
+  while (idx < encoded.length) {
+    docId += encoded[idx];
+    const frequency = encoded[idx + 1];
+    postings.set(docId, frequency);
+    idx += 2 + frequency;
+  }
+  return postings;
+}
+
+function expandSearchTerm(shardName, term) {
+  const terms = getSearchShard(shardName) || {};
+  if (terms[term]) return [term];
+  if (!searchSortedTerms.has(shardName)) {
+    searchSortedTerms.set(shardName, Object.keys(terms).sort());
+  }
+  const sorted = searchSortedTerms.get(shardName);
+  let low = 0;
+  let high = sorted.length;
+  while (low < high) {
+    const mid = (low + high) >> 1;
+    if (sorted[mid] < term) low = mid + 1;
+    else high = mid;
+  }
+  const expanded = [];
+  for (let i = low; i < sorted.length && sorted[i].startsWith(term); i += 1) {
+    expanded.push(sorted[i]);
+    if (expanded.length >= SEARCH_PREFIX_EXPANSION_LIMIT) break;
+  }
+  return expanded;
+}
+
+function querySearchIndex(query, onReady) {
+  if (searchIndex.legacy) {
+    const tokens = query.toLowerCase().split(/\s+/).filter(Boolean);
+    return searchIndex.legacy
+      .filter((entry) => entry?.path)
+      .filter((entry) => {
+        const haystack = `${entry.path} ${entry.snippet || ""}`.toLowerCase();
+        return tokens.every((token) => haystack.includes(token));
+      })
+      .map((entry) => ({ entry, relevance: 0 }));
+  }
+  const manifest = searchIndex.manifest;
+  const queryTerms = Array.from(new Set(tokenizeSearchText(query)));
+  if (!manifest || !manifest.docCount || !queryTerms.length) return [];
+  const available = new Set(manifest.termShards || []);
+  const termShards = queryTerms.map((term) => `terms-${searchShardKey(term, manifest.termPrefixLength || 2)}`);
+  if (termShards.some((name) => !available.has(name.slice("terms-".length)))) return [];
+  if (!requireSearchShards(["lengths", ...new Set(termShards)], onReady)) return [];
+
+  const lengths = getSearchShard("lengths");
+  const avgDocLength = Number(manifest.avgDocLength) || 1;
+  let scores = null;
+  for (let i = 0; i < queryTerms.length; i += 1) {
+    // Each query word matches its exact term or, while still being typed, terms it prefixes.
+    const termScores = new Map();
+    const shardTerms = getSearchShard(termShards[i]);
+    expandSearchTerm(termShards[i], queryTerms[i]).forEach((term) => {
+      const postings = decodeSearchPostings(shardTerms[term]);
+      const idf = Math.log(1 + (manifest.docCount - postings.size + 0.5) / (postings.size + 0.5));
+      postings.forEach((tf, docId) => {
+        const length = Number(lengths[docId]) || 0;
+        const norm = tf + SEARCH_BM25_K1 * (1 - SEARCH_BM25_B + (SEARCH_BM25_B * length) / avgDocLength);
+        const score = (idf * tf * (SEARCH_BM25_K1 + 1)) / norm;
+        termScores.set(docId, Math.max(termScores.get(docId) || 0, score));
+      });
+    });
+    if (!termScores.size) return [];
+    if (scores === null) {
+      scores = termScores;
+    } else {
+      const next = new Map();
+      scores.forEach((score, docId) => {
+        if (termScores.has(docId)) next.set(docId, score + termScores.get(docId));
+      });
+      scores = next;
+    }
+    if (!scores.size) return [];
+  }
+
+  const ranked = Array.from(scores.entries())
+    .sort((a, b) => b[1] - a[1] || a[0] - b[0])
+    .slice(0, SEARCH_RESULT_LIMIT);
+  const shardSize = manifest.docShardSize || 1000;
+  const docShards = Array.from(new Set(ranked.map(([docId]) => `docs-${Math.floor(docId / shardSize)}`)));
+  if (!requireSearchShards(docShards, onReady)) return [];
+  return ranked
+    .map(([docId, score]) => ({
+      entry: getSearchShard(`docs-${Math.floor(docId / shardSize)}`)?.[docId % shardSize],
+      relevance: Math.min(3, score),
+    }))
+    .filter((result) => result.entry?.path);
+}
+
 function prefetchSearchIndex() {
-  if (isFileProtocol || searchIndexRequested) return;
+  if (searchIndexRequested) return;
   searchIndexRequested = true;
-  fetch("search-index.json", { cache: "no-store" })
-    .then((response) => {
-      if (!response.ok) throw new Error(`search-index.json returned ${response.status}`);
-      return response.json();
-    })
-    .then((payload) => {
-      if (Array.isArray(payload)) {
-        searchIndex = payload;
+  // The manifest is tiny; the shards it lists are fetched only when a query needs them.
+  loadSearchShard("manifest", Date.now())
+    .then((manifest) => {
+      if (manifest?.version === 2) {
+        searchIndex = { legacy: null, manifest };
       }
     })
     .catch(() => {
-      // Ignore fetch errors; inline data already covers file:// mode.
+      // No sharded index yet (run scripts/build_search_index.py); keep any inline fallback.
     });
 }
 
@@ -6488,20 +6661,19 @@ async function runAutomationQueueViaServer() {
     entry.progress = 10;
   });
   renderAutomationQueue();
+  const payload = {
+    tasks: automationQueue.map((entry) => ({
+      id: entry.uid,
+      label: entry.automation.label,
+      command: entry.automation.command,
+      // Automation ids -> queue uids; the runner ignores ids outside the batch.
+      dependsOn: (entry.automation.dependsOn || [])
+        .map((dependency) => automationQueue.find((other) => other.automation.id === dependency)?.uid)
+        .filter(Boolean),
+    })),
+  };
   try {
-    const response = await fetch(AUTOMATION_SERVER_URL, {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({
-        tasks: automationQueue.map((entry) => ({
-          id: entry.uid,
-          label: entry.automation.label,
-          command: entry.automation.command,
-        })),
-      }),
-    });
-    if (!response.ok) throw new Error(`Automation runner returned ${response.status}`);
-    const result = await response.json();
+    const result = (await runAutomationJobViaServer(payload)) || (await runAutomationBatchViaServer(payload));
     if (!Array.isArray(result?.runs)) throw new Error("Runner response missing runs array.");
     result.runs.forEach((run) => {
       const matched = automationQueue.find((entry) => entry.uid === run.id || entry.automation.command === run.command);
@@ -6530,6 +6702,77 @@ async function runAutomationQueueViaServer() {
   }
 }
 
+async function runAutomationBatchViaServer(payload) {
+  const response = await fetch(AUTOMATION_SERVER_URL, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify(payload),
+  });
+  if (!response.ok) throw new Error(`Automation runner returned ${response.status}`);
+  return response.json();
+}
+
+// Starts the batch via POST /jobs and follows its event stream; resolves with the
+// finished job (which carries `runs`), or null when the runner predates the jobs API.
+async function runAutomationJobViaServer(payload) {
+  if (typeof EventSource === "undefined") return null;
+  let job;
+  try {
+    const response = await fetch(`${AUTOMATION_SERVER_BASE}/jobs`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify(payload),
+    });
+    if (!response.ok) return null;
+    job = await response.json();
+  } catch (error) {
+    return null;
+  }
+  if (!job?.jobId) return null;
+  return new Promise((resolve, reject) => {
+    const source = new EventSource(`${AUTOMATION_SERVER_BASE}${job.streamUrl || `/jobs/${job.jobId}/stream`}`);
+    source.addEventListener("task", (event) => {
+      const update = JSON.parse(event.data);
+      const matched = automationQueue.find((entry) => entry.uid === update.id);
+      if (!matched) return;
+      if (update.status === "running") {
+        matched.status = "running";
+        matched.progress = Math.max(matched.progress || 0, 30);
+      } else {
+        matched.status = update.status === "done" ? "done" : "error";
+        matched.progress = 100;
+        matched.exitCode = update.exitCode;
+      }
+      renderAutomationQueue();
+    });
+    source.addEventListener("output", (event) => {
+      const update = JSON.parse(event.data);
+      const matched = automationQueue.find((entry) => entry.uid === update.id);
+      if (!matched || !automationStatus) return;
+      automationStatus.textContent = `${matched.automation.label}: ${String(update.text || "").trim()}`;
+    });
+    source.addEventListener("done", (event) => {
+      source.close();
+      resolve(JSON.parse(event.data));
+    });
+    source.onerror = async () => {
+      // EventSource reconnects with Last-Event-ID on its own; only give up once the job is unreachable.
+      try {
+        const response = await fetch(`${AUTOMATION_SERVER_BASE}/jobs/${job.jobId}`);
+        if (!response.ok) throw new Error(`Automation runner returned ${response.status}`);
+        const status = await response.json();
+        if (status.status === "done" || status.status === "failed") {
+          source.close();
+          resolve(status);
+        }
+      } catch (error) {
+        source.close();
+        reject(error);
+      }
+    };
+  });
+}
+
 function renderAutomationQueue() {
   if (!automationQueueList) return;
   automationQueueList.innerHTML = "";
@@ -6604,14 +6847,26 @@ function renderAutomationLog() {
 
 async function refreshAutomationHistoryFromFile() {
   try {
-    let history = null;
-    if (isFileProtocol) {
+    let history = await fetchAutomationHistoryFromServer();
+    if (!history && isFileProtocol) {
       history = getInlineData("automationHistory");
     }
     if (!history) {
-      const response = await fetch("automation/logs/history.json", { cache: "no-store" });
+      // Static hosting: the newest runs are the last lines of the append-only log.
+      const response = await fetch("automation/logs/runs.ndjson", { cache: "no-store" });
       if (!response.ok) return;
-      history = await response.json();
+      const lines = (await response.text()).split("\n").filter((line) => line.trim());
+      history = lines
+        .slice(-8)
+        .reverse()
+        .map((line) => {
+          try {
+            return JSON.parse(line);
+          } catch (error) {
+            return null;
+          }
+        })
+        .filter(Boolean);
     }
     if (Array.isArray(history)) {
       automationLog = history.slice(0, 8);
@@ -6623,6 +6878,17 @@ async function refreshAutomationHistoryFromFile() {
   }
 }
 
+async function fetchAutomationHistoryFromServer() {
+  try {
+    const response = await fetch(`${AUTOMATION_SERVER_BASE}/runs?limit=8`, { cache: "no-store" });
+    if (!response.ok) return null;
+    const result = await response.json();
+    return Array.isArray(result?.runs) ? result.runs : null;
+  } catch (error) {
+    return null;
+  }
+}
+
 function loadAutomationLog() {
   try {
     const stored = localStorage.getItem(AUTOMATION_LOG_KEY);
@@ -7416,7 +7682,7 @@ async function moveDownloadSuggestion(suggestionId) {
 
 function buildDownloadMoveCommand(fileName, destination) {
   const encoded = encodeBase64Utf8(fileName);
-  return `python3 LifeHub/scripts/move_download_item.py --source-b64 ${encoded} --destination ${destination}`;
+  return `python3 scripts/move_download_item.py --source-b64 ${encoded} --destination ${destination}`;
 }
 
 function copyDownloadMoveFallback(command, destination) {
@@ -7600,7 +7866,7 @@ async function moveTriageItem(cardId, destinationRoot) {
 
 function buildTriageMoveCommand(path, destinationRoot) {
   const encoded = encodeBase64Utf8(path);
-  return `python3 LifeHub/scripts/move_inbox_item.py --source-b64 ${encoded} --destination ${destinationRoot}`;
+  return `python3 scripts/move_inbox_item.py --source-b64 ${encoded} --destination ${destinationRoot}`;
 }
 
 function copyTriageMoveFallback(command, destinationRoot) {
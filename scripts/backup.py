@@ -1,34 +1,329 @@
 #!/usr/bin/env python3
-"""Simple backup script for LifeHub: creates a tar.gz snapshot and sha256 checksum.
-Usage: python3 scripts/backup.py [output-dir]
+"""Back up LifeHub as a tar.gz archive or into an incremental chunk repository.
+
+    python3 scripts/backup.py [output-dir]                  # tar.gz + .sha256 (legacy form)
+    python3 scripts/backup.py archive [output-dir] [--workers N] [--level 1-9] [--target ID] [--dry-run]
+    python3 scripts/backup.py snapshot [--repo DIR] [--workers N] [--target ID] [--dry-run]
+    python3 scripts/backup.py plan [--target ID | --all] [--json]
+    python3 scripts/backup.py list [--repo DIR]
+    python3 scripts/backup.py restore SNAPSHOT DEST [--path PREFIX] [--force] [--repo DIR]
+    python3 scripts/backup.py verify [SNAPSHOT] [--read-data] [--repo DIR]
+
+``snapshot`` stores each unique content-defined chunk once (see
+scripts/lib/backup_repo.py) and re-reads only files whose size, mtime or inode
+changed since the previous snapshot. SNAPSHOT may be an id from ``list`` or
+``latest``. The backups/ output folder is never backed up into itself.
+
+``archive`` gzips in parallel blocks (scripts/lib/pgzip.py) and hashes the
+archive while it is written, so the .sha256 needs no second read.
+
+What goes in is decided per target by the ``include``/``exclude`` globs in
+automation/backups/targets.json (on top of BASE_EXCLUDES and DEFAULT_EXCLUDES
+in scripts/lib/backup_targets.py). Only targets with a ``mode`` are copied by
+this script; every run prints the plan first and a
+successful snapshot stamps its target in automation/backups/status.json.
 """
+from __future__ import annotations
+
+import argparse
+import json
 import os
 import sys
 import tarfile
-import hashlib
+import time
 from pathlib import Path
+from typing import List, Optional, Tuple
+
+from lib.backup_repo import (
+    BackupError,
+    ChunkStore,
+    create_snapshot,
+    file_keys,
+    measured_throughput,
+    restore_snapshot,
+    verify_snapshot,
+    walk_tree,
+)
+from lib.backup_targets import (
+    BASE_EXCLUDES,
+    PathRules,
+    copies_files,
+    find_target,
+    load_backup_targets,
+    plan_backup,
+    record_backup,
+)
+from lib.parallel import default_workers
+from lib.pgzip import DEFAULT_LEVEL, HashingWriter, ParallelGzipWriter
 
 ROOT = Path(__file__).resolve().parents[1]
-OUT_DIR = Path(sys.argv[1]) if len(sys.argv) > 1 else ROOT / 'backups'
-OUT_DIR.mkdir(parents=True, exist_ok=True)
-
-def sha256(path):
-    h = hashlib.sha256()
-    with open(path, 'rb') as f:
-        for chunk in iter(lambda: f.read(8192), b''):
-            h.update(chunk)
-    return h.hexdigest()
-
-def main():
-    ts = Path.cwd().stem
-    name = f'lifehub-backup-{int(__import__("time").time())}.tar.gz'
-    out = OUT_DIR / name
-    with tarfile.open(out, 'w:gz') as tar:
-        tar.add(ROOT, arcname='LifeHub')
-    sh = sha256(out)
-    with open(str(out) + '.sha256', 'w') as fh:
-        fh.write(sh)
-    print('Wrote', out, 'and checksum')
-
-if __name__ == '__main__':
+OUT_DIR = ROOT / "backups"
+REPO_DIR = OUT_DIR / "repo"
+TARGETS_PATH = ROOT / "automation" / "backups" / "targets.json"
+STATUS_PATH = ROOT / "automation" / "backups" / "status.json"
+DEFAULT_TARGET = "lifehub-snapshots"
+COMMANDS = ("archive", "snapshot", "plan", "list", "restore", "verify")
+
+
+def human_size(size: int) -> str:
+    units = ["B", "KB", "MB", "GB", "TB"]
+    value = float(size)
+    idx = 0
+    while value >= 1024 and idx < len(units) - 1:
+        value /= 1024
+        idx += 1
+    return f"{value:.1f} {units[idx]}"
+
+
+def is_output(path: Path, excluded: List[Path]) -> bool:
+    return any(path == folder or folder in path.parents for folder in excluded)
+
+
+def load_target(target_id: str) -> Tuple[dict, PathRules]:
+    try:
+        target = find_target(load_backup_targets(TARGETS_PATH), target_id)
+    except KeyError as error:
+        raise BackupError(str(error.args[0])) from error
+    if not copies_files(target):
+        command = target.get("command")
+        raise BackupError(f"Target {target_id} is backed up by its own command ({command}); backup.py cannot copy it")
+    return target, PathRules.from_target(target)
+
+
+def plan_target(target: dict, rules: PathRules, repo: Path, excluded: List[Path]) -> dict:
+    previous = None
+    throughput = target.get("throughput_mb_s")
+    if target.get("mode") == "incremental":
+        store = ChunkStore(repo)
+        if store.snapshot_ids():
+            manifest = store.load_snapshot("latest")
+            previous = file_keys(manifest)
+            throughput = throughput or measured_throughput(manifest)
+    plan = plan_backup(walk_tree(ROOT, excluded, rules=rules), previous=previous, throughput_mb_s=throughput)
+    plan["target"] = target["id"]
+    plan["incremental"] = previous is not None
+    return plan
+
+
+def format_duration(seconds: float) -> str:
+    minutes, secs = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}h {minutes:02d}m"
+    if minutes:
+        return f"{minutes}m {secs:02d}s"
+    return f"{secs}s"
+
+
+def print_plan(target: dict, rules: PathRules, plan: dict) -> None:
+    print(f"Target {target['id']} ({target.get('label')})")
+    if rules.include:
+        print(f"  include: {', '.join(rules.include)}")
+    extra = [pattern for pattern in rules.exclude if pattern not in BASE_EXCLUDES]
+    print(f"  exclude: {', '.join(extra) or '-'} (plus VCS, cache and backups/ folders)")
+    print(f"  {plan['files']} files, {human_size(plan['bytes'])}")
+    if plan["incremental"]:
+        print(f"  changed since last snapshot: {plan['changedFiles']} files, {human_size(plan['changedBytes'])}")
+    print(f"  estimated time: ~{format_duration(plan['estimatedSeconds'])} at {plan['throughputMBs']} MB/s")
+    if plan["areas"]:
+        print("  largest areas: " + ", ".join(f"{area} {human_size(size)}" for area, size in plan["areas"].items()))
+
+
+def plan(args: argparse.Namespace) -> None:
+    targets = load_backup_targets(TARGETS_PATH)
+    ids = [target["id"] for target in targets if copies_files(target)] if args.all else [args.target]
+    plans = []
+    for target_id in ids:
+        target, rules = load_target(target_id)
+        result = plan_target(target, rules, args.repo, [OUT_DIR, args.repo])
+        plans.append(result)
+        if not args.json:
+            print_plan(target, rules, result)
+    if args.json:
+        print(json.dumps(plans, indent=2))
+
+
+def archive(args: argparse.Namespace) -> None:
+    out_dir = Path(args.output_dir).expanduser().resolve() if args.output_dir else OUT_DIR
+    target, rules = load_target(args.target)
+    excluded = [OUT_DIR.resolve(), out_dir]
+    print_plan(target, rules, plan_target(target, rules, REPO_DIR, excluded))
+    if args.dry_run:
+        return
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    def select(info: tarfile.TarInfo) -> Optional[tarfile.TarInfo]:
+        relative = info.name.split("/", 1)[1] if "/" in info.name else ""
+        if not relative:
+            return info
+        if is_output(ROOT / relative, excluded):
+            return None
+        if info.isdir():
+            return None if rules.skip_dir(relative) else info
+        return info if rules.wants_file(relative) else None
+
+    out = out_dir / f"lifehub-backup-{int(time.time())}.tar.gz"
+    partial = out.with_name(f".{out.name}.partial")
+    started = time.monotonic()
+    try:
+        with open(partial, "wb") as raw:
+            sink = HashingWriter(raw)
+            with ParallelGzipWriter(sink, level=args.level, workers=args.workers) as gz:
+                with tarfile.open(fileobj=gz, mode="w|") as tar:
+                    tar.add(ROOT, arcname="LifeHub", filter=select)
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.replace(partial, out)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+    Path(f"{out}.sha256").write_text(sink.hexdigest())
+    elapsed = time.monotonic() - started
+    print(
+        f"Wrote {out} and checksum: {human_size(gz.bytes_in)} tar -> {human_size(sink.bytes_written)} "
+        f"in {elapsed:.1f}s with {gz.workers} worker(s)"
+    )
+
+
+def snapshot(args: argparse.Namespace) -> None:
+    store = ChunkStore(args.repo)
+    target, rules = load_target(args.target)
+    excluded = [OUT_DIR, args.repo]
+    print_plan(target, rules, plan_target(target, rules, args.repo, excluded))
+    if args.dry_run:
+        return
+    manifest = create_snapshot(store, ROOT, exclude=excluded, workers=args.workers, rules=rules)
+    stats = manifest["stats"]
+    print(
+        f"Snapshot {manifest['id']}: {stats['files']} files ({human_size(stats['totalBytes'])}), "
+        f"{stats['reused']} unchanged, {stats['read']} read ({human_size(stats['bytesRead'])}), "
+        f"{human_size(stats['bytesWritten'])} new data in {stats['seconds']}s"
+    )
+    for error in stats["errors"]:
+        print(f"  skipped {error}", file=sys.stderr)
+    record_backup(
+        STATUS_PATH,
+        target["id"],
+        f"Snapshot {manifest['id']}: {stats['read']} changed file(s), {human_size(stats['bytesWritten'])} new data",
+    )
+
+
+def list_snapshots(args: argparse.Namespace) -> None:
+    store = ChunkStore(args.repo)
+    ids = store.snapshot_ids()
+    if not ids:
+        print(f"No snapshots in {args.repo}")
+        return
+    for snapshot_id in ids:
+        stats = store.load_snapshot(snapshot_id).get("stats", {})
+        print(
+            f"{snapshot_id}  {stats.get('files', 0)} files  {human_size(stats.get('totalBytes', 0))}"
+            f"  +{human_size(stats.get('bytesWritten', 0))}"
+        )
+
+
+def restore(args: argparse.Namespace) -> None:
+    store = ChunkStore(args.repo)
+    manifest = store.load_snapshot(args.snapshot)
+    dest = Path(args.dest).expanduser().resolve()
+    if (dest == ROOT or ROOT in dest.parents) and not args.force:
+        raise BackupError(f"{dest} is inside the live LifeHub tree; pass --force to overwrite files there")
+    count = restore_snapshot(store, manifest, dest, args.path or "")
+    print(f"Restored {count} file(s) from {manifest['id']} into {dest}")
+
+
+def verify(args: argparse.Namespace) -> None:
+    store = ChunkStore(args.repo)
+    manifest = store.load_snapshot(args.snapshot)
+    problems = verify_snapshot(store, manifest, read_data=args.read_data)
+    for problem in problems:
+        print(problem)
+    checked = "chunk data" if args.read_data else "chunk presence"
+    if problems:
+        raise BackupError(f"Snapshot {manifest['id']}: {len(problems)} damaged file(s)")
+    print(f"Snapshot {manifest['id']} OK ({len(manifest['files'])} files, checked {checked})")
+
+
+def add_repo(sub: argparse.ArgumentParser) -> None:
+    sub.add_argument("--repo", type=Path, default=REPO_DIR, help="Chunk repository (default: backups/repo)")
+
+
+def add_target(sub: argparse.ArgumentParser) -> None:
+    sub.add_argument(
+        "--target",
+        default=DEFAULT_TARGET,
+        help="Target in automation/backups/targets.json whose include/exclude globs apply (default: %(default)s)",
+    )
+    sub.add_argument("--dry-run", action="store_true", help="Only print the plan (files, bytes, time estimate)")
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    # ``backup.py`` and ``backup.py <output-dir>`` keep meaning "write a tar.gz".
+    if not argv or (argv[0] not in COMMANDS and not argv[0].startswith("-")):
+        argv = ["archive", *argv]
+    parser = argparse.ArgumentParser(description="Back up the LifeHub tree.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    archive_parser = commands.add_parser("archive", help="Write a full tar.gz archive and its sha256")
+    archive_parser.add_argument("output_dir", nargs="?", help="Folder for the archive (default: backups/)")
+    archive_parser.add_argument(
+        "--workers",
+        type=int,
+        default=default_workers(),
+        help="Threads compressing gzip blocks in parallel (default: %(default)s)",
+    )
+    archive_parser.add_argument(
+        "--level", type=int, default=DEFAULT_LEVEL, choices=range(1, 10), metavar="1-9", help="gzip level"
+    )
+    add_target(archive_parser)
+    archive_parser.set_defaults(handler=archive)
+
+    snapshot_parser = commands.add_parser("snapshot", help="Take an incremental, deduplicated snapshot")
+    add_repo(snapshot_parser)
+    snapshot_parser.add_argument(
+        "--workers",
+        type=int,
+        default=default_workers(),
+        help="Files chunked and compressed in parallel (default: %(default)s)",
+    )
+    add_target(snapshot_parser)
+    snapshot_parser.set_defaults(handler=snapshot)
+
+    plan_parser = commands.add_parser("plan", help="Estimate files, bytes and time per backup target")
+    add_repo(plan_parser)
+    plan_parser.add_argument("--target", default=DEFAULT_TARGET, help="Target id (default: %(default)s)")
+    plan_parser.add_argument("--all", action="store_true", help="Plan every target in targets.json")
+    plan_parser.add_argument("--json", action="store_true", help="Print the plans as JSON")
+    plan_parser.set_defaults(handler=plan)
+
+    list_parser = commands.add_parser("list", help="List snapshots in the repository")
+    add_repo(list_parser)
+    list_parser.set_defaults(handler=list_snapshots)
+
+    restore_parser = commands.add_parser("restore", help="Restore a snapshot (or part of it) into a folder")
+    add_repo(restore_parser)
+    restore_parser.add_argument("snapshot", help="Snapshot id or 'latest'")
+    restore_parser.add_argument("dest", help="Folder to restore into")
+    restore_parser.add_argument("--path", help="Only restore this file or folder (relative to LifeHub)")
+    restore_parser.add_argument("--force", action="store_true", help="Allow restoring into the LifeHub tree itself")
+    restore_parser.set_defaults(handler=restore)
+
+    verify_parser = commands.add_parser("verify", help="Check that a snapshot's chunks are present and intact")
+    add_repo(verify_parser)
+    verify_parser.add_argument("snapshot", nargs="?", default="latest", help="Snapshot id or 'latest'")
+    verify_parser.add_argument("--read-data", action="store_true", help="Decompress and re-hash every chunk")
+    verify_parser.set_defaults(handler=verify)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    try:
+        args.handler(args)
+    except BackupError as error:
+        print(f"Error: {error}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
     main()
@@ -13,8 +13,11 @@ from pathlib import Path
 from typing import Any, Dict, Optional
 
 from lib.backup_targets import compute_backup_status, load_backup_logs, load_backup_targets
+from lib.jsonstream import atomic_writer
+from lib.runlog import RunLog, summarize
 
 ROOT = Path(__file__).resolve().parent.parent
+AUTOMATION_HISTORY_LIMIT = 20
 
 
 def read_json(path: Path) -> Optional[Any]:
@@ -39,7 +42,8 @@ def build_inline_payload() -> Dict[str, Any]:
     "recentFiles": read_json(ROOT / "recent-files.json"),
     "downloadsFeed": read_json(ROOT / "downloads-feed.json"),
     "agendaReminders": read_json(ROOT / "agenda-reminders.json"),
-    "automationHistory": read_json(ROOT / "automation/logs/history.json"),
+    # Only the newest lines of the run log are read, newest first, without output.
+    "automationHistory": [summarize(run) for run in RunLog(ROOT / "automation/logs").tail(AUTOMATION_HISTORY_LIMIT)],
     "calendarIcs": read_text(ROOT / "Resources/calendar.ics"),
   }
   try:
@@ -50,15 +54,14 @@ def build_inline_payload() -> Dict[str, Any]:
       payload["backups"] = backups
   except FileNotFoundError:
     pass
-  search_index = read_json(ROOT / "search-index.json")
-  if search_index:
-    payload["searchIndex"] = search_index[:500]
+  # The search index is not inlined: dashboard.js loads search-index/*.js shards
+  # on demand via <script> tags, which works under file:// as well.
   return {key: value for key, value in payload.items() if value is not None}
 
 
 def write_inline_file(data: Dict[str, Any]) -> None:
   output_path = ROOT / "dashboard-inline-data.js"
-  with output_path.open("w", encoding="utf-8") as handle:
+  with atomic_writer(output_path) as handle:
     handle.write("// Auto-generated by scripts/build_dashboard_inline_data.py\n")
     handle.write("window.LIFEHUB_INLINE_DATA = ")
     json.dump(data, handle, ensure_ascii=True, indent=2)
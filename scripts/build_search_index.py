@@ -1,16 +1,40 @@
 #!/usr/bin/env python3
-"""Build a lightweight search index for Copilot/command palette."""
+"""Build the inverted full-text search index for Copilot/command palette.
+
+See scripts/lib/inverted_index.py for the search-index.json layout.
+"""
 
 from __future__ import annotations
 
+import argparse
+import hashlib
 import json
-import os
+import sys
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Iterable
 
+from lib import metrics
+from lib.catalog import open_catalog
+from lib.inverted_index import (
+    INDEX_VERSION,
+    TermPositions,
+    build_index,
+    explode_index,
+    format_shard_js,
+    shard_index,
+    term_positions,
+)
+from lib.jsonstream import atomic_write_text, write_json
+from lib.parallel import EXECUTORS, default_workers, ordered_map
+from lib.scanner import FileRecord, Snapshot, is_generated_page
+
 ROOT = Path(__file__).resolve().parents[1]
 OUTPUT_PATH = ROOT / "search-index.json"
+# Lazily-loaded copy of the index for the dashboard (see write_shards).
+SHARD_DIR = ROOT / "search-index"
+# path -> [size, mtime, content hash] for every file in the last build
+MANIFEST_PATH = ROOT / "automation" / "cache" / "search-manifest.json"
 TEXT_EXTENSIONS = {
     ".txt",
     ".md",
@@ -61,54 +85,230 @@ INDEX_ROOTS = [
 ]
 
 
-def iter_text_files(base: Path) -> Iterable[Path]:
-    if not base.exists():
-        return
-    for dirpath, dirnames, filenames in os.walk(base):
-        rel_dir = Path(dirpath).relative_to(ROOT)
-        dirnames[:] = [name for name in dirnames if name not in SKIP_DIRS]
-        for filename in filenames:
-            path = Path(dirpath) / filename
-            if path.suffix.lower() not in TEXT_EXTENSIONS:
-                continue
-            try:
-                if path.stat().st_size > MAX_FILE_SIZE:
-                    continue
-            except OSError:
-                continue
-            yield path
+def iter_text_files(base: Path, snapshot: Snapshot) -> Iterable[FileRecord]:
+    for record in snapshot.iter_files(snapshot.relative(base), skip_dirs=SKIP_DIRS):
+        if Path(record.name).suffix.lower() not in TEXT_EXTENSIONS or is_generated_page(snapshot.absolute(record)):
+            continue
+        if record.size > MAX_FILE_SIZE:
+            continue
+        yield record
 
 
-def build_entry(path: Path) -> dict | None:
-    try:
-        text = path.read_text(encoding="utf-8", errors="ignore")
-    except OSError:
-        return None
+IndexedDoc = tuple[dict, TermPositions]
+
+
+def build_entry(record: FileRecord, data: bytes | None = None) -> IndexedDoc | None:
+    if data is None:
+        try:
+            data = (ROOT / record.path).read_bytes()
+        except OSError:
+            return None
+    text = data.decode("utf-8", errors="ignore")
     snippet = " ".join(text.split())[:MAX_SNIPPET_CHARS]
-    segments = path.relative_to(ROOT).parts
-    area = segments[0] if segments else ""
-    try:
-        mtime = path.stat().st_mtime
-        modified = datetime.fromtimestamp(mtime, tz=timezone.utc).isoformat()
-    except OSError:
-        modified = None
-    return {
-        "path": "/".join(segments),
-        "area": area,
+    modified = datetime.fromtimestamp(record.mtime, tz=timezone.utc).isoformat()
+    # Folder and file names are indexed ahead of the body so path words match too.
+    terms, length = term_positions(f"{record.path.replace('/', ' ')} {text}")
+    doc = {
+        "path": record.path,
+        "area": record.area,
         "snippet": snippet,
         "modified": modified,
+        "length": length,
     }
+    return doc, terms
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def read_json(path: Path, default):
+    try:
+        with path.open("r", encoding="utf-8") as handle:
+            return json.load(handle)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return default
+
+
+def load_previous_build() -> tuple[dict[str, IndexedDoc], dict[str, list]]:
+    """Return the last index (keyed by path) and its manifest, or empties if either is missing.
+
+    Older flat-list indexes have no term positions, so they trigger a full rebuild.
+    """
+    manifest = read_json(MANIFEST_PATH, {})
+    index = read_json(OUTPUT_PATH, {})
+    if not isinstance(manifest, dict) or not isinstance(index, dict) or index.get("version") != INDEX_VERSION:
+        return {}, {}
+    docs = index.get("docs") or []
+    previous = {doc["path"]: (doc, terms) for doc, terms in zip(docs, explode_index(index))}
+    return previous, manifest
+
+
+def needs_read(record: FileRecord, previous: dict[str, IndexedDoc], manifest: dict[str, list]) -> bool:
+    known = manifest.get(record.path)
+    return not (record.path in previous and known and known[0] == record.size and known[1] == record.mtime)
+
+
+def read_document(record: FileRecord, known_digest: str | None = None) -> tuple[str, IndexedDoc | None] | None:
+    """Read, hash and tokenize one file; runs inside the worker pool.
+
+    Returns ``None`` if the file vanished, ``(digest, None)`` when the content
+    still hashes to ``known_digest`` (so the caller can reuse its old entry),
+    or ``(digest, (doc, terms))`` for new or edited files.
+    """
+    try:
+        data = (ROOT / record.path).read_bytes()
+    except OSError:
+        return None
+    digest = content_hash(data)
+    if digest == known_digest:
+        return digest, None
+    return digest, build_entry(record, data)
+
+
+def _read_job(job: tuple[FileRecord, str | None]):
+    return read_document(*job)
+
+
+def update_entry(
+    record: FileRecord,
+    previous: dict[str, IndexedDoc],
+    manifest: dict[str, list],
+    counts: dict[str, int],
+    result: tuple[str, IndexedDoc | None] | None = None,
+) -> tuple[IndexedDoc | None, list | None]:
+    """Reuse the previous entry when size/mtime (or failing that, the content hash) still match.
+
+    ``result`` is the :func:`read_document` output when the file was already
+    read by the worker pool.
+    """
+    known = manifest.get(record.path)
+    old_entry = previous.get(record.path)
+    if not needs_read(record, previous, manifest):
+        counts["unchanged"] += 1
+        return old_entry, known
+    if result is None:
+        result = read_document(record, known[2] if known and old_entry else None)
+    if result is None:
+        return None, None
+    digest, entry = result
+    state = [record.size, record.mtime, digest]
+    if entry is None and old_entry:
+        # Touched but not edited: keep the snippet and terms, refresh the timestamp.
+        counts["touched"] += 1
+        doc = dict(old_entry[0])
+        doc["modified"] = datetime.fromtimestamp(record.mtime, tz=timezone.utc).isoformat()
+        return (doc, old_entry[1]), state
+    counts["read"] += 1
+    return entry, state
+
+
+def write_shards(index: dict) -> int:
+    """Write the index as lazily-loaded script shards under SHARD_DIR.
+
+    Shards whose content is unchanged are left alone; the manifest records a
+    short hash per shard so browsers only refetch what actually changed.
+    Returns the number of shard files rewritten.
+    """
+    SHARD_DIR.mkdir(parents=True, exist_ok=True)
+    shards = shard_index(index)
+    manifest = shards.pop("manifest")
+    hashes: dict[str, str] = {}
+    written = 0
+    for name, payload in shards.items():
+        text = format_shard_js(name, payload)
+        hashes[name] = hashlib.blake2b(text.encode("utf-8"), digest_size=6).hexdigest()
+        target = SHARD_DIR / f"{name}.js"
+        try:
+            if target.read_text(encoding="utf-8") == text:
+                continue
+        except OSError:
+            pass
+        atomic_write_text(target, text)
+        written += 1
+    for stale in SHARD_DIR.glob("*.js"):
+        if stale.stem != "manifest" and stale.stem not in hashes:
+            stale.unlink()
+    manifest["generatedAt"] = datetime.now(timezone.utc).isoformat()
+    manifest["files"] = hashes
+    atomic_write_text(SHARD_DIR / "manifest.js", format_shard_js("manifest", manifest))
+    return written
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build search-index.json for Copilot and the command palette.")
+    parser.add_argument("--full", action="store_true", help="Ignore the manifest and re-read every file")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help=f"Read and tokenize changed files with N parallel workers (this host: {default_workers()} suggested)",
+    )
+    parser.add_argument(
+        "--executor",
+        choices=EXECUTORS,
+        default="thread",
+        help="thread suits slow/network storage; process spreads tokenizing of large files across cores",
+    )
+    return parser.parse_args(argv)
+
+
+def main(snapshot: Snapshot | None = None, argv: list[str] | None = None) -> None:
+    """Build the index; flags come from the command line unless ``snapshot`` is passed in (then none apply)."""
+    if argv is None:
+        argv = [] if snapshot is not None else sys.argv[1:]
+    args = parse_args(argv)
+    if snapshot is None:
+        catalog = open_catalog(ROOT)
+        try:
+            build(catalog, full=args.full, workers=args.workers, executor=args.executor)
+        finally:
+            catalog.close()
+    else:
+        build(snapshot, full=args.full, workers=args.workers, executor=args.executor)
 
 
-def main() -> None:
-    entries: list[dict] = []
-    for root in INDEX_ROOTS:
-        for path in iter_text_files(ROOT / root):
-            entry = build_entry(path)
-            if entry:
-                entries.append(entry)
-    OUTPUT_PATH.write_text(json.dumps(entries, indent=2), encoding="utf-8")
-    print(f"Wrote search index with {len(entries)} entries -> {OUTPUT_PATH}")
+def build(snapshot: Snapshot, *, full: bool = False, workers: int = 1, executor: str = "thread") -> None:
+    with metrics.timer("load"):
+        previous, manifest = ({}, {}) if full else load_previous_build()
+    with metrics.timer("list"):
+        records = [record for root in INDEX_ROOTS for record in iter_text_files(ROOT / root, snapshot)]
+    jobs = []
+    for record in records:
+        if needs_read(record, previous, manifest):
+            known = manifest.get(record.path)
+            jobs.append((record, known[2] if known and record.path in previous else None))
+    # Workers only see the files that changed; results come back in job order.
+    with metrics.timer("read"):
+        results = {
+            job[0].path: result
+            for job, result in zip(jobs, ordered_map(_read_job, jobs, workers=workers, executor=executor))
+        }
+    counts = {"unchanged": 0, "touched": 0, "read": 0}
+    docs: list[dict] = []
+    doc_terms: list[TermPositions] = []
+    next_manifest: dict[str, list] = {}
+    for record in records:
+        entry, state = update_entry(record, previous, manifest, counts, results.get(record.path))
+        if entry:
+            docs.append(entry[0])
+            doc_terms.append(entry[1])
+            next_manifest[record.path] = state
+    removed = len(previous.keys() - next_manifest.keys())
+    with metrics.timer("index"):
+        index = build_index(docs, doc_terms)
+    with metrics.timer("write"):
+        write_json(OUTPUT_PATH, index, ensure_ascii=False)
+        write_json(MANIFEST_PATH, next_manifest, ensure_ascii=False)
+        rewritten = write_shards(index)
+    metrics.count("files", len(records))
+    metrics.count("filesRead", counts["read"])
+    metrics.count("bytesRead", sum(record.size for record, _ in jobs))
+    print(
+        f"Wrote search index with {len(docs)} documents / {len(index['terms'])} terms -> {OUTPUT_PATH} "
+        f"({counts['read']} read, {counts['touched']} touched, {counts['unchanged']} unchanged, {removed} removed; "
+        f"{rewritten} shards rewritten in {SHARD_DIR.name}/)"
+    )
 
 
 if __name__ == "__main__":
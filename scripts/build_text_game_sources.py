@@ -6,6 +6,8 @@ import json
 from pathlib import Path
 from typing import Iterable, Tuple
 
+from lib import metrics
+
 
 ROOT = Path(__file__).resolve().parents[1]
 SOURCES: Iterable[Tuple[str, Path]] = (
@@ -24,6 +26,7 @@ def main() -> None:
         text = path.read_text()
         lines.append(f"window.LIFEHUB_GAME_SOURCES.{key} = {json.dumps(text)};")
     TARGET.write_text("\n".join(lines) + "\n")
+    metrics.count("sources", len(SOURCES))
 
 
 if __name__ == "__main__":
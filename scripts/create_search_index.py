@@ -3,22 +3,26 @@
 Writes scripts/search_index.json
 """
 import json
-import os
 from pathlib import Path
 
+from lib.catalog import open_catalog
+
 ROOT = Path(__file__).resolve().parents[1]
 OUT = Path(__file__).parent / 'search_index.json'
 
-def main():
+def main(snapshot=None):
+    # the catalog already prunes .git/node_modules and friends
+    if snapshot is None:
+        catalog = open_catalog(ROOT)
+        try:
+            main(catalog)
+        finally:
+            catalog.close()
+        return
     index = []
-    for dirpath, dirs, files in os.walk(ROOT):
-        # skip large directories
-        if 'node_modules' in dirpath or '.git' in dirpath:
-            continue
-        for f in files:
-            if f.lower().endswith(('.md','.txt','.py','.csv','.html')):
-                p = os.path.join(dirpath, f)
-                index.append({ 'name': f, 'path': os.path.relpath(p, ROOT) })
+    for record in snapshot.iter_files():
+        if record.name.lower().endswith(('.md','.txt','.py','.csv','.html')):
+            index.append({ 'name': record.name, 'path': record.path })
     OUT.write_text(json.dumps(index, indent=2))
     print('Wrote', OUT)
 
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Find byte-identical files across the LifeHub tree.
+
+    python3 scripts/dedup.py report [--min-size BYTES] [--limit N] [--json] [--full-scan]
+
+Sizes come from the catalog, so only files sharing a size are ever opened;
+those are compared by a partial hash of their first and last 64 KiB and only
+partial collisions are hashed in full. Hashes persist in
+automation/cache/dedup.sqlite, so repeat reports only read changed files.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import List
+
+from lib.catalog import open_catalog
+from lib.dedup import HashIndex
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_MIN_SIZE = 1024
+
+
+def human_size(size: int) -> str:
+    units = ["B", "KB", "MB", "GB", "TB"]
+    value = float(size)
+    idx = 0
+    while value >= 1024 and idx < len(units) - 1:
+        value /= 1024
+        idx += 1
+    return f"{value:.1f} {units[idx]}"
+
+
+def find_groups(min_size: int, full_scan: bool = False) -> List[dict]:
+    catalog = open_catalog(ROOT, full=full_scan)
+    try:
+        size_groups = ([ROOT / rel for rel in group] for group in catalog.size_groups(min_size))
+        with HashIndex() as index:
+            index.prune()
+            groups = []
+            for paths in index.duplicate_groups(size_groups):
+                size = paths[0].stat().st_size
+                groups.append(
+                    {
+                        "size": size,
+                        "wasted": size * (len(paths) - 1),
+                        "paths": [str(path.relative_to(ROOT)) for path in paths],
+                    }
+                )
+            print(f"Hashed {human_size(index.hashed_bytes)} this run", file=sys.stderr)
+    finally:
+        catalog.close()
+    groups.sort(key=lambda group: (-group["wasted"], group["paths"][0]))
+    return groups
+
+
+def report(args: argparse.Namespace) -> None:
+    groups = find_groups(args.min_size, args.full_scan)
+    wasted = sum(group["wasted"] for group in groups)
+    if args.json:
+        print(json.dumps({"groups": groups, "wasted": wasted}, indent=2))
+        return
+    shown = groups[: args.limit] if args.limit else groups
+    for group in shown:
+        copies = len(group["paths"])
+        print(f"\n{copies} copies × {human_size(group['size'])} ({human_size(group['wasted'])} reclaimable)")
+        for path in group["paths"]:
+            print(f"  {path}")
+    if len(shown) < len(groups):
+        print(f"\n… {len(groups) - len(shown)} more group(s); use --limit 0 to show all")
+    print(f"\n{len(groups)} duplicate group(s), {human_size(wasted)} reclaimable")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Content-addressed duplicate detection for LifeHub.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    report_parser = commands.add_parser("report", help="List groups of identical files across the tree")
+    report_parser.add_argument(
+        "--min-size",
+        type=int,
+        default=DEFAULT_MIN_SIZE,
+        help=f"Ignore files smaller than this many bytes (default: {DEFAULT_MIN_SIZE})",
+    )
+    report_parser.add_argument("--limit", type=int, default=50, help="Groups to print, largest first (0 = all)")
+    report_parser.add_argument("--json", action="store_true", help="Print the groups as JSON")
+    report_parser.add_argument(
+        "--full-scan",
+        action="store_true",
+        help="Re-list every folder in the catalog first (catches in-place edits)",
+    )
+    report_parser.set_defaults(handler=report)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
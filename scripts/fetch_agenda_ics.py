@@ -8,6 +8,8 @@ import sys
 import urllib.request
 from pathlib import Path
 
+from lib import metrics
+
 ROOT = Path(__file__).resolve().parents[1]
 CONFIG_PATH = ROOT / "automation/agenda/source.json"
 DEST_PATH = ROOT / "Resources/calendar.ics"
@@ -52,6 +54,15 @@ def main() -> None:
     else:
         print("Config must define either 'ics_url' or 'local_path'.", file=sys.stderr)
         return
+    metrics.count("bytesFetched", len(text.encode("utf-8")))
+    try:
+        unchanged = DEST_PATH.read_text(encoding="utf-8") == text
+    except FileNotFoundError:
+        unchanged = False
+    if unchanged:
+        # Leave the mtime alone so the refresh does not see Resources/ as changed.
+        print(f"{DEST_PATH} already matches {source_label}")
+        return
     DEST_PATH.write_text(text, encoding="utf-8")
     print(f"Updated {DEST_PATH} from {source_label}")
 
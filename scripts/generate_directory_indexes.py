@@ -1,24 +1,80 @@
 #!/usr/bin/env python3
-"""Generate pretty index.html files for every LifeHub directory."""
+"""Generate pretty index.html files for every LifeHub directory.
+
+Folders are walked with ``os.scandir`` down to ``--max-depth`` and no further.
+Every folder is listed once per run and every entry statted once
+(:class:`Listings`). The main process does the walk and gathers what each page
+shows into a :class:`PageListing` (its entries plus, per subfolder card, that
+folder's entries and hero image). Turning one into HTML is a pure function
+of the listing and an :class:`IndexConfig`, so with ``--jobs N`` the pages are
+fingerprinted, rendered and written by a pool of worker processes (``0`` means
+one per CPU, as ``refresh_indexes.sh`` and ``refresh_all`` use).
+
+Each page carries a fingerprint of everything it shows (the listing, the
+templates and TEMPLATE_VERSION) in a ``<meta name="lifehub-index">`` tag; when
+the fingerprint still matches, the page is neither rendered nor rewritten, so
+its mtime only moves when its content does. ``--force`` rewrites every page.
+Pages are written a depth level at a time, deepest first: creating a page
+bumps its folder's mtime, which the parent's cards show.
+
+Folders with more than ``--page-size`` files (default 500) are split into
+static pages of that many rows (index.html, index-2.html, ...) plus an
+``index-listing.js`` sidecar holding every row as compact JSON. With
+JavaScript on, the page loads the sidecar after first paint and swaps the
+table for a virtually scrolled one that only keeps the visible rows in the
+DOM. The sidecar is a script rather than a bare .json file so it also loads
+over file://. Only extra pages and sidecars carrying this generator's marker (the
+``lifehub-index`` meta tag, the ``window.LIFEHUB_LISTING`` prefix) count as
+generated; a user's own ``index-2.html`` is listed like any other file and
+keeps its folder on a single page.
+
+Card hero images over 192 KB are shown through 480 px JPEG thumbnails cached
+in ``<root>/.thumbs/`` (:mod:`lib.thumbnails`) and named after the source
+path, size and mtime, so an edited image gets a fresh one. They are generated
+in parallel with ``--jobs``; thumbnails nothing refers to any more are
+deleted after a full run. Thumbnails need Pillow (``pip install Pillow``) or
+macOS ``sips``; without either, or with ``--no-thumbnails``, the cards keep
+using the original images.
+"""
 from __future__ import annotations
 
 import argparse
+import hashlib
+import json
+import math
 import os
+import re
+from collections import defaultdict
+from dataclasses import dataclass
 from datetime import datetime
+from functools import partial
 from pathlib import Path
+from typing import Iterator, NamedTuple
+
+from lib import metrics
+from lib.jsonstream import COMPACT_SEPARATORS, atomic_write_text
+from lib.parallel import default_workers, make_executor
+from lib.scanner import is_generated_page
+from lib.thumbnails import THUMBS_DIR_NAME, Source, ThumbnailStore
 
 SCRIPT_DIR = Path(__file__).resolve().parent
 DEFAULT_ROOT = SCRIPT_DIR.parent
-TARGET_ROOT = DEFAULT_ROOT
 CSS_NAME = "directory.css"
 CSS_SOURCE = DEFAULT_ROOT / CSS_NAME
 TITLE_PREFIX_DEFAULT = "LifeHub"
-TITLE_LABEL = TITLE_PREFIX_DEFAULT
-SKIP_DIR_NAMES = {".git", "node_modules", "__pycache__"}
+SKIP_DIR_NAMES = {".git", "node_modules", "__pycache__", THUMBS_DIR_NAME}
 SKIP_DIR_SUFFIXES = (".app", ".bundle")
-SKIP_FILE_NAMES = {"index.html"}
+LISTING_NAME = "index-listing.js"
+# How many folder levels below a card find_preview_image looks for a hero image.
+HERO_SEARCH_DEPTH = 2
 MAX_DEPTH_DEFAULT = 3
-MAX_DEPTH = MAX_DEPTH_DEFAULT
+# Files per static page; bigger folders get extra pages and a listing sidecar.
+PAGE_ROWS_DEFAULT = 500
+# Bump when the rendering code changes in a way the templates below do not show.
+TEMPLATE_VERSION = 3
+FINGERPRINT_PATTERN = re.compile(rb'<meta name="lifehub-index" content="([0-9a-f]+)"')
+UPDATED, UNCHANGED, UNWRITABLE = "updated", "unchanged", "unwritable"
+
 DEFAULT_CSS_CONTENT = """
 :root {
   font-family: "Segoe UI", system-ui, -apple-system, BlinkMacSystemFont, sans-serif;
@@ -43,6 +99,7 @@ TEMPLATE = """<!DOCTYPE html>
 <head>
   <meta charset=\"UTF-8\" />
   <meta name=\"viewport\" content=\"width=device-width, initial-scale=1\" />
+  <meta name=\"lifehub-index\" content=\"{fingerprint}\" />
   <title>{title}</title>
   <link rel=\"stylesheet\" href=\"{css_path}\" />
 </head>
@@ -84,6 +141,127 @@ CARD_TEMPLATE = """
   </ul>
 </article>
 """.strip()
+PAGED_TABLE_TEMPLATE = """
+<div class=\"file-scroller\" data-listing=\"{listing}\" data-first-row=\"{first_row}\"{parent_attr}>
+      {table}
+    </div>
+    {pagination}
+    <script>{script}</script>
+""".strip()
+# Loads the listing sidecar and keeps only the rows in view (plus a margin) in the table.
+VIRTUAL_SCROLL_SCRIPT = """
+(function () {
+  var box = document.querySelector("[data-listing]");
+  if (!box) return;
+  var sidecar = document.createElement("script");
+  sidecar.src = box.getAttribute("data-listing");
+  sidecar.onload = function () {
+    var listing = window.LIFEHUB_LISTING;
+    var body = box.querySelector("tbody");
+    if (!listing || !body) return;
+    var rows = listing.rows;
+    var parentRow = box.hasAttribute("data-parent") ? body.rows[0] : null;
+    var sample = body.rows[parentRow ? 1 : 0];
+    var height = (sample && sample.getBoundingClientRect().height) || 40;
+    var pad = function (value) { return String(value).padStart(2, "0"); };
+    var size = function (bytes) {
+      if (bytes <= 0) return "\\u2014";
+      var units = ["B", "KB", "MB", "GB", "TB"], value = bytes, idx = 0;
+      while (value >= 1024 && idx < units.length - 1) { value /= 1024; idx += 1; }
+      return value.toFixed(1) + " " + units[idx];
+    };
+    var spacer = function (count) {
+      var tr = document.createElement("tr");
+      tr.innerHTML = '<td colspan="3" style="padding:0;border:0"></td>';
+      tr.style.height = count * height + "px";
+      return tr;
+    };
+    var makeRow = function (row) {
+      var date = new Date(row[2] * 1000);
+      var day = date.getFullYear() + "-" + pad(date.getMonth() + 1) + "-" + pad(date.getDate());
+      var clock = pad(date.getHours()) + ":" + pad(date.getMinutes());
+      var tr = document.createElement("tr");
+      tr.innerHTML = '<td class="name"><a></a></td><td></td><td><time></time></td>';
+      var link = tr.querySelector("a");
+      link.href = encodeURIComponent(row[0]);
+      link.textContent = row[0];
+      tr.children[1].textContent = size(row[1]);
+      var time = tr.querySelector("time");
+      time.dateTime = day + "T" + clock + ":" + pad(date.getSeconds());
+      time.textContent = day + " " + clock;
+      return tr;
+    };
+    var drawn = -1;
+    var draw = function () {
+      var first = Math.max(0, Math.floor(box.scrollTop / height) - 30);
+      if (first === drawn) return;
+      drawn = first;
+      var last = Math.min(rows.length, first + Math.ceil(box.clientHeight / height) + 60);
+      var nodes = parentRow ? [parentRow, spacer(first)] : [spacer(first)];
+      for (var idx = first; idx < last; idx += 1) nodes.push(makeRow(rows[idx]));
+      nodes.push(spacer(rows.length - last));
+      body.replaceChildren.apply(body, nodes);
+    };
+    var queued = false;
+    box.style.maxHeight = "75vh";
+    box.style.overflowY = "auto";
+    box.addEventListener("scroll", function () {
+      if (queued) return;
+      queued = true;
+      requestAnimationFrame(function () { queued = false; draw(); });
+    });
+    document.querySelectorAll(".pagination").forEach(function (nav) { nav.hidden = true; });
+    draw();
+    box.scrollTop = Number(box.getAttribute("data-first-row")) * height;
+  };
+  document.body.appendChild(sidecar);
+})();
+""".strip()
+
+
+@dataclass(frozen=True)
+class IndexConfig:
+    """Everything a page depends on besides its listing."""
+
+    root: Path
+    title_label: str
+    max_depth: int = MAX_DEPTH_DEFAULT
+    page_rows: int = PAGE_ROWS_DEFAULT
+
+
+class Entry(NamedTuple):
+    """One folder entry as statted by :func:`scan_directory`."""
+
+    name: str
+    is_dir: bool
+    size: int  # 0 for folders
+    mtime_ns: int
+
+    @property
+    def mtime(self) -> float:
+        return self.mtime_ns / 1e9
+
+    @property
+    def suffix(self) -> str:
+        return os.path.splitext(self.name)[1]
+
+
+class Card(NamedTuple):
+    entry: Entry  # the subfolder, as listed in its parent
+    entries: list[Entry]  # what is inside it
+    hero: Source | None
+    thumb: Path | None = None  # cached thumbnail of the hero, when there is one
+
+
+class PageListing(NamedTuple):
+    directory: Path
+    entries: list[Entry]
+    cards: list[Card]
+    generated: list[str]  # pages/sidecars a previous run left in the folder
+
+    @property
+    def files(self) -> list[Entry]:
+        return [entry for entry in self.entries if not entry.is_dir]
 
 
 def human_size(size: int) -> str:
@@ -98,34 +276,152 @@ def human_size(size: int) -> str:
     return f"{value:.1f} {units[idx]}"
 
 
-def format_mtime(path: Path) -> str:
-    try:
-        mtime = path.stat().st_mtime
-    except OSError:
-        return "—"
+def format_mtime(mtime: float) -> str:
     return datetime.fromtimestamp(mtime).strftime("%Y-%m-%d %H:%M")
 
 
-def format_mtime_iso(path: Path) -> str:
+def format_mtime_iso(mtime: float) -> str:
+    return datetime.fromtimestamp(mtime).strftime("%Y-%m-%dT%H:%M:%S")
+
+
+# -- listing (main process) ----------------------------------------------------
+
+
+def scan_directory(directory: Path) -> list[Entry]:
+    """List ``directory`` once, statting each entry once; sorted by lower-cased name."""
+    entries = []
     try:
-        mtime = path.stat().st_mtime
+        with os.scandir(directory) as iterator:
+            for item in iterator:
+                try:
+                    is_dir = item.is_dir()
+                    stat = item.stat()
+                except OSError:  # e.g. a dangling symlink
+                    continue
+                entries.append(Entry(item.name, is_dir, 0 if is_dir else stat.st_size, stat.st_mtime_ns))
     except OSError:
-        return ""
-    return datetime.fromtimestamp(mtime).strftime("%Y-%m-%dT%H:%M:%S")
+        return []
+    metrics.count("dirsListed")
+    metrics.count("entriesStatted", len(entries))
+    return sorted(entries, key=lambda entry: entry.name.lower())
+
+
+class Listings:
+    """Per-run cache of :func:`scan_directory` results."""
+
+    def __init__(self) -> None:
+        self._cache: dict[Path, list[Entry]] = {}
+
+    def get(self, directory: Path) -> list[Entry]:
+        entries = self._cache.get(directory)
+        if entries is None:
+            entries = self._cache[directory] = scan_directory(directory)
+        return entries
+
+    def forget(self, directory: Path) -> None:
+        """Drop a listing that a write made stale (e.g. the parent of a new page)."""
+        self._cache.pop(directory, None)
+
 
+def visible(directory: Path, entries: list[Entry]) -> list[Entry]:
+    return [
+        entry
+        for entry in entries
+        if entry.name != THUMBS_DIR_NAME and (entry.is_dir or not is_generated_page(directory / entry.name))
+    ]
 
-def compute_css_path(directory: Path) -> str:
-    css_path = TARGET_ROOT / CSS_NAME
+
+def is_card_folder(entry: Entry) -> bool:
+    return entry.is_dir and entry.name not in SKIP_DIR_NAMES and entry.suffix not in SKIP_DIR_SUFFIXES
+
+
+def find_preview_image(
+    directory: Path, listings: Listings, depth: int = 0, max_depth: int = HERO_SEARCH_DEPTH
+) -> Source | None:
+    entries = listings.get(directory)
+    for entry in entries:
+        if not entry.is_dir and entry.suffix.lower() in IMAGE_EXTENSIONS:
+            return Source(directory / entry.name, entry.size, entry.mtime_ns)
+    if depth >= max_depth:
+        return None
+    for entry in entries:
+        if entry.is_dir:
+            candidate = find_preview_image(directory / entry.name, listings, depth + 1, max_depth)
+            if candidate:
+                return candidate
+    return None
+
+
+def collect_page(directory: Path, listings: Listings) -> PageListing:
+    """Gather everything the page for ``directory`` shows."""
+    entries = listings.get(directory)
+    cards = []
+    for entry in entries:
+        if is_card_folder(entry):
+            child = directory / entry.name
+            cards.append(Card(entry, visible(child, listings.get(child)), find_preview_image(child, listings)))
+    shown = visible(directory, entries)
+    names = {entry.name for entry in shown}
+    generated = [entry.name for entry in entries if not entry.is_dir and entry.name not in names]
+    return PageListing(directory, shown, cards, generated)
+
+
+def walk_directories(root: Path, max_depth: int, listings: Listings) -> Iterator[tuple[Path, int]]:
+    """Yield ``(folder, depth)`` for root and every folder at most ``max_depth`` levels below it."""
+    stack = [(root, 0)]
+    while stack:
+        directory, depth = stack.pop()
+        if should_skip(directory):
+            continue
+        yield directory, depth
+        if depth >= max_depth:
+            continue
+        children = [directory / entry.name for entry in listings.get(directory) if entry.is_dir]
+        stack.extend((child, depth + 1) for child in reversed(children))
+
+
+# -- rendering (pure; runs in the workers) --------------------------------------
+
+
+def page_fingerprint(page: PageListing, config: IndexConfig) -> str:
+    """Hash of every input :func:`render_page` uses, except the generation time."""
+    digest = hashlib.blake2b(digest_size=16)
+    inputs = (
+        TEMPLATE_VERSION,
+        TEMPLATE,
+        CARD_TEMPLATE,
+        ROW_TEMPLATE,
+        PAGED_TABLE_TEMPLATE,
+        VIRTUAL_SCROLL_SCRIPT,
+        config.root,
+        config.title_label,
+        config.page_rows,
+        page.directory,
+    )
+    for part in inputs:
+        digest.update(f"{part}\0".encode())
+    for entry in page.entries:
+        digest.update(f"{entry.name}|{entry.is_dir}|{entry.size}|{entry.mtime_ns}\n".encode())
+    for card in page.cards:
+        hero = f"{card.hero.path}|{card.hero.size}|{card.hero.mtime_ns}" if card.hero else ""
+        digest.update(f"card {card.entry.name}|{card.entry.mtime_ns}|hero={hero}|thumb={card.thumb}\n".encode())
+        for item in card.entries:
+            digest.update(f"  {item.name}|{item.is_dir}|{item.size}|{item.mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+def compute_css_path(directory: Path, config: IndexConfig) -> str:
+    css_path = config.root / CSS_NAME
     rel = os.path.relpath(css_path, directory)
     return Path(rel).as_posix()
 
 
-def build_breadcrumb(directory: Path) -> str:
+def build_breadcrumb(directory: Path, config: IndexConfig) -> str:
     parts = []
     current = directory
     while True:
-        parts.append((current.name or TITLE_LABEL, current))
-        if current == TARGET_ROOT:
+        parts.append((current.name or config.title_label, current))
+        if current == config.root:
             break
         current = current.parent
     parts = list(reversed(parts))
@@ -133,78 +429,40 @@ def build_breadcrumb(directory: Path) -> str:
     for name, path in parts:
         rel = os.path.relpath(path, directory)
         href = Path(rel).as_posix() or "."
-        links.append(BREADCRUMB_LINK.format(href=href, label=name or TITLE_LABEL))
+        links.append(BREADCRUMB_LINK.format(href=href, label=name or config.title_label))
     return " / ".join(links)
 
 
-def build_directory_gallery(directory: Path) -> str:
-    cards = []
-    for idx, child in enumerate(sorted(directory.iterdir(), key=lambda p: p.name.lower())):
-        if not child.is_dir():
-            continue
-        if child.name in SKIP_DIR_NAMES or child.suffix in SKIP_DIR_SUFFIXES:
-            continue
-        cards.append(render_directory_card(child, idx, directory))
+def build_directory_gallery(page: PageListing) -> str:
+    cards = [render_directory_card(card, page.directory) for card in page.cards]
     if not cards:
         return "<p class=\"empty\">No subfolders yet.</p>"
     return "<div class=\"directory-grid\">" + "\n".join(cards) + "</div>"
 
 
-def render_directory_card(child: Path, index: int, parent: Path) -> str:
+def render_directory_card(card: Card, parent: Path) -> str:
+    child = card.entry
     href = f"{child.name}/"
-    summary = summarize_directory(child)
-    preview = "\n    ".join(f"<li>{item}</li>" for item in preview_items(child) or ["Empty folder"])
-    modified = format_mtime(child)
-    modified_iso = format_mtime_iso(child)
-    hero = build_directory_hero(child, parent)
+    summary = summarize_directory(card.entries)
+    preview = "\n    ".join(f"<li>{item}</li>" for item in preview_items(card.entries) or ["Empty folder"])
     return CARD_TEMPLATE.format(
         accent=accent_from_name(child.name),
         label=f"{summary['count']} items",
-        modified=modified,
-        modified_iso=modified_iso,
+        modified=format_mtime(child.mtime),
+        modified_iso=format_mtime_iso(child.mtime),
         href=href,
         title=child.name,
         summary=summary["label"],
         preview=preview,
-        hero=hero,
+        hero=build_directory_hero(card.thumb or (card.hero.path if card.hero else None), parent),
     )
 
 
-def preview_items(child: Path) -> list[str]:
-    previews: list[str] = []
-    try:
-        for entry in sorted(child.iterdir(), key=lambda p: p.name.lower()):
-            if entry.name in SKIP_FILE_NAMES:
-                continue
-            suffix = "/" if entry.is_dir() else ""
-            previews.append(entry.name + suffix)
-            if len(previews) >= 3:
-                break
-    except OSError:
-        return []
-    return previews
-
-
-def find_preview_image(directory: Path, depth: int = 0, max_depth: int = 2) -> Path | None:
-    try:
-        entries = sorted(directory.iterdir(), key=lambda p: p.name.lower())
-    except OSError:
-        return None
-    for entry in entries:
-        if entry.is_file() and entry.suffix.lower() in IMAGE_EXTENSIONS:
-            return entry
-    if depth >= max_depth:
-        return None
-    for entry in entries:
-        if entry.is_dir():
-            candidate = find_preview_image(entry, depth + 1, max_depth)
-            if candidate:
-                return candidate
-    return None
+def preview_items(entries: list[Entry]) -> list[str]:
+    return [entry.name + ("/" if entry.is_dir else "") for entry in entries[:3]]
 
 
-def build_directory_hero(child: Path, parent: Path) -> str:
-    image = find_preview_image(child)
+def build_directory_hero(image: Path | None, parent: Path) -> str:
     if not image:
         return "<div class=\"directory-hero placeholder\"></div>"
     rel = os.path.relpath(image, parent)
@@ -212,15 +470,11 @@ def build_directory_hero(child: Path, parent: Path) -> str:
     return f'<div class="directory-hero" style="background-image:url(\'{rel_path}\');"></div>'
 
 
-def summarize_directory(child: Path) -> dict[str, str]:
-    try:
-        entries = [entry for entry in child.iterdir() if entry.name not in SKIP_FILE_NAMES]
-    except OSError:
-        entries = []
+def summarize_directory(entries: list[Entry]) -> dict[str, str]:
     count = len(entries)
     label = f"{count} item{'s' if count != 1 else ''}"
     if entries:
-        latest = max(entries, key=lambda entry: entry.stat().st_mtime)
+        latest = max(entry.mtime for entry in entries)
         label += f" · Updated {format_mtime(latest)}"
     else:
         label += " · Start filling it!"
@@ -232,25 +486,17 @@ def accent_from_name(name: str) -> int:
     return value % 360
 
 
-def build_file_table(directory: Path) -> str:
+def build_file_table(directory: Path, entries: list[Entry], config: IndexConfig) -> str:
     rows = []
-    parent = directory.parent if directory != TARGET_ROOT else None
+    parent = directory.parent if directory != config.root else None
     if parent is not None:
         href = Path(os.path.relpath(parent, directory) + "/").as_posix()
         rows.append(ROW_TEMPLATE.format(href=href, label="← Parent directory", size="—", modified=""))
-    for child in sorted(directory.iterdir(), key=lambda p: p.name.lower()):
-        if not child.is_file():
-            continue
-        if child.name in SKIP_FILE_NAMES:
-            continue
-        try:
-            stat = child.stat()
-        except OSError:
-            stat = None
-        size = "—" if stat is None else human_size(stat.st_size)
-        modified = format_mtime(child)
-        iso = format_mtime_iso(child)
-        modified_cell = f"<time datetime=\"{iso}\">{modified}</time>" if iso else modified
+    for child in entries:
+        modified = format_mtime(child.mtime)
+        iso = format_mtime_iso(child.mtime)
+        modified_cell = f"<time datetime=\"{iso}\">{modified}</time>"
+        size = human_size(child.size)
         rows.append(ROW_TEMPLATE.format(href=child.name, label=child.name, size=size, modified=modified_cell))
     if not rows:
         return "<p class=\"empty\">No files yet.</p>"
@@ -267,6 +513,119 @@ def build_file_table(directory: Path) -> str:
     return table.format(rows="\n        ".join(rows))
 
 
+def page_file_name(number: int) -> str:
+    return "index.html" if number == 1 else f"index-{number}.html"
+
+
+def page_count(page: PageListing, config: IndexConfig) -> int:
+    """Static pages for the folder; 1 when a file of the user's already has one of the extra names."""
+    pages = max(1, math.ceil(len(page.files) / max(1, config.page_rows)))
+    names = {page_file_name(number) for number in range(2, pages + 1)} | {LISTING_NAME}
+    if pages > 1 and any(entry.name in names for entry in page.entries):
+        return 1
+    return pages
+
+
+def build_pagination(number: int, pages: int, start: int, shown: int, total: int) -> str:
+    parts = []
+    if number > 1:
+        parts.append(f'<a href="{page_file_name(number - 1)}">← Previous</a>')
+    parts.append(f"Page {number} of {pages} · files {start + 1}–{start + shown} of {total}")
+    if number < pages:
+        parts.append(f'<a href="{page_file_name(number + 1)}">Next →</a>')
+    return '<nav class="pagination">' + " · ".join(parts) + "</nav>"
+
+
+def build_file_section(page: PageListing, config: IndexConfig, number: int, pages: int) -> str:
+    files = page.files
+    if pages == 1:
+        return build_file_table(page.directory, files, config)
+    start = (number - 1) * config.page_rows
+    shown = files[start : start + config.page_rows]
+    return PAGED_TABLE_TEMPLATE.format(
+        listing=LISTING_NAME,
+        first_row=start,
+        parent_attr=' data-parent=""' if page.directory != config.root else "",
+        table=build_file_table(page.directory, shown, config),
+        pagination=build_pagination(number, pages, start, len(shown), len(files)),
+        script=VIRTUAL_SCROLL_SCRIPT,
+    )
+
+
+def render_listing(files: list[Entry]) -> str:
+    """The sidecar: every file row as ``[name, size, mtime seconds]``."""
+    rows = [[entry.name, entry.size, entry.mtime_ns // 1_000_000_000] for entry in files]
+    payload = json.dumps({"columns": ["name", "size", "mtime"], "rows": rows}, separators=COMPACT_SEPARATORS)
+    return f"window.LIFEHUB_LISTING = {payload};\n"
+
+
+def render_page(
+    page: PageListing,
+    config: IndexConfig,
+    fingerprint: str,
+    generated_at: str,
+    number: int = 1,
+    pages: int = 1,
+) -> str:
+    relative = page.directory.relative_to(config.root)
+    title = f"{config.title_label} / {relative}" if relative.parts else config.title_label
+    if number == 1:
+        gallery = build_directory_gallery(page)
+    else:
+        title += f" · page {number}"
+        gallery = '<p class="empty">Subfolders are shown on <a href="index.html">page 1</a>.</p>'
+    return TEMPLATE.format(
+        title=title,
+        intro=f"Pretty index for your {config.title_label} folder.",
+        fingerprint=fingerprint,
+        breadcrumb=build_breadcrumb(page.directory, config),
+        gallery=gallery,
+        file_table=build_file_section(page, config, number, pages),
+        css_path=compute_css_path(page.directory, config),
+        generated_at=generated_at,
+    )
+
+
+def recorded_fingerprint(page: Path) -> str | None:
+    try:
+        with page.open("rb") as handle:
+            match = FINGERPRINT_PATTERN.search(handle.read(1024))
+    except OSError:
+        return None
+    return match.group(1).decode() if match else None
+
+
+def write_page(page: PageListing, config: IndexConfig, force: bool = False) -> str:
+    """Render and write one folder's page(s) unless the recorded fingerprint still matches."""
+    fingerprint = page_fingerprint(page, config)
+    pages = page_count(page, config)
+    wanted = [page_file_name(number) for number in range(1, pages + 1)] + ([LISTING_NAME] if pages > 1 else [])
+    present = set(page.generated)
+    if not force and present.issuperset(wanted) and recorded_fingerprint(page.directory / "index.html") == fingerprint:
+        return UNCHANGED
+    generated_at = datetime.now().strftime("%Y-%m-%d %H:%M")
+    try:
+        if pages > 1:
+            atomic_write_text(page.directory / LISTING_NAME, render_listing(page.files))
+        # index.html (which carries the fingerprint) goes last, so an interrupted run is redone.
+        for number in range(pages, 0, -1):
+            html = render_page(page, config, fingerprint, generated_at, number, pages)
+            if number == 1:
+                (page.directory / "index.html").write_text(html, encoding="utf-8")
+            else:
+                # Atomic, so nothing ever sees an overflow page without its marker.
+                atomic_write_text(page.directory / page_file_name(number), html)
+        # Only pages carrying this generator's marker are in page.generated.
+        for stale in present.difference(wanted):
+            (page.directory / stale).unlink(missing_ok=True)
+    except PermissionError:
+        return UNWRITABLE
+    return UPDATED
+
+
+# -- driver -----------------------------------------------------------------------
+
+
 def should_skip(directory: Path) -> bool:
     parts = directory.parts
     if any(part in SKIP_DIR_NAMES for part in parts):
@@ -286,7 +645,7 @@ def ensure_css(root: Path) -> None:
         target.write_text(DEFAULT_CSS_CONTENT.strip())
 
 
-def parse_args():
+def parse_args(argv: list[str] | None = None):
     parser = argparse.ArgumentParser(description="Generate pretty index files for directories.")
     parser.add_argument("--path", type=str, help="Root directory to index (defaults to LifeHub)")
     parser.add_argument(
@@ -295,42 +654,113 @@ def parse_args():
         default=MAX_DEPTH_DEFAULT,
         help="Maximum folder depth (relative to root) to generate indexes for",
     )
-    return parser.parse_args()
+    parser.add_argument("--force", action="store_true", help="Rewrite every page even if its fingerprint matches")
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Worker processes rendering pages (0 = one per CPU, up to 8; 1 = in this process)",
+    )
+    parser.add_argument(
+        "--no-thumbnails",
+        action="store_true",
+        help="Point card heroes at the original images instead of cached thumbnails",
+    )
+    parser.add_argument(
+        "--page-size",
+        type=int,
+        default=PAGE_ROWS_DEFAULT,
+        help="Files per page; larger folders get extra pages and a virtually scrolled listing",
+    )
+    return parser.parse_args(argv)
 
 
-def main() -> None:
-    global TARGET_ROOT, MAX_DEPTH, TITLE_LABEL
-    args = parse_args()
+def pages_affected_by(directory: Path, root: Path) -> set[Path]:
+    """Index pages that show something from ``directory``: its own, its parent's card, and
+    the ancestors whose card hero image may come from up to HERO_SEARCH_DEPTH levels below."""
+    pages = set()
+    current = directory
+    for _ in range(HERO_SEARCH_DEPTH + 2):
+        if current != root and root not in current.parents:
+            break
+        pages.add(current)
+        if current == root:
+            break
+        current = current.parent
+    return pages
+
+
+def use_thumbnails(pages: list[PageListing], store: ThumbnailStore, jobs: int) -> list[PageListing]:
+    """Point the cards' heroes at cached thumbnails, generating the missing ones."""
+    heroes = {card.hero for page in pages for card in page.cards if card.hero}
+    thumbs = store.ensure(sorted(heroes), workers=jobs)
+    if not thumbs:
+        return pages
+
+    def with_thumb(card: Card) -> Card:
+        return card._replace(thumb=thumbs.get(card.hero.path)) if card.hero else card
+
+    return [page._replace(cards=[with_thumb(card) for card in page.cards]) for page in pages]
+
+
+def generate(
+    config: IndexConfig,
+    *,
+    only: set[Path] | None = None,
+    force: bool = False,
+    jobs: int = 1,
+    thumbnails: bool = True,
+) -> dict[str, int]:
+    """Write the pages under ``config.root``; returns how many ended up in each state."""
+    listings = Listings()
+    levels: dict[int, list[Path]] = defaultdict(list)
+    with metrics.timer("list"):
+        for directory, depth in walk_directories(config.root, config.max_depth, listings):
+            if only is None or directory in only:
+                levels[depth].append(directory)
+    total = sum(len(directories) for directories in levels.values())
+    pool = make_executor("process", jobs) if jobs > 1 and total > 1 else None
+    store = ThumbnailStore(config.root) if thumbnails else None
+    render = partial(write_page, config=config, force=force)
+    counts = {UPDATED: 0, UNCHANGED: 0, UNWRITABLE: 0}
+    try:
+        for depth in sorted(levels, reverse=True):
+            with metrics.timer("collect"):
+                pages = [collect_page(directory, listings) for directory in levels[depth]]
+            if store:
+                pages = use_thumbnails(pages, store, jobs)
+            with metrics.timer("render"):
+                statuses = pool.map(render, pages) if pool else map(render, pages)
+                for page, status in zip(pages, statuses):
+                    counts[status] += 1
+                    if status == UPDATED:
+                        listings.forget(page.directory.parent)
+                        print(f"Updated {page.directory}")
+                    elif status == UNWRITABLE:
+                        print(f"Skipping unwritable directory: {page.directory}")
+    finally:
+        if pool:
+            pool.shutdown()
+    if store and only is None:
+        store.evict()
+    metrics.count("pages", counts[UPDATED])
+    metrics.count("pagesUnchanged", counts[UNCHANGED])
+    return counts
+
+
+def main(
+    argv: list[str] | None = None,
+    only: set[Path] | None = None,
+) -> None:
+    """Write index pages for every folder, or just the folders in ``only`` when given."""
+    args = parse_args(argv)
     root = Path(args.path).expanduser().resolve() if args.path else DEFAULT_ROOT
-    TARGET_ROOT = root
-    MAX_DEPTH = max(0, args.max_depth)
-    TITLE_LABEL = root.name or TITLE_PREFIX_DEFAULT
+    config = IndexConfig(root, root.name or TITLE_PREFIX_DEFAULT, max(0, args.max_depth), max(1, args.page_size))
     ensure_css(root)
-
-    directories = [root] + [p for p in root.rglob("*") if p.is_dir()]
-    for directory in directories:
-        if should_skip(directory):
-            continue
-        relative = directory.relative_to(root)
-        if len(relative.parts) > MAX_DEPTH:
-            continue
-        css_path = compute_css_path(directory)
-        title = f"{TITLE_LABEL} / {relative}" if relative.parts else TITLE_LABEL
-        intro = f"Pretty index for your {TITLE_LABEL} folder."
-        html = TEMPLATE.format(
-            title=title,
-            intro=intro,
-            breadcrumb=build_breadcrumb(directory),
-            gallery=build_directory_gallery(directory),
-            file_table=build_file_table(directory),
-            css_path=css_path,
-            generated_at=datetime.now().strftime("%Y-%m-%d %H:%M"),
-        )
-        try:
-            (directory / "index.html").write_text(html, encoding="utf-8")
-            print(f"Updated {directory}")
-        except PermissionError:
-            print(f"Skipping unwritable directory: {directory}")
+    jobs = args.jobs if args.jobs > 0 else default_workers()
+    counts = generate(config, only=only, force=args.force, jobs=jobs, thumbnails=not args.no_thumbnails)
+    if counts[UNCHANGED]:
+        print(f"{counts[UNCHANGED]} index page(s) under {root} already up to date")
 
 
 if __name__ == "__main__":
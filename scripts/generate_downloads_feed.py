@@ -2,10 +2,12 @@
 """Emit downloads-feed.json for the dashboard watcher."""
 from __future__ import annotations
 
-import json
 from datetime import datetime, timezone
 from pathlib import Path
 
+from lib import metrics
+from lib.jsonstream import write_json
+
 ROOT = Path(__file__).resolve().parents[1]
 OUTPUT = ROOT / "downloads-feed.json"
 DOWNLOADS = Path.home() / "Downloads"
@@ -39,13 +41,16 @@ def list_downloads() -> list[dict[str, object]]:
 
 
 def main() -> None:
+    with metrics.timer("list"):
+        files = list_downloads()
+    metrics.count("files", len(files))
     payload = {
         "generatedAt": datetime.now(timezone.utc).isoformat(),
         "downloadsPath": str(DOWNLOADS),
-        "files": list_downloads(),
+        "files": files,
     }
-    OUTPUT.write_text(json.dumps(payload, indent=2))
-    print(f"Wrote {OUTPUT} ({len(payload['files'])} entries)")
+    write_json(OUTPUT, payload)
+    print(f"Wrote {OUTPUT} ({len(files)} entries)")
 
 
 if __name__ == "__main__":
@@ -2,10 +2,15 @@
 """Scan LifeHub areas and produce recent-files.json for dashboard widgets."""
 from __future__ import annotations
 
-import json
+import heapq
 from datetime import datetime, timezone
 from pathlib import Path
 
+from lib import metrics
+from lib.catalog import open_catalog
+from lib.jsonstream import write_json
+from lib.scanner import Snapshot, is_generated_page
+
 ROOT = Path(__file__).resolve().parents[1]
 OUTPUT = ROOT / "recent-files.json"
 AREAS = [
@@ -23,28 +28,21 @@ AREAS = [
     "Archive",
 ]
 MAX_ITEMS = 12
-SKIP_NAMES = {".DS_Store", "index.html"}
+SKIP_NAMES = {".DS_Store"}
 
 
-def list_recent(area: str) -> list[dict]:
-    base = ROOT / area
-    if not base.exists():
-        return []
-    entries: list[tuple[float, Path]] = []
-    for file_path in base.rglob("*"):
-        if not file_path.is_file():
-            continue
-        if file_path.name in SKIP_NAMES:
-            continue
-        try:
-            mtime = file_path.stat().st_mtime
-        except OSError:
-            continue
-        entries.append((mtime, file_path))
-    entries.sort(reverse=True)
+def list_recent(area: str, snapshot: Snapshot) -> list[dict]:
+    entries = heapq.nlargest(
+        MAX_ITEMS,
+        (
+            (record.mtime, ROOT / record.path)
+            for record in snapshot.iter_files(area)
+            if record.name not in SKIP_NAMES and not is_generated_page(ROOT / record.path)
+        ),
+    )
     now = datetime.now(timezone.utc)
     recent = []
-    for mtime, file_path in entries[:MAX_ITEMS]:
+    for mtime, file_path in entries:
         modified = datetime.fromtimestamp(mtime, tz=timezone.utc)
         recent.append(
             {
@@ -56,10 +54,18 @@ def list_recent(area: str) -> list[dict]:
     return recent
 
 
-def main() -> None:
-    payload = {area: list_recent(area) for area in AREAS}
+def main(snapshot: Snapshot | None = None) -> None:
+    if snapshot is None:
+        catalog = open_catalog(ROOT)
+        try:
+            main(catalog)
+        finally:
+            catalog.close()
+        return
+    with metrics.timer("select"):
+        payload = {area: list_recent(area, snapshot) for area in AREAS}
     payload["generatedAt"] = datetime.now(timezone.utc).isoformat()
-    OUTPUT.write_text(json.dumps(payload, indent=2))
+    write_json(OUTPUT, payload)
     print(f"Wrote {OUTPUT}")
 
 
@@ -2,10 +2,49 @@ from __future__ import annotations
 
 import json
 import math
+import os
 import re
+import stat as stat_module
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, Iterable, List, Mapping, Optional
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+# Never worth backing up, whatever a target's own rules say: version-control
+# metadata, caches, dependency folders and the backup output itself.
+BASE_EXCLUDES = (
+    ".git/",
+    ".svn/",
+    ".idea/",
+    "__pycache__/",
+    "node_modules/",
+    ".thumbs/",
+    "*.pyc",
+    ".DS_Store",
+    "/backups/",
+    "/automation/cache/",
+)
+# Skipped by every target backup.py copies unless it says otherwise: feeds and
+# pages the refresh scripts regenerate, and the Downloads mirror. A target's
+# own ``exclude`` list is added to these.
+DEFAULT_EXCLUDES = (
+    "**/index.html",
+    "**/index-*.html",
+    "**/index-listing.js",
+    "/Downloads/",
+    "/dashboard-inline-data.js",
+    "/dashboard-stats.json",
+    "/downloads-feed.json",
+    "/recent-files.json",
+    "/search-index.json",
+    "/search-index/",
+    "/welltory-summary.json",
+)
+# Targets whose files backup.py itself selects and copies; the others (rsync
+# clones, cloud sync, manual offsite copies) run their own command and have no
+# file set for backup.py to plan.
+BACKUP_MODES = ("incremental", "archive")
+# Assumed when neither the target nor a previous run says how fast it goes.
+DEFAULT_THROUGHPUT_MB_S = 50.0
 
 FrequencyHours = {
     "hourly": 2,
@@ -106,3 +145,149 @@ def replace_backups_block(source: str, replacement: str) -> str:
     if not pattern.search(source):
         raise RuntimeError("Could not locate LIFEHUB_DATA.backups block in dashboard-data.js")
     return pattern.sub(replacement, source, count=1)
+
+
+def glob_to_regex(pattern: str) -> str:
+    """Translate a gitignore-style glob (``*``, ``?``, ``**``) into a regex body."""
+    out: List[str] = []
+    idx = 0
+    while idx < len(pattern):
+        char = pattern[idx]
+        if pattern.startswith("**/", idx):
+            out.append("(?:.*/)?")
+            idx += 3
+            continue
+        if pattern.startswith("**", idx):
+            out.append(".*")
+            idx += 2
+            continue
+        if char == "*":
+            out.append("[^/]*")
+        elif char == "?":
+            out.append("[^/]")
+        else:
+            out.append(re.escape(char))
+        idx += 1
+    return "".join(out)
+
+
+def _compile(patterns: Iterable[str]) -> Tuple[Optional[re.Pattern], Optional[re.Pattern]]:
+    """Return ``(any-path regex, directory-only regex)`` for ``patterns``.
+
+    Like .gitignore: a trailing ``/`` only matches folders, a pattern with no
+    other ``/`` matches the name at any depth, and anything else (or a leading
+    ``/``) is anchored at the backup root.
+    """
+    any_kind: List[str] = []
+    dirs_only: List[str] = []
+    for raw in patterns:
+        pattern = raw.strip()
+        if not pattern:
+            continue
+        directory = pattern.endswith("/")
+        pattern = pattern.rstrip("/")
+        if "/" in pattern:
+            body = glob_to_regex(pattern.lstrip("/"))
+        else:
+            body = "(?:.*/)?" + glob_to_regex(pattern)
+        (dirs_only if directory else any_kind).append(body)
+    return (
+        re.compile("|".join(f"(?:{body})" for body in any_kind) + r"\Z") if any_kind else None,
+        re.compile("|".join(f"(?:{body})" for body in dirs_only) + r"\Z") if dirs_only else None,
+    )
+
+
+class PathRules:
+    """Include/exclude globs for one backup target, applied to POSIX paths relative to the root."""
+
+    def __init__(self, include: Sequence[str] = (), exclude: Sequence[str] = ()):
+        self.include = list(include)
+        self.exclude = list(dict.fromkeys([*BASE_EXCLUDES, *exclude]))
+        self._include, self._include_dirs = _compile(self.include)
+        self._exclude, self._exclude_dirs = _compile(self.exclude)
+
+    @classmethod
+    def from_target(cls, target: Mapping[str, object]) -> "PathRules":
+        exclude = [*DEFAULT_EXCLUDES, *(target.get("exclude") or ())]  # type: ignore[misc]
+        return cls(target.get("include") or (), exclude)  # type: ignore[arg-type]
+
+    def skip_dir(self, rel: str) -> bool:
+        return any(regex is not None and regex.match(rel) for regex in (self._exclude, self._exclude_dirs))
+
+    def wants_file(self, rel: str) -> bool:
+        if self._exclude is not None and self._exclude.match(rel):
+            return False
+        if not self.include:
+            return True
+        if self._include is not None and self._include.match(rel):
+            return True
+        # A folder include (``Finance/``) takes everything below it.
+        parts = rel.split("/")[:-1]
+        return self._include_dirs is not None and any(
+            self._include_dirs.match("/".join(parts[: depth + 1])) for depth in range(len(parts))
+        )
+
+
+def copies_files(target: Mapping[str, object]) -> bool:
+    """Whether backup.py selects this target's files itself (and can plan them)."""
+    return target.get("mode") in BACKUP_MODES
+
+
+def find_target(targets: Iterable[Mapping[str, object]], target_id: str) -> dict:
+    for target in targets:
+        if target.get("id") == target_id:
+            return dict(target)
+    raise KeyError(f"Unknown backup target: {target_id}")
+
+
+def plan_backup(
+    entries: Iterable[Tuple[str, os.stat_result]],
+    *,
+    previous: Optional[Mapping[str, Tuple[int, int, int]]] = None,
+    throughput_mb_s: Optional[float] = None,
+    top: int = 5,
+) -> dict:
+    """Summarise what a backup of ``entries`` (``walk_tree`` output) would copy.
+
+    With ``previous`` (path -> size, mtime_ns, inode from the last incremental
+    snapshot) the estimate only counts files that changed since then.
+    """
+    files = total = changed_files = changed_bytes = 0
+    areas: Dict[str, int] = {}
+    largest: List[Tuple[int, str]] = []
+    for rel, info in entries:
+        if not stat_module.S_ISREG(info.st_mode):
+            continue
+        files += 1
+        total += info.st_size
+        area = rel.split("/", 1)[0] if "/" in rel else "(top level)"
+        areas[area] = areas.get(area, 0) + info.st_size
+        largest.append((info.st_size, rel))
+        if len(largest) > top * 4:
+            largest = sorted(largest, reverse=True)[:top]
+        if previous is None or previous.get(rel) != (info.st_size, info.st_mtime_ns, info.st_ino):
+            changed_files += 1
+            changed_bytes += info.st_size
+    rate = throughput_mb_s or DEFAULT_THROUGHPUT_MB_S
+    return {
+        "files": files,
+        "bytes": total,
+        "changedFiles": changed_files,
+        "changedBytes": changed_bytes,
+        "throughputMBs": round(rate, 1),
+        "estimatedSeconds": round(changed_bytes / (rate * 1024 * 1024), 1),
+        "areas": dict(sorted(areas.items(), key=lambda item: -item[1])[:top]),
+        "largest": [{"path": rel, "size": size} for size, rel in sorted(largest, reverse=True)[:top]],
+    }
+
+
+def record_backup(path: Path, target_id: str, notes: str, *, now: Optional[datetime] = None) -> None:
+    """Stamp ``target_id`` as backed up just now in automation/backups/status.json."""
+    logs = load_backup_logs(path)
+    logs[target_id] = {
+        "last_backup": (now or datetime.now().astimezone()).isoformat(timespec="seconds"),
+        "notes": notes,
+    }
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text(json.dumps(logs, indent=2) + "\n", encoding="utf-8")
+    os.replace(tmp, path)
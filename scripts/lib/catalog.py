@@ -0,0 +1,364 @@
+"""Persistent SQLite catalog of the LifeHub tree.
+
+The catalog remembers every file's path, inode, size, mtime and area between
+runs. A refresh stats each known folder and only re-lists the ones whose mtime
+moved (something was added, removed or renamed inside), applying the
+inserts/updates/deletes it finds. On a quiet day that costs no directory
+listings at all.
+
+A quiet refresh therefore costs one ``stat`` per folder, not per file. Folder
+mtimes do not change when a file is rewritten in place, though, and catching
+that means re-statting every known file of the folders that are not
+re-listed: one ``stat`` per file, O(files), close to what a full walk costs
+minus the listings. A whole-tree refresh only does that once
+``RESTAT_INTERVAL_SECONDS`` have passed since the last time (or when asked
+with ``restat=True``), so in-place edits can take up to that long to show up.
+Folders passed in ``dirs`` (e.g. by a file watcher) are re-listed, which sees
+such edits at once, and ``refresh(full=True)`` re-lists everything.
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .scanner import SKIP_DIR_NAMES, FileRecord, Snapshot
+
+ROOT = Path(__file__).resolve().parents[2]
+CATALOG_PATH = ROOT / "automation" / "cache" / "catalog.sqlite"
+# Folders touched this recently may still change within the same mtime tick, so
+# they are re-listed again on the next refresh rather than trusted.
+RACY_WINDOW_SECONDS = 2.0
+# How often a whole-tree refresh re-stats every known file to catch in-place edits.
+RESTAT_INTERVAL_SECONDS = 3600.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    path TEXT PRIMARY KEY,
+    parent TEXT NOT NULL,
+    name TEXT NOT NULL,
+    area TEXT NOT NULL,
+    is_dir INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_parent ON entries(parent);
+CREATE INDEX IF NOT EXISTS entries_dir_name ON entries(is_dir, name);
+CREATE INDEX IF NOT EXISTS entries_size ON entries(size);
+CREATE TABLE IF NOT EXISTS listed_dirs (
+    path TEXT PRIMARY KEY,
+    mtime REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS refresh_state (
+    key TEXT PRIMARY KEY,
+    value REAL NOT NULL
+);
+"""
+
+Row = Tuple[int, int, float, int]  # inode, size, mtime, is_dir
+
+
+def _range(base: str) -> Tuple[str, str]:
+    """Return bounds selecting every path below ``base`` via the primary key.
+
+    '0' sorts directly after '/', so ``base/ <= path < base0`` covers the
+    subtree without LIKE (and without escaping % or _ in filenames).
+    """
+    return f"{base}/", f"{base}0"
+
+
+class Catalog(Snapshot):
+    """Snapshot-compatible view backed by the persistent SQLite catalog."""
+
+    def __init__(self, root: Path, db_path: Path = CATALOG_PATH, skip_dirs: Iterable[str] = SKIP_DIR_NAMES):
+        self.root = Path(root)
+        self.db_path = Path(db_path)
+        self.skip_dirs = set(skip_dirs)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # The database churns on every run; never catalog its own folder.
+        self._own_dir = str(self.db_path.parent.resolve())
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    # -- refresh ---------------------------------------------------------
+
+    def refresh(
+        self, full: bool = False, dirs: Optional[Iterable[str]] = None, restat: Optional[bool] = None
+    ) -> Dict[str, int]:
+        """Bring the catalog in line with the filesystem and return change counts.
+
+        With ``dirs`` (root-relative folders, e.g. from a file watcher) only those
+        subtrees are visited; the named folders are re-listed even if their mtime
+        did not move, which catches files rewritten in place.
+
+        ``restat`` re-stats the files of folders that are not re-listed. It
+        defaults to on for a whole-tree refresh once ``RESTAT_INTERVAL_SECONDS``
+        have passed since the last one, and to off otherwise.
+        """
+        counts = {"inserted": 0, "updated": 0, "deleted": 0, "dirsListed": 0, "dirsChecked": 0, "filesChecked": 0}
+        now = time.time()
+        if restat is None:
+            row = self.conn.execute("SELECT value FROM refresh_state WHERE key = 'restatAt'").fetchone()
+            restat = dirs is None and (row is None or now - row[0] >= RESTAT_INTERVAL_SECONDS)
+        listed = dict(self.conn.execute("SELECT path, mtime FROM listed_dirs"))
+        child_dirs: Dict[str, List[str]] = {}
+        for path, parent in self.conn.execute("SELECT path, parent FROM entries WHERE is_dir = 1"):
+            child_dirs.setdefault(parent, []).append(path)
+
+        forced = set(dirs) if dirs is not None else set()
+        with self.conn:
+            stack = sorted(forced) if dirs is not None else [""]
+            while stack:
+                rel = stack.pop()
+                abs_path = self.root / rel if rel else self.root
+                counts["dirsChecked"] += 1
+                try:
+                    mtime = os.stat(abs_path).st_mtime
+                except OSError:
+                    self._delete_subtree(rel, counts)
+                    continue
+                if not full and rel not in forced and listed.get(rel) == mtime:
+                    if restat:
+                        self._restat(rel, counts)
+                    stack.extend(child_dirs.get(rel, []))
+                    continue
+                stack.extend(self._relist(rel, abs_path, counts))
+                if time.time() - mtime < RACY_WINDOW_SECONDS:
+                    mtime = -1.0
+                self.conn.execute("INSERT OR REPLACE INTO listed_dirs(path, mtime) VALUES (?, ?)", (rel, mtime))
+                counts["dirsListed"] += 1
+            if dirs is None and (restat or full):
+                self.conn.execute("INSERT OR REPLACE INTO refresh_state(key, value) VALUES ('restatAt', ?)", (now,))
+        return counts
+
+    def _relist(self, rel: str, abs_path: Path, counts: Dict[str, int]) -> List[str]:
+        known: Dict[str, Row] = {
+            path: (inode, size, mtime, is_dir)
+            for path, inode, size, mtime, is_dir in self.conn.execute(
+                "SELECT path, inode, size, mtime, is_dir FROM entries WHERE parent = ?", (rel,)
+            )
+        }
+        seen: Dict[str, Tuple[str, str, Row]] = {}
+        try:
+            with os.scandir(abs_path) as iterator:
+                for entry in iterator:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name in self.skip_dirs or entry.path == self._own_dir:
+                                continue
+                            stat = entry.stat(follow_symlinks=False)
+                            row: Row = (stat.st_ino, 0, stat.st_mtime, 1)
+                        elif entry.is_file():
+                            stat = entry.stat()
+                            row = (stat.st_ino, stat.st_size, stat.st_mtime, 0)
+                        else:
+                            continue
+                    except OSError:
+                        continue
+                    if rel:
+                        path, area = f"{rel}/{entry.name}", rel.split("/", 1)[0]
+                    else:
+                        path, area = entry.name, entry.name if row[3] else ""
+                    seen[path] = (entry.name, area, row)
+        except OSError:
+            return []
+
+        for path, (name, area, row) in seen.items():
+            previous = known.get(path)
+            if previous == row:
+                continue
+            if previous is not None and previous[3] != row[3]:
+                # A file replaced a folder (or vice versa): drop the old subtree first.
+                self._delete_subtree(path, counts)
+                previous = None
+            self.conn.execute(
+                "INSERT OR REPLACE INTO entries(path, parent, name, area, is_dir, inode, size, mtime)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (path, rel, name, area, row[3], row[0], row[1], row[2]),
+            )
+            counts["updated" if previous is not None else "inserted"] += 1
+        for path in known.keys() - seen.keys():
+            self._delete_subtree(path, counts)
+        return [path for path, (_, _, row) in seen.items() if row[3]]
+
+    def _restat(self, rel: str, counts: Dict[str, int]) -> None:
+        """Pick up files of an unchanged folder that were rewritten in place."""
+        # parent alone, so SQLite uses entries_parent rather than scanning entries_dir_name.
+        rows = self.conn.execute(
+            "SELECT path, inode, size, mtime, is_dir FROM entries WHERE parent = ?", (rel,)
+        ).fetchall()
+        root = str(self.root)
+        for path, inode, size, mtime, is_dir in rows:
+            if is_dir:
+                continue
+            counts["filesChecked"] += 1
+            try:
+                stat = os.stat(os.path.join(root, path))
+            except OSError:
+                continue  # gone; the folder's mtime moved too, so the next refresh re-lists it
+            if (stat.st_ino, stat.st_size, stat.st_mtime) != (inode, size, mtime):
+                self.conn.execute(
+                    "UPDATE entries SET inode = ?, size = ?, mtime = ? WHERE path = ?",
+                    (stat.st_ino, stat.st_size, stat.st_mtime, path),
+                )
+                counts["updated"] += 1
+
+    def _delete_subtree(self, rel: str, counts: Dict[str, int]) -> None:
+        if not rel:
+            counts["deleted"] += max(self.conn.execute("DELETE FROM entries").rowcount, 0)
+            self.conn.execute("DELETE FROM listed_dirs")
+            return
+        low, high = _range(rel)
+        cursor = self.conn.execute("DELETE FROM entries WHERE path = ? OR (path >= ? AND path < ?)", (rel, low, high))
+        counts["deleted"] += max(cursor.rowcount, 0)
+        self.conn.execute("DELETE FROM listed_dirs WHERE path = ? OR (path >= ? AND path < ?)", (rel, low, high))
+
+    # -- queries (Snapshot interface) -------------------------------------
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    @property
+    def records(self) -> List[FileRecord]:  # type: ignore[override]
+        return list(self._select("", want_dirs=None))
+
+    def _where(self, base: str) -> Tuple[str, tuple]:
+        base = base.strip("/")
+        if not base:
+            return "1 = 1", ()
+        low, high = _range(base)
+        return "path >= ? AND path < ?", (low, high)
+
+    def _skipped_subtrees(self, base: str, skip_dirs: Iterable[str]) -> List[str]:
+        names = sorted(set(skip_dirs))
+        if not names:
+            return []
+        where, params = self._where(base)
+        placeholders = ",".join("?" for _ in names)
+        rows = self.conn.execute(
+            f"SELECT path FROM entries WHERE is_dir = 1 AND name IN ({placeholders}) AND {where} ORDER BY path",
+            (*names, *params),
+        )
+        roots: List[str] = []
+        for (path,) in rows:
+            if roots and path.startswith(roots[-1] + "/"):
+                continue
+            roots.append(path)
+        return roots
+
+    def _aggregate(self, expression: str, base: str, skip_dirs: Iterable[str]) -> int:
+        where, params = self._where(base)
+        total = self.conn.execute(f"SELECT {expression} FROM entries WHERE is_dir = 0 AND {where}", params).fetchone()[0]
+        for skipped in self._skipped_subtrees(base, skip_dirs):
+            low, high = _range(skipped)
+            total -= self.conn.execute(
+                f"SELECT {expression} FROM entries WHERE is_dir = 0 AND path >= ? AND path < ?", (low, high)
+            ).fetchone()[0]
+        return int(total or 0)
+
+    def count_files(self, base: str = "", skip_dirs: Iterable[str] = ()) -> int:
+        return self._aggregate("COUNT(*)", base, skip_dirs)
+
+    def total_size(self, base: str = "", skip_dirs: Iterable[str] = ()) -> int:
+        return self._aggregate("COALESCE(SUM(size), 0)", base, skip_dirs)
+
+    def summary(
+        self,
+        base: str = "",
+        exclude: Iterable[str] = (),
+        skip_names: Iterable[str] = (),
+        skip_globs: Iterable[str] = (),
+    ) -> Tuple[int, int, float, float]:
+        """Count, total size, mtime sum and path-length-weighted mtime sum of the files below ``base``.
+
+        Files named in ``skip_names`` or matching one of ``skip_globs``, and
+        everything at or below a path in ``exclude``, are left out. One query,
+        so a caller can tell whether a subtree changed without reading its rows.
+        """
+        where, params = self._where(base)
+        clauses, values = [where], list(params)
+        names = sorted(set(skip_names))
+        if names:
+            clauses.append(f"name NOT IN ({','.join('?' for _ in names)})")
+            values.extend(names)
+        for pattern in skip_globs:
+            clauses.append("name NOT GLOB ?")
+            values.append(pattern)
+        for path in exclude:
+            low, high = _range(path)
+            clauses.append("path != ? AND NOT (path >= ? AND path < ?)")
+            values.extend((path, low, high))
+        row = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0), TOTAL(mtime), TOTAL(length(path) * mtime)"
+            f" FROM entries WHERE is_dir = 0 AND {' AND '.join(clauses)}",
+            values,
+        ).fetchone()
+        return row[0], row[1], row[2], row[3]
+
+    def iter_matching(self, base: str, globs: Iterable[str]) -> Iterator[FileRecord]:
+        """Files below ``base`` whose name matches one of ``globs``."""
+        patterns = list(globs)
+        if not patterns:
+            return iter(())
+        where, params = self._where(base)
+        matches = " OR ".join("name GLOB ?" for _ in patterns)
+        rows = self.conn.execute(
+            f"SELECT path, size, mtime, area FROM entries WHERE is_dir = 0 AND {where} AND ({matches}) ORDER BY path",
+            (*params, *patterns),
+        )
+        return (FileRecord(path, size, mtime, False, area) for path, size, mtime, area in rows)
+
+    def files_with_size(self, size: int) -> List[str]:
+        """Return the relative paths of every file that is exactly ``size`` bytes."""
+        rows = self.conn.execute("SELECT path FROM entries WHERE size = ? AND is_dir = 0", (size,))
+        return [path for (path,) in rows]
+
+    def size_groups(self, min_size: int = 1) -> Iterator[List[str]]:
+        """Yield groups of relative file paths that share a size (the first dedup stage)."""
+        rows = self.conn.execute(
+            "SELECT size, path FROM entries WHERE is_dir = 0 AND size IN ("
+            " SELECT size FROM entries WHERE is_dir = 0 AND size >= ? GROUP BY size HAVING COUNT(*) > 1"
+            ") ORDER BY size DESC, path",
+            (max(min_size, 0),),
+        )
+        group: List[str] = []
+        current: Optional[int] = None
+        for size, path in rows:
+            if size != current and group:
+                yield group
+                group = []
+            current = size
+            group.append(path)
+        if group:
+            yield group
+
+    def _select(self, base: str, want_dirs: Optional[bool], skip_dirs: Iterable[str] = ()) -> Iterator[FileRecord]:
+        where, params = self._where(base)
+        if want_dirs is not None:
+            where += f" AND is_dir = {int(want_dirs)}"
+        skipped_roots = self._skipped_subtrees(base, skip_dirs)
+        skipped = [_range(path) for path in skipped_roots]
+        rows = self.conn.execute(f"SELECT path, size, mtime, is_dir, area FROM entries WHERE {where}", params)
+        for path, size, mtime, is_dir, area in rows:
+            if path in skipped_roots or any(low <= path < high for low, high in skipped):
+                continue
+            yield FileRecord(path, size, mtime, bool(is_dir), area)
+
+    def _iter(self, base: str, skip_dirs: Iterable[str], want_dirs: bool) -> Iterator[FileRecord]:
+        return self._select(base, want_dirs, skip_dirs)
+
+
+def open_catalog(root: Path = ROOT, *, db_path: Path = CATALOG_PATH, full: bool = False) -> Catalog:
+    """Open the catalog for ``root`` and refresh it against the filesystem."""
+    catalog = Catalog(root, db_path)
+    catalog.refresh(full=full)
+    return catalog
+
@@ -0,0 +1,277 @@
+"""Content-addressed duplicate detection for the LifeHub tree.
+
+Two files are compared in stages, each cheaper than the next and each run only
+when the previous one matched:
+
+1. size (free: it comes from ``stat`` or the catalog),
+2. a partial BLAKE2 hash of the first and last 64 KiB,
+3. a full BLAKE2 hash of the whole file.
+
+Hashes are remembered in a persistent SQLite index keyed by path and
+validated against ``(device, inode, size, mtime_ns)``, so a file is only ever
+read again after it changes. Files that are already hardlinks of each other
+count as one copy, since they take no extra space.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+from collections import defaultdict
+from itertools import chain
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from .catalog import Catalog
+
+ROOT = Path(__file__).resolve().parents[2]
+DEDUP_INDEX_PATH = ROOT / "automation" / "cache" / "dedup.sqlite"
+PARTIAL_BYTES = 64 * 1024
+READ_CHUNK = 1024 * 1024
+# What the move scripts do with a file whose content already exists in LifeHub:
+# leave it where it is, hardlink the existing copy under the new name, or keep
+# a second copy as before.
+ON_DUPLICATE = ("skip", "link", "keep")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS hashes (
+    path TEXT PRIMARY KEY,
+    dev INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    partial TEXT,
+    full TEXT
+);
+CREATE INDEX IF NOT EXISTS hashes_size ON hashes(size);
+"""
+
+Identity = Tuple[int, int, int, int]  # dev, inode, size, mtime_ns
+
+
+class DuplicateFound(Exception):
+    """Raised by the move scripts when ``source`` is byte-identical to ``existing``."""
+
+    def __init__(self, source: Path, existing: Path):
+        super().__init__(f"{source.name} is identical to {existing}; skipped")
+        self.source = source
+        self.existing = existing
+
+
+def _identity(stat: os.stat_result) -> Identity:
+    return stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+def partial_hash(path: Path, size: int) -> str:
+    """Hash the size plus the first and last ``PARTIAL_BYTES`` of ``path``."""
+    digest = hashlib.blake2b(str(size).encode("ascii"), digest_size=16)
+    with open(path, "rb") as handle:
+        digest.update(handle.read(PARTIAL_BYTES))
+        if size > 2 * PARTIAL_BYTES:
+            handle.seek(size - PARTIAL_BYTES)
+            digest.update(handle.read(PARTIAL_BYTES))
+        elif size > PARTIAL_BYTES:
+            digest.update(handle.read())
+    return digest.hexdigest()
+
+
+def full_hash(path: Path) -> str:
+    digest = hashlib.blake2b(digest_size=32)
+    with open(path, "rb") as handle:
+        while True:
+            chunk = handle.read(READ_CHUNK)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class HashIndex:
+    """Persistent ``path -> (partial, full)`` hash cache with staged comparisons."""
+
+    def __init__(self, db_path: Path = DEDUP_INDEX_PATH):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.hashed_bytes = 0
+
+    def close(self) -> None:
+        self.conn.commit()
+        self.conn.close()
+
+    def __enter__(self) -> "HashIndex":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _digest(self, path: Path, column: str, stat: Optional[os.stat_result] = None) -> str:
+        stat = stat or os.stat(path)
+        identity = _identity(stat)
+        key = str(path)
+        row = self.conn.execute(
+            f"SELECT dev, inode, size, mtime_ns, {column} FROM hashes WHERE path = ?", (key,)
+        ).fetchone()
+        if row and tuple(row[:4]) == identity and row[4]:
+            return row[4]
+        if column == "partial":
+            value = partial_hash(path, stat.st_size)
+            self.hashed_bytes += min(stat.st_size, 2 * PARTIAL_BYTES)
+        else:
+            value = full_hash(path)
+            self.hashed_bytes += stat.st_size
+        if row and tuple(row[:4]) == identity:
+            self.conn.execute(f"UPDATE hashes SET {column} = ? WHERE path = ?", (value, key))
+        else:
+            self.conn.execute(
+                f"INSERT OR REPLACE INTO hashes(path, dev, inode, size, mtime_ns, {column})"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, *identity, value),
+            )
+        return value
+
+    def partial(self, path: Path, stat: Optional[os.stat_result] = None) -> str:
+        return self._digest(Path(path), "partial", stat)
+
+    def full(self, path: Path, stat: Optional[os.stat_result] = None) -> str:
+        return self._digest(Path(path), "full", stat)
+
+    def paths_with_size(self, size: int) -> List[Path]:
+        """Previously hashed paths of exactly ``size`` bytes (they may since have moved)."""
+        return [Path(path) for (path,) in self.conn.execute("SELECT path FROM hashes WHERE size = ?", (size,))]
+
+    def prune(self) -> int:
+        """Forget entries whose file no longer exists; returns how many were dropped."""
+        missing = [(path,) for (path,) in self.conn.execute("SELECT path FROM hashes") if not os.path.exists(path)]
+        self.conn.executemany("DELETE FROM hashes WHERE path = ?", missing)
+        self.conn.commit()
+        return len(missing)
+
+    # -- staged comparison ------------------------------------------------
+
+    def find_duplicate(self, source: Path, candidates: Iterable[Path]) -> Optional[Path]:
+        """Return the first candidate whose content equals ``source`` (empty files never match)."""
+        source = Path(source)
+        source_stat = os.stat(source)
+        if source_stat.st_size == 0:
+            return None
+        source_key = (source_stat.st_dev, source_stat.st_ino)
+        source_partial: Optional[str] = None
+        source_full: Optional[str] = None
+        seen = {source_key}
+        try:
+            for candidate in candidates:
+                try:
+                    stat = os.stat(candidate)
+                except OSError:
+                    continue
+                if stat.st_size != source_stat.st_size or not os.path.isfile(candidate):
+                    continue
+                key = (stat.st_dev, stat.st_ino)
+                if key in seen:
+                    continue
+                seen.add(key)
+                source_partial = source_partial or self.partial(source, source_stat)
+                if self.partial(candidate, stat) != source_partial:
+                    continue
+                source_full = source_full or self.full(source, source_stat)
+                if self.full(candidate, stat) == source_full:
+                    return Path(candidate)
+            return None
+        finally:
+            self.conn.commit()
+
+    def duplicate_groups(self, size_groups: Iterable[Iterable[Path]]) -> Iterator[List[Path]]:
+        """Refine same-size groups into groups of byte-identical files.
+
+        Hardlinks of one inode are collapsed to a single representative first;
+        the partial hash splits what is left, and only partial collisions are
+        read in full.
+        """
+        for group in size_groups:
+            by_inode: Dict[Tuple[int, int], Tuple[Path, os.stat_result]] = {}
+            for path in group:
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                by_inode.setdefault((stat.st_dev, stat.st_ino), (Path(path), stat))
+            if len(by_inode) < 2:
+                continue
+            by_partial: Dict[str, List[Tuple[Path, os.stat_result]]] = defaultdict(list)
+            for path, stat in by_inode.values():
+                try:
+                    by_partial[self.partial(path, stat)].append((path, stat))
+                except OSError:
+                    continue
+            for candidates in by_partial.values():
+                if len(candidates) < 2:
+                    continue
+                by_full: Dict[str, List[Path]] = defaultdict(list)
+                for path, stat in candidates:
+                    try:
+                        by_full[self.full(path, stat)].append(path)
+                    except OSError:
+                        continue
+                for paths in by_full.values():
+                    if len(paths) > 1:
+                        yield sorted(paths)
+            self.conn.commit()
+
+
+def same_size_candidates(size: int, folders: Iterable[Path] = ()) -> Iterator[Path]:
+    """Yield the files directly inside ``folders`` that are exactly ``size`` bytes."""
+    for folder in folders:
+        try:
+            with os.scandir(folder) as iterator:
+                for entry in iterator:
+                    try:
+                        if entry.is_file() and entry.stat().st_size == size:
+                            yield Path(entry.path)
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
+
+def find_existing_copy(
+    source: Path,
+    index: HashIndex,
+    *,
+    folders: Iterable[Path] = (),
+    catalog: Optional["Catalog"] = None,
+    exclude: Iterable[Path] = (),
+    root: Path = ROOT,
+) -> Optional[Path]:
+    """Look for a file identical to ``source`` before it is moved.
+
+    Candidates are the same-size files directly inside ``folders`` (the move
+    destination), every same-size file the catalog knows about and anything
+    of that size below ``root`` the hash index has seen before (the index also
+    remembers the sources it hashed, e.g. in ~/Downloads, which are not
+    copies in LifeHub). Copies under ``exclude`` (e.g. the rest of the Inbox
+    being sorted) do not count.
+    """
+    size = os.stat(source).st_size
+    inside = f"{Path(root)}{os.sep}"
+    indexed = (path for path in index.paths_with_size(size) if str(path).startswith(inside))
+    candidates = chain(same_size_candidates(size, folders), indexed)
+    if catalog is not None:
+        candidates = chain(candidates, (catalog.root / rel for rel in catalog.files_with_size(size)))
+    excluded = tuple(f"{Path(folder)}{os.sep}" for folder in exclude)
+    if excluded:
+        candidates = (path for path in candidates if not str(path).startswith(excluded))
+    return index.find_duplicate(source, candidates)
+
+
+def link_duplicate(existing: Path, target: Path) -> bool:
+    """Hardlink ``existing`` at ``target``; False when the filesystem will not allow it."""
+    try:
+        os.link(existing, target)
+    except OSError:
+        return False
+    return True
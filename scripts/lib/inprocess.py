@@ -0,0 +1,162 @@
+"""Run LifeHub scripts' ``main()`` inside warm worker processes.
+
+``automation_server`` launches every command through a shell and a fresh
+interpreter, which costs 50–150 ms of start-up and imports before any work.
+:func:`parse_script_command` recognises the plain ``python3 scripts/<name>.py
+[args…]`` form; such commands are handed to a process pool whose workers have
+already imported ``lib`` and the allowed scripts' dependencies.
+
+Each run executes the script's module body afresh (so module-level state
+never leaks between runs, just as with a new interpreter) and calls
+``main()`` with ``sys.argv`` and the working directory set as on the command
+line. ``print`` output is captured; output written straight to file
+descriptors or by child processes is not, so such scripts should keep
+using the shell path. Scripts without a ``main()`` (those that do their work
+under ``if __name__ == "__main__"``) are reported back so the caller runs
+them through the shell.
+
+When the pool initializer is given an output queue, :func:`run_script` called
+with a ``token`` streams instead of buffering: it puts ``(token, "started",
+"")`` before the script runs, ``(token, "stdout"|"stderr", text)`` for each
+batch of complete lines as they are printed and ``(token, "finished", "")``
+at the end, so the server can relay output while the script is running.
+"""
+from __future__ import annotations
+
+import contextlib
+import importlib
+import importlib.util
+import io
+import os
+import pkgutil
+import shlex
+import sys
+import traceback
+from pathlib import Path
+from typing import Any, Iterable, List, Optional, Tuple
+
+SCRIPTS_DIR = Path(__file__).resolve().parents[1]
+PYTHON_NAMES = {"python", "python3", Path(sys.executable).name}
+# Anything the shell would expand or interpret; quoting alone is fine for shlex.
+SHELL_CHARACTERS = set("|&;<>()$`\\*?[]{}~\n")
+
+# Set by warm_worker in pool processes that stream their output to the server.
+_output: Any = None
+
+
+def parse_script_command(command: str, workdir: Path) -> Optional[Tuple[Path, List[str]]]:
+    """``(script, args)`` when ``command`` just runs a script from ``scripts/`` with Python."""
+    if any(char in SHELL_CHARACTERS for char in command):
+        return None
+    try:
+        argv = shlex.split(command)
+    except ValueError:
+        return None
+    if len(argv) < 2 or Path(argv[0]).name not in PYTHON_NAMES or not argv[1].endswith(".py"):
+        return None
+    script = (Path(workdir) / argv[1]).resolve()
+    if script.parent != SCRIPTS_DIR or not script.is_file():
+        return None
+    return script, argv[2:]
+
+
+def _load(script: Path):
+    spec = importlib.util.spec_from_file_location(f"lifehub_script_{script.stem}", script)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+class _LineWriter(io.TextIOBase):
+    """Text stream that forwards complete lines to the output queue as they are written."""
+
+    def __init__(self, queue: Any, token: str, stream: str):
+        self.queue = queue
+        self.token = token
+        self.stream = stream
+        self.pending = ""
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        self.pending += text
+        cut = self.pending.rfind("\n") + 1
+        if cut:
+            self.queue.put((self.token, self.stream, self.pending[:cut]))
+            self.pending = self.pending[cut:]
+        return len(text)
+
+    def flush(self) -> None:
+        if self.pending:
+            self.queue.put((self.token, self.stream, self.pending))
+            self.pending = ""
+
+
+def warm_worker(scripts: Iterable[str] = (), output: Any = None) -> None:
+    """Pool initializer: import ``lib`` and whatever the given scripts import."""
+    global _output
+    _output = output
+    if str(SCRIPTS_DIR) not in sys.path:
+        sys.path.insert(0, str(SCRIPTS_DIR))
+    lib = importlib.import_module("lib")
+    for info in pkgutil.iter_modules(lib.__path__):
+        with contextlib.suppress(Exception):
+            importlib.import_module(f"lib.{info.name}")
+    for script in scripts:
+        with contextlib.suppress(Exception), contextlib.redirect_stdout(io.StringIO()):
+            _load(Path(script))
+
+
+def _exit_code(value: object) -> Tuple[int, str]:
+    if value is None:
+        return 0, ""
+    if isinstance(value, int):
+        return value, ""
+    return 1, f"{value}\n"
+
+
+def run_script(
+    script: str, args: List[str], workdir: str, token: Optional[str] = None
+) -> Optional[Tuple[int, str, str]]:
+    """Run ``script``'s ``main()`` with ``args``; returns ``(exit_code, stdout, stderr)``.
+
+    With a ``token`` in a streaming worker the output goes to the queue as it
+    is written and the returned stdout/stderr are empty. Returns None when the
+    script has no callable ``main()``.
+    """
+    streaming = token is not None and _output is not None
+    if streaming:
+        stdout, stderr = _LineWriter(_output, token, "stdout"), _LineWriter(_output, token, "stderr")
+        _output.put((token, "started", ""))
+    else:
+        stdout, stderr = io.StringIO(), io.StringIO()
+    saved_argv, saved_cwd = sys.argv, os.getcwd()
+    sys.argv = [script, *args]
+    has_main = True
+    try:
+        os.chdir(workdir)
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            try:
+                main = getattr(_load(Path(script)), "main", None)
+                has_main = callable(main)
+                exit_code, message = _exit_code(main()) if has_main else (0, "")
+            except SystemExit as error:
+                exit_code, message = _exit_code(error.code)
+            except Exception:  # noqa: BLE001
+                exit_code, message = 1, traceback.format_exc()
+            sys.stdout.flush()
+        stderr.write(message)
+    finally:
+        sys.argv = saved_argv
+        os.chdir(saved_cwd)
+    if streaming:
+        stdout.flush()
+        stderr.flush()
+        _output.put((token, "finished", ""))
+    if not has_main:
+        return None
+    if streaming:
+        return exit_code, "", ""
+    return exit_code, stdout.getvalue(), stderr.getvalue()
@@ -0,0 +1,195 @@
+"""Inverted full-text index used by build_search_index.py and the dashboard.
+
+Index layout (``version`` 2)::
+
+    {
+      "version": 2,
+      "docCount": 3,
+      "avgDocLength": 41.3,
+      "docs": [{"path", "area", "snippet", "modified", "length"}, ...],
+      "terms": {"invoice": [docDelta, tf, posDelta, ..., docDelta, tf, ...], ...}
+    }
+
+Each posting list is a flat run of integers: the document id as a delta from
+the previous posting, the term frequency, then that many word positions, each
+a delta from the previous position. Small numbers keep the JSON compact and a
+query only decodes the lists for its own terms. ``docs[i].length`` feeds BM25.
+
+For the dashboard the same index is split by :func:`shard_index` into a small
+manifest, a lengths table, fixed-size document shards and one term shard per
+two-character term prefix, so a query only loads the shards it touches.
+"""
+from __future__ import annotations
+
+import json
+import math
+import re
+from typing import Dict, Iterable, Iterator, List, Mapping, Sequence, Tuple
+
+INDEX_VERSION = 2
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+MIN_TOKEN_LENGTH = 2
+MAX_TOKEN_LENGTH = 40
+MAX_TOKENS_PER_DOC = 20000
+BM25_K1 = 1.2
+BM25_B = 0.75
+TERM_SHARD_PREFIX = 2
+DOC_SHARD_SIZE = 1000
+SHARD_GLOBAL = "LIFEHUB_SEARCH_SHARDS"
+
+TermPositions = Dict[str, List[int]]
+Posting = Tuple[int, List[int]]
+
+
+def tokenize(text: str) -> List[str]:
+    return [
+        token
+        for token in TOKEN_PATTERN.findall(text.lower())
+        if MIN_TOKEN_LENGTH <= len(token) <= MAX_TOKEN_LENGTH
+    ]
+
+
+def term_positions(text: str) -> Tuple[TermPositions, int]:
+    """Return ``{term: [positions]}`` for ``text`` plus its token count."""
+    positions: TermPositions = {}
+    tokens = tokenize(text)[:MAX_TOKENS_PER_DOC]
+    for position, token in enumerate(tokens):
+        positions.setdefault(token, []).append(position)
+    return positions, len(tokens)
+
+
+def encode_postings(postings: Iterable[Posting]) -> List[int]:
+    encoded: List[int] = []
+    last_doc = 0
+    for doc_id, positions in postings:
+        encoded.append(doc_id - last_doc)
+        encoded.append(len(positions))
+        last_position = 0
+        for position in positions:
+            encoded.append(position - last_position)
+            last_position = position
+        last_doc = doc_id
+    return encoded
+
+
+def decode_postings(encoded: Sequence[int]) -> Iterator[Posting]:
+    doc_id = 0
+    idx = 0
+    while idx < len(encoded):
+        doc_id += encoded[idx]
+        frequency = encoded[idx + 1]
+        idx += 2
+        positions: List[int] = []
+        position = 0
+        for delta in encoded[idx : idx + frequency]:
+            position += delta
+            positions.append(position)
+        idx += frequency
+        yield doc_id, positions
+
+
+def build_index(docs: Sequence[Mapping[str, object]], doc_terms: Sequence[TermPositions]) -> dict:
+    """Invert per-document term positions into the version 2 index payload.
+
+    ``docs`` carry the display metadata (and ``length``); ``doc_terms[i]``
+    holds the positions for ``docs[i]``.
+    """
+    postings: Dict[str, List[Posting]] = {}
+    for doc_id, positions in enumerate(doc_terms):
+        for term, term_pos in positions.items():
+            postings.setdefault(term, []).append((doc_id, term_pos))
+    lengths = [int(doc.get("length") or 0) for doc in docs]
+    return {
+        "version": INDEX_VERSION,
+        "docCount": len(docs),
+        "avgDocLength": round(sum(lengths) / len(lengths), 3) if lengths else 0,
+        "docs": list(docs),
+        "terms": {term: encode_postings(postings[term]) for term in sorted(postings)},
+    }
+
+
+def explode_index(index: Mapping[str, object]) -> List[TermPositions]:
+    """Turn an index back into per-document term positions (inverse of build_index)."""
+    docs = index.get("docs") or []
+    doc_terms: List[TermPositions] = [{} for _ in docs]  # type: ignore[union-attr]
+    for term, encoded in (index.get("terms") or {}).items():  # type: ignore[union-attr]
+        for doc_id, positions in decode_postings(encoded):
+            doc_terms[doc_id][term] = positions
+    return doc_terms
+
+
+def shard_key(term: str) -> str:
+    """Return the file-safe shard name for ``term`` (mirrored by searchShardKey in dashboard.js)."""
+    prefix = term[:TERM_SHARD_PREFIX]
+    if re.fullmatch(r"[a-z0-9]+", prefix):
+        return prefix
+    return "u" + prefix.encode("utf-8").hex()
+
+
+def shard_index(index: Mapping[str, object]) -> Dict[str, object]:
+    """Split a version 2 index into ``{shard name: payload}`` for lazy loading.
+
+    ``manifest`` lists the term shards present (callers add per-file hashes
+    for cache busting before writing it); ``lengths`` holds every
+    document length for BM25; ``docs-N`` holds documents ``N*DOC_SHARD_SIZE``
+    onwards; ``terms-<key>`` holds the posting lists for one term prefix.
+    """
+    docs = list(index.get("docs") or [])  # type: ignore[arg-type]
+    term_shards: Dict[str, Dict[str, object]] = {}
+    for term, encoded in (index.get("terms") or {}).items():  # type: ignore[union-attr]
+        term_shards.setdefault(shard_key(term), {})[term] = encoded
+    shards: Dict[str, object] = {
+        "manifest": {
+            "version": INDEX_VERSION,
+            "docCount": len(docs),
+            "avgDocLength": index.get("avgDocLength") or 0,
+            "docShardSize": DOC_SHARD_SIZE,
+            "termPrefixLength": TERM_SHARD_PREFIX,
+            "termShards": sorted(term_shards),
+        },
+        "lengths": [int(doc.get("length") or 0) for doc in docs],
+    }
+    for start in range(0, len(docs), DOC_SHARD_SIZE):
+        shards[f"docs-{start // DOC_SHARD_SIZE}"] = [
+            {key: value for key, value in doc.items() if key != "length"} for doc in docs[start : start + DOC_SHARD_SIZE]
+        ]
+    for key, terms in term_shards.items():
+        shards[f"terms-{key}"] = terms
+    return shards
+
+
+def format_shard_js(name: str, payload: object) -> str:
+    """Wrap a shard as a script so it loads via <script> under file:// as well as HTTP."""
+    return (
+        f"window.{SHARD_GLOBAL} = window.{SHARD_GLOBAL} || {{}};\n"
+        f"window.{SHARD_GLOBAL}[{json.dumps(name)}] = {json.dumps(payload, separators=(',', ':'))};\n"
+    )
+
+
+def bm25_search(index: Mapping[str, object], query: str, limit: int = 10) -> List[Tuple[int, float]]:
+    """Rank documents containing every query term; returns ``(doc_id, score)`` pairs.
+
+    Mirrors the dashboard's JavaScript scorer so results can be checked offline.
+    """
+    terms = index.get("terms") or {}
+    docs = index.get("docs") or []
+    doc_count = len(docs)  # type: ignore[arg-type]
+    avg_length = float(index.get("avgDocLength") or 1)  # type: ignore[arg-type]
+    scores: Dict[int, float] = {}
+    matched: Dict[int, int] = {}
+    query_terms = sorted(set(tokenize(query)))
+    for term in query_terms:
+        encoded = terms.get(term)  # type: ignore[union-attr]
+        if not encoded:
+            return []
+        postings = list(decode_postings(encoded))
+        idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+        for doc_id, positions in postings:
+            length = float(docs[doc_id].get("length") or 0)  # type: ignore[index]
+            tf = len(positions)
+            norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+            scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1) / norm
+            matched[doc_id] = matched.get(doc_id, 0) + 1
+    hits = [(doc_id, score) for doc_id, score in scores.items() if matched[doc_id] == len(query_terms)]
+    hits.sort(key=lambda item: (-item[1], item[0]))
+    return hits[:limit]
@@ -0,0 +1,109 @@
+"""Streaming, atomic JSON writers for the generated dashboard feeds.
+
+``write_json`` encodes straight into a temporary file next to the target (no
+giant ``json.dumps`` string in memory), fsyncs it and ``os.replace``s it into
+place, so the dashboard never reads a half-written feed mid-refresh. Every write is
+counted in the current :mod:`lib.metrics` recorder (files and bytes). Wrap a
+generator in :class:`StreamedArray` or :class:`StreamedObject` to serialise
+entries as they are produced instead of collecting them first.
+"""
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Any, Iterable, Iterator, Tuple
+
+from . import metrics
+
+COMPACT_SEPARATORS = (",", ":")
+
+
+class StreamedArray:
+    """Marks an iterable to be written as a JSON array one item at a time."""
+
+    def __init__(self, items: Iterable[Any]):
+        self.items = items
+
+
+class StreamedObject:
+    """Marks an iterable of ``(key, value)`` pairs to be written as a JSON object."""
+
+    def __init__(self, pairs: Iterable[Tuple[str, Any]]):
+        self.pairs = pairs
+
+
+@contextmanager
+def atomic_writer(path: Path, *, encoding: str = "utf-8") -> Iterator[IO[str]]:
+    """Yield a text handle whose content replaces ``path`` only if the block succeeds."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "w", encoding=encoding) as handle:
+            yield handle
+            handle.flush()
+            os.fsync(handle.fileno())
+            written = os.fstat(handle.fileno()).st_size
+        os.chmod(tmp_name, 0o644)
+        os.replace(tmp_name, path)
+        metrics.count("filesWritten")
+        metrics.count("bytesWritten", written)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def atomic_write_text(path: Path, text: str, *, encoding: str = "utf-8") -> None:
+    with atomic_writer(path, encoding=encoding) as handle:
+        handle.write(text)
+
+
+def iterencode(value: Any, encoder: json.JSONEncoder) -> Iterator[str]:
+    """Like ``encoder.iterencode`` but expands stream markers lazily."""
+    if isinstance(value, StreamedArray):
+        yield "["
+        for idx, item in enumerate(value.items):
+            if idx:
+                yield encoder.item_separator
+            yield from iterencode(item, encoder)
+        yield "]"
+    elif isinstance(value, StreamedObject):
+        yield "{"
+        for idx, (key, item) in enumerate(value.pairs):
+            if idx:
+                yield encoder.item_separator
+            yield encoder.encode(str(key))
+            yield encoder.key_separator
+            yield from iterencode(item, encoder)
+        yield "}"
+    elif isinstance(value, dict) and any(isinstance(item, (StreamedArray, StreamedObject)) for item in value.values()):
+        yield from iterencode(StreamedObject(value.items()), encoder)
+    else:
+        yield from encoder.iterencode(value)
+
+
+def write_json(path: Path, payload: Any, *, ensure_ascii: bool = True) -> None:
+    """Atomically write ``payload`` as compact JSON, streaming any stream markers."""
+    encoder = json.JSONEncoder(separators=COMPACT_SEPARATORS, ensure_ascii=ensure_ascii)
+    with atomic_writer(path) as handle:
+        for chunk in iterencode(payload, encoder):
+            handle.write(chunk)
+
+
+def write_ndjson(path: Path, records: Iterable[Any]) -> int:
+    """Atomically write one compact JSON document per line; returns the record count."""
+    encoder = json.JSONEncoder(separators=COMPACT_SEPARATORS)
+    count = 0
+    with atomic_writer(path) as handle:
+        for record in records:
+            for chunk in iterencode(record, encoder):
+                handle.write(chunk)
+            handle.write("\n")
+            count += 1
+    return count
@@ -0,0 +1,190 @@
+"""Timers, counters and optional profiling for the refresh producers.
+
+Producers record into whichever :class:`Metrics` is current:
+
+    from lib import metrics
+
+    with metrics.timer("scan"):
+        ...
+    metrics.count("files", len(records))
+
+    @metrics.timed()
+    def render_page(...): ...
+
+Outside a :func:`collect` block the process-wide recorder just accumulates,
+so a script run on its own costs a ``perf_counter`` call per timer and nothing
+else. ``collect()`` gives one step a fresh recorder and, when ``LIFEHUB_PROFILE``
+(or the ``profile`` argument) asks for it, runs the step under ``cProfile``
+and/or ``tracemalloc``: ``cpu`` writes a ``.prof`` file into
+``automation/cache/profiles/`` and keeps the top functions by cumulative
+time, ``memory`` records the peak traced allocation. ``1``/``all`` means both.
+
+:func:`record_run` appends one refresh (per-step status, seconds, timers and
+counters) to ``refresh-metrics.json``, which keeps the last ``keep`` runs for
+the dashboard to chart.
+"""
+from __future__ import annotations
+
+import cProfile
+import functools
+import json
+import os
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, TypeVar
+
+from . import jsonstream
+
+ROOT = Path(__file__).resolve().parents[2]
+METRICS_PATH = ROOT / "refresh-metrics.json"
+PROFILE_DIR = ROOT / "automation" / "cache" / "profiles"
+PROFILE_ENV = "LIFEHUB_PROFILE"
+PROFILE_MODES = ("cpu", "memory")
+KEEP_RUNS = 200
+HOTSPOTS = 8
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class Metrics:
+    """Accumulated seconds per timer name and totals per counter name."""
+
+    def __init__(self) -> None:
+        self.timers: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        self.profile: Dict[str, Any] = {}
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timers[name] = self.timers.get(name, 0.0) + time.perf_counter() - started
+
+    def count(self, name: str, amount: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def as_dict(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {}
+        if self.timers:
+            data["timers"] = {name: round(seconds, 4) for name, seconds in sorted(self.timers.items())}
+        if self.counters:
+            data["counters"] = dict(sorted(self.counters.items()))
+        data.update(self.profile)
+        return data
+
+
+_current = Metrics()
+
+
+def current() -> Metrics:
+    return _current
+
+
+def timer(name: str):
+    """``with metrics.timer(name):`` — add the block's wall time to ``name``."""
+    return _current.timer(name)
+
+
+def count(name: str, amount: int = 1) -> None:
+    _current.count(name, amount)
+
+
+def timed(name: Optional[str] = None) -> Callable[[F], F]:
+    """Decorator form of :func:`timer`; defaults to the function's name."""
+
+    def decorate(function: F) -> F:
+        label = name or function.__name__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with _current.timer(label):
+                return function(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+def profile_modes(value: Optional[str] = None) -> Set[str]:
+    """Parse ``cpu``, ``memory``, ``cpu,memory``, ``all`` or ``1`` (default: ``$LIFEHUB_PROFILE``)."""
+    value = os.environ.get(PROFILE_ENV, "") if value is None else value
+    modes = {part.strip().lower() for part in value.split(",") if part.strip()}
+    if modes & {"1", "all", "yes", "true"}:
+        return set(PROFILE_MODES)
+    return modes & set(PROFILE_MODES)
+
+
+def _hotspots(profiler: cProfile.Profile) -> List[str]:
+    stats = pstats.Stats(profiler)
+    rows = []
+    for (filename, line, function), (_, calls, _, cumulative, _) in sorted(
+        stats.stats.items(), key=lambda item: item[1][3], reverse=True
+    ):
+        if filename == "~" or filename.startswith("<"):
+            continue
+        rows.append(f"{cumulative:.3f}s {calls}x {Path(filename).name}:{line}({function})")
+        if len(rows) >= HOTSPOTS:
+            break
+    return rows
+
+
+@contextmanager
+def collect(name: str, profile: Optional[Set[str]] = None) -> Iterator[Metrics]:
+    """Record the block into a fresh :class:`Metrics`, profiling it if asked to."""
+    global _current
+    modes = profile_modes() if profile is None else profile
+    previous, _current = _current, Metrics()
+    recorder = _current
+    profiler = cProfile.Profile() if "cpu" in modes else None
+    tracing = "memory" in modes and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+    if profiler:
+        profiler.enable()
+    try:
+        yield recorder
+    finally:
+        if profiler:
+            profiler.disable()
+            PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+            path = PROFILE_DIR / f"{name}.prof"
+            profiler.dump_stats(path)
+            recorder.profile["profile"] = str(path.relative_to(ROOT)) if ROOT in path.parents else str(path)
+            recorder.profile["hotspots"] = _hotspots(profiler)
+        if tracing:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            recorder.profile["peakMemoryKiB"] = peak // 1024
+        _current = previous
+
+
+def record_run(
+    steps: Dict[str, Dict[str, Any]],
+    *,
+    seconds: float,
+    source: str,
+    path: Path = METRICS_PATH,
+    keep: int = KEEP_RUNS,
+) -> Dict[str, Any]:
+    """Append one refresh to ``path`` (oldest runs dropped past ``keep``) and return the entry."""
+    try:
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        data = {}
+    runs = data.get("runs") if isinstance(data, dict) else None
+    runs = runs if isinstance(runs, list) else []
+    entry = {
+        "finishedAt": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "source": source,
+        "seconds": round(seconds, 3),
+        "steps": steps,
+    }
+    runs.append(entry)
+    jsonstream.write_json(path, {"generatedAt": entry["finishedAt"], "runs": runs[-keep:]})
+    return entry
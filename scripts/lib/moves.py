@@ -0,0 +1,156 @@
+"""Move files and folders without pulling them through Python memory.
+
+On one filesystem a move is a single ``os.rename``. Across filesystems (e.g.
+Downloads on the internal disk, LifeHub on an external SSD) files are copied
+in the kernel where possible (``copy_file_range``, then ``sendfile``, then a
+fixed-size buffered loop), fsynced, given the source's timestamps and mode,
+size-checked and only then renamed into place and the source removed. A
+failed copy leaves the source untouched and no partial target behind.
+"""
+from __future__ import annotations
+
+import errno
+import os
+import shutil
+import sys
+from pathlib import Path
+
+COPY_CHUNK = 8 * 1024 * 1024
+# errnos meaning "this kernel/filesystem pair cannot do that fast path".
+_FALLBACK_ERRNOS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSUP, errno.EBADF}
+
+
+def _copy_range(src_fd: int, dst_fd: int, size: int) -> bool:
+    copy_file_range = getattr(os, "copy_file_range", None)
+    if copy_file_range is None:
+        return False
+    copied = 0
+    try:
+        while copied < size:
+            sent = copy_file_range(src_fd, dst_fd, min(COPY_CHUNK, size - copied))
+            if sent == 0:
+                break
+            copied += sent
+    except OSError as error:
+        if copied == 0 and error.errno in _FALLBACK_ERRNOS:
+            return False
+        raise
+    return True
+
+
+def _send_file(src_fd: int, dst_fd: int, size: int) -> bool:
+    # macOS only allows sendfile() into sockets; Linux accepts regular files.
+    if not hasattr(os, "sendfile") or not sys.platform.startswith("linux"):
+        return False
+    offset = 0
+    try:
+        while offset < size:
+            sent = os.sendfile(dst_fd, src_fd, offset, min(COPY_CHUNK, size - offset))
+            if sent == 0:
+                break
+            offset += sent
+    except OSError as error:
+        if offset == 0 and error.errno in _FALLBACK_ERRNOS:
+            return False
+        raise
+    return True
+
+
+def _copy_buffered(src_fd: int, dst_fd: int) -> None:
+    buffer = bytearray(COPY_CHUNK)
+    view = memoryview(buffer)
+    while True:
+        read = os.readv(src_fd, [buffer])
+        if not read:
+            break
+        written = 0
+        while written < read:
+            written += os.write(dst_fd, view[written:read])
+
+
+def _fsync_dir(path: Path) -> None:
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def copy_file(source: Path, target: Path) -> None:
+    """Durably copy ``source`` to ``target`` with its metadata, verifying the size."""
+    source, target = Path(source), Path(target)
+    partial = target.with_name(f".{target.name}.partial")
+    src_fd = os.open(source, os.O_RDONLY)
+    try:
+        size = os.fstat(src_fd).st_size
+        dst_fd = os.open(partial, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        try:
+            if not _copy_range(src_fd, dst_fd, size) and not _send_file(src_fd, dst_fd, size):
+                os.lseek(src_fd, 0, os.SEEK_SET)
+                _copy_buffered(src_fd, dst_fd)
+            os.fsync(dst_fd)
+        finally:
+            os.close(dst_fd)
+        copied = os.stat(partial).st_size
+        if copied != size:
+            raise OSError(errno.EIO, f"Copied {copied} of {size} bytes", str(source))
+        shutil.copystat(source, partial)
+        os.replace(partial, target)
+    except BaseException:
+        try:
+            os.unlink(partial)
+        except FileNotFoundError:
+            pass
+        raise
+    finally:
+        os.close(src_fd)
+    _fsync_dir(target.parent)
+
+
+def copy_tree(source: Path, target: Path) -> None:
+    """Recreate the folder ``source`` at ``target`` using :func:`copy_file` for each file."""
+    source, target = Path(source), Path(target)
+    target.mkdir()
+    with os.scandir(source) as iterator:
+        entries = list(iterator)
+    for entry in entries:
+        destination = target / entry.name
+        if entry.is_symlink():
+            os.symlink(os.readlink(entry.path), destination)
+        elif entry.is_dir():
+            copy_tree(Path(entry.path), destination)
+        else:
+            copy_file(Path(entry.path), destination)
+    shutil.copystat(source, target)
+
+
+def move_path(source: Path, target: Path) -> str:
+    """Move ``source`` to the not-yet-existing ``target``; returns ``"rename"`` or ``"copy"``."""
+    source, target = Path(source), Path(target)
+    if os.path.lexists(target):
+        raise FileExistsError(errno.EEXIST, "Move target already exists", str(target))
+    try:
+        os.rename(source, target)
+        return "rename"
+    except OSError as error:
+        if error.errno != errno.EXDEV:
+            raise
+    if source.is_symlink():
+        os.symlink(os.readlink(source), target)
+        source.unlink()
+    elif source.is_dir():
+        try:
+            copy_tree(source, target)
+        except BaseException:
+            shutil.rmtree(target, ignore_errors=True)
+            raise
+        shutil.rmtree(source)
+    else:
+        copy_file(source, target)
+        source.unlink()
+    return "copy"
@@ -0,0 +1,54 @@
+"""Bounded, order-preserving worker pools for the LifeHub scripts."""
+from __future__ import annotations
+
+import os
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Deque, Iterable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+EXECUTORS = ("thread", "process")
+
+
+def default_workers() -> int:
+    return min(8, os.cpu_count() or 1)
+
+
+def make_executor(kind: str, workers: int) -> Executor:
+    if kind not in EXECUTORS:
+        raise ValueError(f"Unknown executor {kind!r}; expected one of {', '.join(EXECUTORS)}")
+    if kind == "process":
+        return ProcessPoolExecutor(max_workers=workers)
+    return ThreadPoolExecutor(max_workers=workers)
+
+
+def ordered_map(
+    fn: Callable[[T], R],
+    items: Iterable[T],
+    *,
+    workers: int = 1,
+    executor: str = "thread",
+    max_pending: Optional[int] = None,
+) -> Iterator[R]:
+    """Yield ``fn(item)`` for every item, in input order, using up to ``workers`` workers.
+
+    At most ``max_pending`` items (default ``4 * workers``) are in flight at
+    once, so memory stays bounded however long ``items`` is. ``workers <= 1``
+    runs inline with no pool at all. Process pools need ``fn`` to be a
+    module-level function (or a ``functools.partial`` of one).
+    """
+    if workers <= 1:
+        for item in items:
+            yield fn(item)
+        return
+    limit = max(1, max_pending or workers * 4)
+    with make_executor(executor, workers) as pool:
+        window: Deque[Future] = deque()
+        for item in items:
+            window.append(pool.submit(fn, item))
+            if len(window) >= limit:
+                yield window.popleft().result()
+        while window:
+            yield window.popleft().result()
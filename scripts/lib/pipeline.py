@@ -0,0 +1,330 @@
+"""Dependency-aware runner for the dashboard refresh steps.
+
+Each :class:`Step` names a ``module:function`` producer, the inputs it reads
+and the outputs it writes. A step runs after every step whose outputs appear
+among its file inputs (and after anything listed in ``after``), so independent
+producers run side by side in a process pool while joins such as the inline
+data wait for everything they read.
+
+Before a step starts its inputs are fingerprinted:
+
+* :class:`Files` — size and mtime of each file,
+* :class:`Tree` — every catalog entry below the given bases (declared outputs
+  and generated index pages excluded, so the refresh does not invalidate itself);
+  against a :class:`Catalog` that is one SQL aggregate per base (count, sizes,
+  mtimes) plus the few files whose generated-ness depends on their content,
+  so a rename that keeps both the path length and the mtime goes unnoticed
+  until the next change,
+* :class:`Listing` — a direct folder listing for places outside the catalog.
+
+When the fingerprint matches the one recorded after the last successful run
+and the outputs still exist, the step is skipped. ``volatile`` steps (network
+fetches, feeds carrying ages) always run. A failed step is reported but does
+not hold back its dependents; they run against the previous output.
+
+Every step runs inside :func:`lib.metrics.collect`, so its timers, counters
+and (with ``LIFEHUB_PROFILE``) profile come back with the result; given a
+``metrics_path`` the whole run is appended there for the dashboard.
+"""
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import importlib
+import io
+import json
+import os
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+from . import metrics
+from .catalog import Catalog
+from .jsonstream import write_json
+from .scanner import Snapshot, is_generated_page
+
+CSS_NAME = "directory.css"
+# Always generated, whatever their content.
+GENERATED_NAMES = (CSS_NAME, "index.html")
+# Generated only when they carry the generator's marker, so checked one by one.
+MAYBE_GENERATED_GLOBS = ("index-*.html", "index-listing.js")
+
+
+def _generated(path: Path) -> bool:
+    return path.name == CSS_NAME or is_generated_page(path)
+
+
+class Files:
+    """Input: the size and mtime of each path."""
+
+    def __init__(self, *paths: Path):
+        self.paths = tuple(Path(path) for path in paths)
+
+
+class Tree:
+    """Input: catalog entries below each base folder ("" is the whole tree)."""
+
+    def __init__(self, *bases: str):
+        self.bases = bases
+
+
+class Listing:
+    """Input: the direct listing of a folder the catalog does not cover."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+
+Input = Union[Files, Tree, Listing]
+
+
+@dataclass
+class Step:
+    name: str
+    target: str  # "module:function"
+    inputs: Sequence[Input] = ()
+    outputs: Sequence[Path] = ()
+    snapshot: bool = False  # call target(catalog) instead of target()
+    volatile: bool = False
+    after: Sequence[str] = ()
+
+
+@dataclass
+class StepResult:
+    name: str
+    status: str  # ran | skipped | failed
+    seconds: float = 0.0
+    output: str = ""
+    error: Optional[str] = None
+    metrics: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class RunReport:
+    results: Dict[str, StepResult] = field(default_factory=dict)
+    seconds: float = 0.0
+
+    @property
+    def failed(self) -> List[str]:
+        return [name for name, result in self.results.items() if result.status == "failed"]
+
+
+def call_target(
+    name: str, target: str, catalog_root: Optional[str], catalog_db: Optional[str]
+) -> Tuple[str, Optional[str], float, Dict[str, Any]]:
+    """Run one producer, capturing what it prints; returns ``(output, error, seconds, metrics)``."""
+    module_name, function_name = target.split(":")
+    buffer = io.StringIO()
+    error: Optional[str] = None
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(buffer), contextlib.redirect_stderr(buffer), metrics.collect(name) as recorder:
+        try:
+            function = getattr(importlib.import_module(module_name), function_name)
+            if catalog_root is None:
+                function()
+            else:
+                # Each worker reads the catalog through its own connection (WAL allows that).
+                catalog = Catalog(Path(catalog_root), Path(catalog_db)) if catalog_db else Catalog(Path(catalog_root))
+                try:
+                    function(catalog)
+                finally:
+                    catalog.close()
+        except SystemExit as exit_error:
+            if exit_error.code not in (None, 0):
+                error = f"exited with {exit_error.code}"
+        except Exception as failure:  # noqa: BLE001
+            error = f"{failure.__class__.__name__}: {failure}"
+            buffer.write(traceback.format_exc())
+    return buffer.getvalue(), error, time.perf_counter() - started, recorder.as_dict()
+
+
+class Pipeline:
+    def __init__(
+        self,
+        steps: Sequence[Step],
+        snapshot: Snapshot,
+        state_path: Path,
+        metrics_path: Optional[Path] = None,
+    ):
+        self.steps = {step.name: step for step in steps}
+        self.snapshot = snapshot
+        self.state_path = state_path
+        self.metrics_path = metrics_path
+        self.outputs: Dict[Path, str] = {Path(path): step.name for step in steps for path in step.outputs}
+        # Written by the run itself; never an input change.
+        self.own_files = {Path(path) for path in (state_path, metrics_path) if path is not None}
+        self.deps = {step.name: self._dependencies(step) for step in steps}
+
+    def _dependencies(self, step: Step) -> Set[str]:
+        deps = {other for other in step.after if other in self.steps}
+        for item in step.inputs:
+            if isinstance(item, Files):
+                deps.update(self.outputs[path] for path in item.paths if path in self.outputs)
+        deps.discard(step.name)
+        return deps
+
+    # -- fingerprints ------------------------------------------------------
+
+    def _excluded(self, rel: str) -> bool:
+        path = self.snapshot.root / rel
+        if _generated(path):
+            return True
+        return path in self.outputs or path in self.own_files or any(parent in self.outputs for parent in path.parents)
+
+    def _summarize_tree(self, catalog: Catalog, base: str, digest: Any) -> None:
+        excluded = []
+        for path in sorted(set(self.outputs) | self.own_files):
+            try:
+                excluded.append(catalog.relative(path))
+            except ValueError:  # outside the tree
+                continue
+        summary = catalog.summary(base, excluded, GENERATED_NAMES, MAYBE_GENERATED_GLOBS)
+        digest.update(("S" + "|".join(repr(value) for value in summary) + "\n").encode())
+        for record in catalog.iter_matching(base, MAYBE_GENERATED_GLOBS):
+            if not self._excluded(record.path):
+                digest.update(f"{record.path}|{record.size}|{record.mtime}\n".encode())
+
+    def fingerprint(self, step: Step) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        for item in step.inputs:
+            if isinstance(item, Files):
+                for path in item.paths:
+                    try:
+                        stat = path.stat()
+                        digest.update(f"F{path}|{stat.st_size}|{stat.st_mtime_ns}\n".encode())
+                    except OSError:
+                        digest.update(f"F{path}|missing\n".encode())
+            elif isinstance(item, Tree):
+                for base in item.bases:
+                    digest.update(f"T{base}\n".encode())
+                    if isinstance(self.snapshot, Catalog):
+                        self._summarize_tree(self.snapshot, base, digest)
+                        continue
+                    for record in self.snapshot.iter_files(base):
+                        if not self._excluded(record.path):
+                            digest.update(f"{record.path}|{record.size}|{record.mtime}\n".encode())
+            elif isinstance(item, Listing):
+                digest.update(f"L{item.path}\n".encode())
+                try:
+                    with os.scandir(item.path) as iterator:
+                        entries = sorted(
+                            (entry.name, entry.stat(follow_symlinks=False))
+                            for entry in iterator
+                            if not _generated(item.path / entry.name)
+                        )
+                except OSError:
+                    entries = []
+                for name, stat in entries:
+                    digest.update(f"{name}|{stat.st_size}|{stat.st_mtime_ns}\n".encode())
+        return digest.hexdigest()
+
+    def _load_state(self) -> Dict[str, str]:
+        try:
+            state = json.loads(self.state_path.read_text())
+        except (OSError, ValueError):
+            return {}
+        return state if isinstance(state, dict) else {}
+
+    # -- execution ----------------------------------------------------------
+
+    def run(
+        self,
+        *,
+        jobs: int = 1,
+        force: bool = False,
+        on_result: Optional[Callable[[StepResult], None]] = None,
+    ) -> RunReport:
+        state = self._load_state()
+        report = RunReport()
+        started = time.perf_counter()
+        pending = dict(self.deps)
+        running: Dict[Future, Tuple[Step, str]] = {}
+        catalog_root = str(self.snapshot.root)
+        catalog_db = str(self.snapshot.db_path) if isinstance(self.snapshot, Catalog) else None
+        pool = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+
+        def finish(result: StepResult) -> None:
+            report.results[result.name] = result
+            if on_result:
+                on_result(result)
+
+        def start(step: Step) -> None:
+            fingerprint = self.fingerprint(step)
+            fresh = all(Path(path).exists() for path in step.outputs)
+            if not force and not step.volatile and fresh and state.get(step.name) == fingerprint:
+                finish(StepResult(step.name, "skipped"))
+                return
+            args = (step.name, step.target, catalog_root if step.snapshot else None, catalog_db if step.snapshot else None)
+            if pool is None:
+                future: Future = Future()
+                future.set_result(call_target(*args))
+            else:
+                future = pool.submit(call_target, *args)
+            running[future] = (step, fingerprint)
+
+        try:
+            while pending or running:
+                blocked = pending.keys() | self._running_names(running)
+                ready = [name for name, deps in pending.items() if not deps & blocked]
+                for name in ready:
+                    del pending[name]
+                    start(self.steps[name])
+                if not running:
+                    if pending and not ready:
+                        for name in list(pending):
+                            del pending[name]
+                            finish(StepResult(name, "failed", error="dependency cycle"))
+                    continue
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    step, fingerprint = running.pop(future)
+                    output, error, seconds, recorded = future.result()
+                    if error is None:
+                        state[step.name] = fingerprint
+                    finish(StepResult(step.name, "failed" if error else "ran", seconds, output, error, recorded))
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        write_json(self.state_path, state)
+        report.seconds = time.perf_counter() - started
+        if self.metrics_path is not None:
+            metrics.record_run(
+                {name: step_metrics(result) for name, result in report.results.items()},
+                seconds=report.seconds,
+                source="refresh_all",
+                path=self.metrics_path,
+            )
+        return report
+
+    @staticmethod
+    def _running_names(running: Dict[Future, Tuple[Step, str]]) -> Set[str]:
+        return {step.name for step, _ in running.values()}
+
+
+def step_metrics(result: StepResult) -> Dict[str, Any]:
+    """One step's entry in ``refresh-metrics.json``."""
+    return {"status": result.status, "seconds": round(result.seconds, 3), **result.metrics}
+
+
+def _written(result: StepResult) -> str:
+    counters = result.metrics.get("counters") or {}
+    files = counters.get("filesWritten", 0)
+    if not files:
+        return ""
+    return f"  {files} file(s), {counters.get('bytesWritten', 0) / 1024:.1f} KiB written"
+
+
+def format_report(report: RunReport, order: Iterable[str]) -> str:
+    lines = []
+    for name in order:
+        result = report.results.get(name)
+        if result is None:
+            continue
+        detail = f"  {result.error}" if result.error else _written(result)
+        lines.append(f"  {name:<12} {result.status:<8} {result.seconds:6.2f}s{detail}")
+    busy = sum(result.seconds for result in report.results.values())
+    lines.append(f"  {'total':<12} {'':<8} {report.seconds:6.2f}s wall ({busy:.2f}s of step time)")
+    return "\n".join(lines)
@@ -0,0 +1,236 @@
+"""Append-only automation run log.
+
+Each finished task is one compact JSON line in ``runs.ndjson``. Writers take
+an exclusive ``flock`` on a sidecar lock file and append the whole batch in a
+single ``write``, so concurrent requests (or a second server process) can no
+longer lose each other's runs. Once the live file passes ``max_bytes`` it is
+rotated to ``runs.1.ndjson`` … ``runs.<keep>.ndjson`` and the oldest segment
+is dropped together with its output files.
+
+stdout/stderr longer than ``inline_chars`` are written to ``output/<runId>.
+<stream>.txt``; the log line keeps only a short tail plus the file name, so
+the log stays small enough to read from the end cheaply. :meth:`RunLog.tail`
+reads backwards from EOF and never parses more lines than it returns.
+"""
+from __future__ import annotations
+
+import fcntl
+import json
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator, List, Optional
+
+from .jsonstream import COMPACT_SEPARATORS, atomic_write_text
+
+LOG_NAME = "runs.ndjson"
+OUTPUT_DIR = "output"
+MAX_LOG_BYTES = 1024 * 1024
+KEEP_SEGMENTS = 3
+INLINE_OUTPUT_CHARS = 2048
+# Recent runs kept in memory for ``query``; older ones are still on disk.
+INDEX_SIZE = 500
+TAIL_BLOCK = 64 * 1024
+STREAMS = ("stdout", "stderr")
+SUMMARY_FIELDS = ("runId", "jobId", "id", "label", "command", "exitCode", "startedAt", "finishedAt", "durationMs")
+
+
+def summarize(record: dict) -> dict:
+    """The record without its output, as listed by ``/runs`` and the inline snapshot."""
+    return {key: record[key] for key in SUMMARY_FIELDS if key in record}
+
+
+def read_lines_backwards(path: Path, block_size: int = TAIL_BLOCK) -> Iterator[bytes]:
+    """Yield the non-empty lines of ``path`` last to first, reading ``block_size`` at a time."""
+    try:
+        handle = path.open("rb")
+    except FileNotFoundError:
+        return
+    with handle:
+        position = handle.seek(0, os.SEEK_END)
+        remainder = b""
+        while position > 0:
+            step = min(block_size, position)
+            position -= step
+            handle.seek(position)
+            lines = (handle.read(step) + remainder).split(b"\n")
+            remainder = lines.pop(0)
+            for line in reversed(lines):
+                if line.strip():
+                    yield line
+        if remainder.strip():
+            yield remainder
+
+
+class RunLog:
+    """NDJSON run history in ``directory`` with rotation and out-of-line output."""
+
+    def __init__(
+        self,
+        directory: Path,
+        *,
+        max_bytes: int = MAX_LOG_BYTES,
+        keep: int = KEEP_SEGMENTS,
+        inline_chars: int = INLINE_OUTPUT_CHARS,
+    ):
+        self.directory = Path(directory)
+        self.path = self.directory / LOG_NAME
+        self.output_dir = self.directory / OUTPUT_DIR
+        self.max_bytes = max_bytes
+        self.keep = keep
+        self.inline_chars = inline_chars
+        self._lock = threading.Lock()
+        self._recent: Optional[List[dict]] = None
+        self._seen: Optional[tuple] = None
+
+    def segment(self, number: int) -> Path:
+        return self.path if number == 0 else self.directory / f"runs.{number}.ndjson"
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(self.directory / f".{LOG_NAME}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _file_state(self) -> Optional[tuple]:
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_size
+
+    def _store_output(self, record: dict) -> None:
+        for stream in STREAMS:
+            text = record.get(stream) or ""
+            if len(text) <= self.inline_chars:
+                continue
+            name = f"{record['runId']}.{stream}.txt"
+            atomic_write_text(self.output_dir / name, text)
+            record[stream] = text[-self.inline_chars :]
+            record[f"{stream}File"] = f"{OUTPUT_DIR}/{name}"
+
+    def _drop_segment(self, path: Path) -> None:
+        for line in read_lines_backwards(path):
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            for stream in STREAMS:
+                name = record.get(f"{stream}File")
+                if name:
+                    try:
+                        (self.directory / name).unlink()
+                    except FileNotFoundError:
+                        pass
+        path.unlink()
+
+    def _rotate(self) -> None:
+        oldest = self.segment(self.keep)
+        if oldest.exists():
+            self._drop_segment(oldest)
+        for number in range(self.keep - 1, -1, -1):
+            source = self.segment(number)
+            if source.exists():
+                os.replace(source, self.segment(number + 1))
+
+    def append(self, runs: List[dict], job_id: Optional[str] = None) -> List[dict]:
+        """Log ``runs`` (one line each) and return the records as stored."""
+        records = []
+        for run in runs:
+            record = {"runId": uuid.uuid4().hex[:12], **({"jobId": job_id} if job_id else {}), **run}
+            records.append(record)
+        if not records:
+            return records
+        with self._locked():
+            for record in records:
+                self._store_output(record)
+            state = self._file_state()
+            if state and state[1] >= self.max_bytes:
+                self._rotate()
+            payload = "".join(json.dumps(record, separators=COMPACT_SEPARATORS) + "\n" for record in records)
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, payload.encode("utf-8"))
+            finally:
+                os.close(fd)
+            if self._recent is not None and self._seen == state:
+                self._recent[:0] = reversed(records)
+                del self._recent[INDEX_SIZE:]
+                self._seen = self._file_state()
+        return records
+
+    def iter_recent(self) -> Iterator[dict]:
+        """Every logged record, newest first, across rotated segments."""
+        for number in range(self.keep + 1):
+            for line in read_lines_backwards(self.segment(number)):
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+    def tail(self, limit: int) -> List[dict]:
+        records = []
+        for record in self.iter_recent():
+            if len(records) >= limit:
+                break
+            records.append(record)
+        return records
+
+    def _index(self) -> List[dict]:
+        # Reload when another process appended or rotated since we last looked.
+        state = self._file_state()
+        if self._recent is None or state != self._seen:
+            self._recent = self.tail(INDEX_SIZE)
+            self._seen = state
+        return self._recent
+
+    def query(
+        self,
+        *,
+        limit: int = 20,
+        status: Optional[str] = None,
+        command: Optional[str] = None,
+        before: Optional[str] = None,
+    ) -> List[dict]:
+        """Recent run summaries, newest first, filtered by ``ok``/``failed``, command substring or time."""
+        with self._lock:
+            recent = list(self._index())
+        matches = []
+        for record in recent:
+            if len(matches) >= limit:
+                break
+            if status == "ok" and record.get("exitCode") != 0:
+                continue
+            if status == "failed" and record.get("exitCode") == 0:
+                continue
+            if command and command not in (record.get("command") or ""):
+                continue
+            if before and (record.get("finishedAt") or "") >= before:
+                continue
+            matches.append(summarize(record))
+        return matches
+
+    def get(self, run_id: str) -> Optional[dict]:
+        """The full record for ``run_id`` with out-of-line output read back in."""
+        with self._lock:
+            recent = list(self._index())
+        record = next((item for item in recent if item.get("runId") == run_id), None)
+        if record is None:
+            record = next((item for item in self.iter_recent() if item.get("runId") == run_id), None)
+        if record is None:
+            return None
+        record = dict(record)
+        for stream in STREAMS:
+            name = record.pop(f"{stream}File", None)
+            if name:
+                try:
+                    record[stream] = (self.directory / name).read_text(encoding="utf-8")
+                except FileNotFoundError:
+                    pass
+        return record
@@ -0,0 +1,149 @@
+"""Single-pass filesystem snapshot shared by the LifeHub refresh scripts.
+
+Walk the tree once with ``os.scandir`` and hand the resulting records to every
+producer (stats, recent files, search index, directory indexes) instead of
+letting each one run its own ``os.walk``/``rglob`` over the same folders.
+"""
+from __future__ import annotations
+
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+# .thumbs holds the directory indexes' cached card thumbnails (lib/thumbnails.py).
+SKIP_DIR_NAMES = {".git", ".svn", "__pycache__", "node_modules", ".idea", ".thumbs"}
+# What generate_directory_indexes.py writes into each folder: index.html, the
+# overflow pages of huge folders (index-2.html, ...) and their listing sidecar.
+# index.html is the generator's by name; the others only when they carry its marker.
+GENERATED_PAGE = re.compile(r"index-\d+\.html|index-listing\.js")
+PAGE_MARKER = b'<meta name="lifehub-index"'
+LISTING_MARKER = b"window.LIFEHUB_LISTING"
+MARKER_BYTES = 1024
+
+
+def is_generated_page(path: Path) -> bool:
+    name = path.name
+    if name == "index.html":
+        return True
+    if GENERATED_PAGE.fullmatch(name) is None:
+        return False
+    try:
+        with open(path, "rb") as handle:
+            head = handle.read(MARKER_BYTES)
+    except OSError:
+        return False
+    return head.startswith(LISTING_MARKER) if name.endswith(".js") else PAGE_MARKER in head
+
+
+@dataclass(frozen=True)
+class FileRecord:
+    path: str  # POSIX path relative to the snapshot root
+    size: int
+    mtime: float
+    is_dir: bool
+    area: str
+
+    @property
+    def name(self) -> str:
+        return self.path.rsplit("/", 1)[-1]
+
+    @property
+    def depth(self) -> int:
+        return self.path.count("/") + 1
+
+
+class Snapshot:
+    """In-memory listing of every file and folder below ``root``."""
+
+    def __init__(self, root: Path, records: List[FileRecord]):
+        self.root = root
+        self.records = records
+        self._by_area: Dict[str, List[FileRecord]] = {}
+        for record in records:
+            self._by_area.setdefault(record.area, []).append(record)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def relative(self, path: Path) -> str:
+        """Return ``path`` as a snapshot-relative POSIX string ('' for the root)."""
+        rel = Path(path).relative_to(self.root).as_posix()
+        return "" if rel == "." else rel
+
+    def absolute(self, record: FileRecord) -> Path:
+        return self.root / record.path
+
+    def _candidates(self, base: str) -> Iterable[FileRecord]:
+        if not base:
+            return self.records
+        return self._by_area.get(base.split("/", 1)[0], [])
+
+    def _iter(self, base: str, skip_dirs: Iterable[str], want_dirs: bool) -> Iterator[FileRecord]:
+        base = base.strip("/")
+        prefix = f"{base}/" if base else ""
+        skip = set(skip_dirs)
+        for record in self._candidates(base):
+            if record.is_dir != want_dirs or not record.path.startswith(prefix):
+                continue
+            if skip:
+                # Only folders below ``base`` count, mirroring os.walk pruning.
+                parents = record.path[len(prefix):].split("/")
+                inspected = parents if want_dirs else parents[:-1]
+                if skip.intersection(inspected):
+                    continue
+            yield record
+
+    def iter_files(self, base: str = "", skip_dirs: Iterable[str] = ()) -> Iterator[FileRecord]:
+        return self._iter(base, skip_dirs, want_dirs=False)
+
+    def iter_dirs(self, base: str = "", skip_dirs: Iterable[str] = ()) -> Iterator[FileRecord]:
+        return self._iter(base, skip_dirs, want_dirs=True)
+
+    def count_files(self, base: str = "", skip_dirs: Iterable[str] = ()) -> int:
+        return sum(1 for _ in self.iter_files(base, skip_dirs))
+
+    def total_size(self, base: str = "", skip_dirs: Iterable[str] = ()) -> int:
+        return sum(record.size for record in self.iter_files(base, skip_dirs))
+
+
+def scan_tree(
+    root: Path,
+    *,
+    skip_dirs: Iterable[str] = SKIP_DIR_NAMES,
+    max_depth: Optional[int] = None,
+) -> Snapshot:
+    """Walk ``root`` once and return a :class:`Snapshot` of everything below it.
+
+    Folders named in ``skip_dirs`` are pruned entirely. ``max_depth`` limits how
+    many folder levels are descended (1 = direct children only).
+    """
+    root = Path(root)
+    skip = set(skip_dirs)
+    records: List[FileRecord] = []
+    stack: List[tuple[str, str, int]] = [(str(root), "", 0)]
+    while stack:
+        dirpath, rel_prefix, depth = stack.pop()
+        try:
+            iterator = os.scandir(dirpath)
+        except OSError:
+            continue
+        with iterator:
+            for entry in iterator:
+                rel = f"{rel_prefix}{entry.name}"
+                area = rel.split("/", 1)[0] if rel_prefix else ""
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name in skip:
+                            continue
+                        stat = entry.stat(follow_symlinks=False)
+                        records.append(FileRecord(rel, 0, stat.st_mtime, True, rel.split("/", 1)[0]))
+                        if max_depth is None or depth + 1 < max_depth:
+                            stack.append((entry.path, f"{rel}/", depth + 1))
+                    elif entry.is_file():
+                        stat = entry.stat()
+                        records.append(FileRecord(rel, stat.st_size, stat.st_mtime, False, area))
+                except OSError:
+                    continue
+    return Snapshot(root, records)
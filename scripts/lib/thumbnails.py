@@ -0,0 +1,146 @@
+"""Small cached previews of the images shown on directory index cards.
+
+A :class:`ThumbnailStore` keeps JPEG thumbnails in one ``.thumbs/`` folder
+under the index root. A thumbnail's name is a hash of the source path
+(relative to the root) and its mtime and size, so an edited or replaced image
+gets a new thumbnail and the old one becomes an orphan that :meth:`evict`
+removes after a full run.
+
+Thumbnails are made with Pillow when it is installed, otherwise with macOS
+``sips``. With neither (or when an image cannot be decoded) the caller keeps
+pointing at the original image. A decode failure leaves an empty
+``<hash>.failed`` marker under the same name hash, so the image is not retried
+on every refresh, only once it is edited or replaced. Missing thumbnails are generated with
+:func:`lib.parallel.ordered_map`, in a process pool when ``workers > 1``.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import subprocess
+from functools import partial
+from pathlib import Path
+from typing import Dict, Iterable, NamedTuple, Optional, Set, Tuple
+
+from . import metrics
+from .parallel import ordered_map
+
+try:  # optional: pip install Pillow
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - depends on the machine
+    Image = ImageOps = None
+
+THUMBS_DIR_NAME = ".thumbs"
+THUMB_SIZE = 480  # longest edge in pixels; cards are at most ~320 CSS px wide
+THUMB_QUALITY = 80
+FAILED_SUFFIX = ".failed"
+# Images this small are served as they are; a thumbnail would save next to nothing.
+SMALL_IMAGE_BYTES = 192 * 1024
+
+
+class Source(NamedTuple):
+    """An image to thumbnail, as statted when its folder was listed."""
+
+    path: Path
+    size: int
+    mtime_ns: int
+
+
+def backend() -> Optional[str]:
+    """``"pillow"``, ``"sips"`` or ``None`` when this machine cannot make thumbnails."""
+    if Image is not None:
+        return "pillow"
+    if shutil.which("sips"):
+        return "sips"
+    return None
+
+
+def make_thumbnail(source: Path, target: Path, size: int = THUMB_SIZE, tool: Optional[str] = None) -> bool:
+    """Write a JPEG of at most ``size`` px per side to ``target``; False when it could not be made."""
+    tool = tool or backend()
+    partial_path = target.with_name(f".{target.name}.tmp")
+    try:
+        if tool == "pillow":
+            with Image.open(source) as image:
+                image = ImageOps.exif_transpose(image)
+                image.thumbnail((size, size))
+                image.convert("RGB").save(partial_path, "JPEG", quality=THUMB_QUALITY, optimize=True)
+        elif tool == "sips":
+            command = ["sips", "-Z", str(size), "-s", "format", "jpeg", str(source), "--out", str(partial_path)]
+            subprocess.run(command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        else:
+            return False
+        os.replace(partial_path, target)
+        return True
+    except Exception:  # noqa: BLE001 - unreadable or unsupported image: fall back to the original
+        partial_path.unlink(missing_ok=True)
+        return False
+
+
+def _make(job: Tuple[Path, Path], tool: Optional[str]) -> bool:
+    return make_thumbnail(*job, tool=tool)
+
+
+class ThumbnailStore:
+    def __init__(self, root: Path, directory: Optional[Path] = None):
+        self.root = root
+        self.directory = directory or root / THUMBS_DIR_NAME
+        self.tool = backend()
+        self.used: Set[str] = set()
+
+    def name_for(self, source: Source) -> str:
+        try:
+            key = source.path.relative_to(self.root).as_posix()
+        except ValueError:
+            key = str(source.path)
+        digest = hashlib.blake2b(f"{key}|{source.size}|{source.mtime_ns}".encode(), digest_size=10).hexdigest()
+        return f"{digest}.jpg"
+
+    def ensure(self, sources: Iterable[Source], workers: int = 1) -> Dict[Path, Path]:
+        """Thumbnail paths for ``sources``, generating the missing ones; images left out keep their original."""
+        wanted = {}
+        for source in sources:
+            if source.size > SMALL_IMAGE_BYTES:
+                wanted[source.path] = self.directory / self.name_for(source)
+        self.used.update(target.name for target in wanted.values())
+        self.used.update(target.with_suffix(FAILED_SUFFIX).name for target in wanted.values())
+        if not wanted:
+            return {}
+        try:
+            existing = set(os.listdir(self.directory))
+        except FileNotFoundError:
+            existing = set()
+        # Images that failed before are left out until they change (and get a new name).
+        failed = {path for path, target in wanted.items() if target.with_suffix(FAILED_SUFFIX).name in existing}
+        missing = [
+            (path, target) for path, target in wanted.items() if target.name not in existing and path not in failed
+        ]
+        if missing and self.tool:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with metrics.timer("thumbnails"):
+                make = partial(_make, tool=self.tool)
+                made = ordered_map(make, missing, workers=min(workers, len(missing)), executor="process")
+                for (path, target), ok in zip(missing, made):
+                    if not ok:
+                        failed.add(path)
+                        target.with_suffix(FAILED_SUFFIX).touch()
+                        metrics.count("thumbnailsFailed")
+            metrics.count("thumbnailsMade", sum(1 for path, _ in missing if path not in failed))
+        elif missing:
+            failed.update(path for path, _ in missing)
+        return {path: target for path, target in wanted.items() if path not in failed}
+
+    def evict(self) -> int:
+        """Delete thumbnails no :meth:`ensure` call asked for; only meaningful after a full run."""
+        removed = 0
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return 0
+        for name in names:
+            if name not in self.used:
+                (self.directory / name).unlink(missing_ok=True)
+                removed += 1
+        metrics.count("thumbnailsEvicted", removed)
+        return removed
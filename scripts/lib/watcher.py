@@ -0,0 +1,264 @@
+"""Watch folder trees for changes: inotify where available, mtime polling elsewhere.
+
+Both watchers report *directories* whose contents changed (an entry was
+created, deleted, renamed or, with inotify, rewritten). ``ignore(path)``
+filters out entries nobody cares about — typically the feeds and index pages
+the refresh itself writes — so a refresh does not trigger the next one.
+
+:class:`InotifyWatcher` talks to the Linux kernel through ``ctypes`` (one
+watch per folder, added as folders appear). :class:`PollingWatcher` stats
+every known folder each interval and, when a folder's mtime moved, compares a
+listing signature so writes of ignored files do not count. Like the catalog
+between its hourly re-stats, it cannot see a file rewritten in place. :func:`coalesce` turns a burst of
+events into one batch.
+"""
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple, Union
+
+from .scanner import SKIP_DIR_NAMES
+
+Ignore = Callable[[Path], bool]
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_ONLYDIR = 0x01000000
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_ONLYDIR
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def _never(path: Path) -> bool:
+    return False
+
+
+def _walk_dirs(root: Path, skip_dirs: Set[str], ignore: Ignore) -> Iterable[Path]:
+    stack = [root]
+    while stack:
+        folder = stack.pop()
+        yield folder
+        try:
+            with os.scandir(folder) as iterator:
+                for entry in iterator:
+                    if entry.is_dir(follow_symlinks=False) and entry.name not in skip_dirs:
+                        path = Path(entry.path)
+                        if not ignore(path):
+                            stack.append(path)
+        except OSError:
+            continue
+
+
+class InotifyWatcher:
+    """Recursive inotify watch over ``roots`` (Linux only)."""
+
+    def __init__(self, roots: Iterable[Path], *, skip_dirs: Iterable[str] = SKIP_DIR_NAMES, ignore: Ignore = _never):
+        if not sys.platform.startswith("linux"):
+            raise OSError(errno.ENOSYS, "inotify is only available on Linux")
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.roots = [Path(root) for root in roots]
+        self.skip_dirs = set(skip_dirs)
+        self.ignore = ignore
+        self.watches: Dict[int, Path] = {}
+        for root in self.roots:
+            self._watch_tree(root)
+
+    def _watch_tree(self, root: Path) -> None:
+        for folder in _walk_dirs(root, self.skip_dirs, self.ignore):
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(folder), WATCH_MASK)
+            if wd < 0:
+                code = ctypes.get_errno()
+                if code == errno.ENOSPC:
+                    raise OSError(code, "inotify watch limit reached (fs.inotify.max_user_watches)")
+                continue
+            self.watches[wd] = folder
+
+    def poll(self, timeout: float) -> Set[Path]:
+        """Folders changed since the last call, waiting up to ``timeout`` seconds for the first event."""
+        readable, _, _ = select.select([self.fd], [], [], max(0.0, timeout))
+        if not readable:
+            return set()
+        changed: Set[Path] = set()
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset : offset + length].rstrip(b"\0")
+                offset += length
+                self._handle(wd, mask, os.fsdecode(name), changed)
+        return changed
+
+    def _handle(self, wd: int, mask: int, name: str, changed: Set[Path]) -> None:
+        if mask & IN_Q_OVERFLOW:
+            changed.update(self.roots)
+            return
+        folder = self.watches.get(wd)
+        if folder is None:
+            return
+        if mask & IN_IGNORED:
+            del self.watches[wd]
+            return
+        if mask & IN_DELETE_SELF:
+            changed.add(folder.parent)
+            return
+        path = folder / name
+        if name and (self.ignore(path) or (mask & IN_ISDIR and name in self.skip_dirs)):
+            return
+        changed.add(folder)
+        if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+            self._watch_tree(path)
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+Signature = Tuple[Tuple[str, bool, int, int], ...]
+
+
+class PollingWatcher:
+    """Portable fallback: stat every watched folder each ``interval`` seconds."""
+
+    def __init__(
+        self,
+        roots: Iterable[Path],
+        *,
+        skip_dirs: Iterable[str] = SKIP_DIR_NAMES,
+        ignore: Ignore = _never,
+        interval: float = 2.0,
+    ):
+        self.roots = [Path(root) for root in roots]
+        self.skip_dirs = set(skip_dirs)
+        self.ignore = ignore
+        self.interval = interval
+        self.folders: Dict[Path, Tuple[int, Signature]] = {}
+        for root in self.roots:
+            self._add_tree(root)
+
+    def _signature(self, folder: Path) -> Signature:
+        entries = []
+        with os.scandir(folder) as iterator:
+            for entry in iterator:
+                path = Path(entry.path)
+                if self.ignore(path):
+                    continue
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                    if is_dir and entry.name in self.skip_dirs:
+                        continue
+                    stat = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                entries.append((entry.name, is_dir, 0 if is_dir else stat.st_size, 0 if is_dir else stat.st_mtime_ns))
+        return tuple(sorted(entries))
+
+    def _add_tree(self, root: Path) -> None:
+        for folder in _walk_dirs(root, self.skip_dirs, self.ignore):
+            if folder in self.folders:
+                continue
+            try:
+                self.folders[folder] = (os.stat(folder).st_mtime_ns, self._signature(folder))
+            except OSError:
+                continue
+
+    def poll(self, timeout: float) -> Set[Path]:
+        deadline = time.monotonic() + max(0.0, timeout)
+        while True:
+            changed = self._check()
+            remaining = deadline - time.monotonic()
+            if changed or remaining <= 0:
+                return changed
+            time.sleep(min(self.interval, remaining))
+
+    def _check(self) -> Set[Path]:
+        changed: Set[Path] = set()
+        for folder, (mtime, signature) in list(self.folders.items()):
+            try:
+                current = os.stat(folder).st_mtime_ns
+            except OSError:
+                del self.folders[folder]
+                changed.add(folder.parent)
+                continue
+            if current == mtime:
+                continue
+            try:
+                fresh = self._signature(folder)
+            except OSError:
+                continue
+            self.folders[folder] = (current, fresh)
+            if fresh != signature:
+                changed.add(folder)
+                self._add_tree(folder)
+        return changed
+
+    def close(self) -> None:
+        self.folders.clear()
+
+
+def open_watcher(
+    roots: Iterable[Path],
+    *,
+    skip_dirs: Iterable[str] = SKIP_DIR_NAMES,
+    ignore: Ignore = _never,
+    polling: bool = False,
+    interval: float = 2.0,
+) -> Union[InotifyWatcher, PollingWatcher]:
+    """An :class:`InotifyWatcher` if the platform allows, else a :class:`PollingWatcher`."""
+    roots = [Path(root) for root in roots if Path(root).is_dir()]
+    if not polling:
+        try:
+            return InotifyWatcher(roots, skip_dirs=skip_dirs, ignore=ignore)
+        except (OSError, AttributeError) as error:
+            print(f"[watch] inotify unavailable ({error}); polling every {interval:g}s", file=sys.stderr)
+    return PollingWatcher(roots, skip_dirs=skip_dirs, ignore=ignore, interval=interval)
+
+
+def coalesce(
+    watcher: Union[InotifyWatcher, PollingWatcher],
+    *,
+    quiet: float = 1.0,
+    max_wait: float = 10.0,
+    timeout: Optional[float] = None,
+) -> Set[Path]:
+    """Block for the first change, then keep collecting until ``quiet`` seconds pass without one.
+
+    ``max_wait`` caps how long a steady stream of events can postpone the batch;
+    with ``timeout`` an empty set is returned if nothing happens in that time.
+    """
+    changed: Set[Path] = set()
+    while not changed:
+        changed = watcher.poll(3600.0 if timeout is None else timeout)
+        if timeout is not None and not changed:
+            return changed
+    deadline = time.monotonic() + max_wait
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return changed
+        more = watcher.poll(min(quiet, remaining))
+        if not more:
+            return changed
+        changed |= more
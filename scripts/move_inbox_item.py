@@ -4,9 +4,13 @@ from __future__ import annotations
 
 import argparse
 import base64
-import shutil
 import sys
 from pathlib import Path
+from typing import Optional
+
+from lib.catalog import Catalog
+from lib.dedup import ON_DUPLICATE, DuplicateFound, HashIndex, find_existing_copy, link_duplicate
+from lib.moves import move_path
 
 ROOT = Path(__file__).resolve().parents[1]
 INBOX_ROOT = ROOT / "Inbox"
@@ -42,6 +46,18 @@ def ensure_within(path: Path, parent: Path) -> None:
         raise ValueError(f"{path} is outside {parent}") from error
 
 
+def existing_copy(source_path: Path, dest_root: Path) -> Optional[Path]:
+    """Return a LifeHub file byte-identical to ``source_path``, if there is one."""
+    if not source_path.is_file():
+        return None
+    catalog = Catalog(ROOT)
+    try:
+        with HashIndex() as index:
+            return find_existing_copy(source_path, index, folders=[dest_root], catalog=catalog, exclude=[INBOX_ROOT])
+    finally:
+        catalog.close()
+
+
 def unique_target(dest_root: Path, name: str) -> Path:
     target = dest_root / name
     if not target.exists():
@@ -56,7 +72,7 @@ def unique_target(dest_root: Path, name: str) -> Path:
         counter += 1
 
 
-def move_item(source_rel: str, destination: str) -> Path:
+def move_item(source_rel: str, destination: str, on_duplicate: str = "skip") -> Path:
     destination_root = DESTINATION_MAP.get(destination)
     if not destination_root:
         raise ValueError(f"Unknown destination: {destination}")
@@ -67,17 +83,38 @@ def move_item(source_rel: str, destination: str) -> Path:
     destination_root.mkdir(parents=True, exist_ok=True)
     destination_root = destination_root.resolve()
     ensure_within(destination_root, ROOT)
+    existing = existing_copy(source_path, destination_root) if on_duplicate != "keep" else None
+    if existing is not None:
+        if on_duplicate == "skip":
+            raise DuplicateFound(source_path, existing)
+        target_path = unique_target(destination_root, source_path.name)
+        if link_duplicate(existing, target_path):
+            source_path.unlink()
+            return target_path
     target_path = unique_target(destination_root, source_path.name)
     target_path.parent.mkdir(parents=True, exist_ok=True)
-    shutil.move(str(source_path), str(target_path))
+    move_path(source_path, target_path)
     return target_path
 
 
+def display_path(path: Path) -> str:
+    try:
+        return str(path.relative_to(ROOT))
+    except ValueError:
+        return str(path)
+
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Move an Inbox file into a LifeHub destination.")
     parser.add_argument("--source", help="Relative path (e.g., Inbox/2025-07-Unsorted/file.pdf)")
     parser.add_argument("--source-b64", help="Base64-encoded relative path")
     parser.add_argument("--destination", required=True, help="Destination root folder (Work, Family, etc.)")
+    parser.add_argument(
+        "--on-duplicate",
+        choices=ON_DUPLICATE,
+        default="skip",
+        help="What to do when an identical file already exists in LifeHub (default: skip)",
+    )
     return parser.parse_args()
 
 
@@ -85,8 +122,10 @@ def main() -> None:
     args = parse_args()
     try:
         source = decode_argument(args.source, args.source_b64)
-        target_path = move_item(source, args.destination)
+        target_path = move_item(source, args.destination, args.on_duplicate)
         print(f"Moved {source} → {target_path.relative_to(ROOT)}")
+    except DuplicateFound as duplicate:
+        print(f"Skipped {source}: identical to {display_path(duplicate.existing)}")
     except Exception as error:  # noqa: BLE001
         print(f"Error: {error}", file=sys.stderr)
         sys.exit(1)
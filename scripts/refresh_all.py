@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""Run every dashboard refresh step as a dependency graph from a single tree scan.
+
+The LifeHub tree is read from the persistent catalog (scripts/lib/catalog.py),
+which only re-lists folders that changed since the last run, and that single
+view is shared by the stats, recent-files, search-index and directory-index
+producers instead of each one walking the archive again.
+
+STEPS declares what each producer reads and writes (scripts/lib/pipeline.py):
+independent steps run in parallel worker processes, a step whose inputs are
+unchanged since its last successful run is skipped, and the inline dashboard
+data is built last from whatever the others wrote. Per-step timings are
+printed at the end and appended, with each step's timers and counters, to
+refresh-metrics.json (scripts/lib/metrics.py); --profile cpu|memory|all runs
+every step under cProfile/tracemalloc (same as LIFEHUB_PROFILE=...).
+
+    python3 scripts/refresh_all.py [--full-scan] [--force] [--jobs N] [--profile MODE]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+
+import build_search_index
+import build_text_game_sources
+import fetch_agenda_ics
+import generate_directory_indexes
+import generate_recent_files
+from lib import metrics
+from lib.catalog import open_catalog
+from lib.parallel import default_workers
+from lib.pipeline import Files, Listing, Pipeline, Step, StepResult, Tree, format_report
+
+ROOT = Path(__file__).resolve().parents[1]
+DOWNLOADS_DIR = Path.home() / "Downloads"
+CSS_NAME = "directory.css"
+STATE_PATH = ROOT / "automation" / "cache" / "refresh-state.json"
+METRICS_PATH = ROOT / "refresh-metrics.json"
+
+FEEDS = {
+    "stats": ROOT / "dashboard-stats.json",
+    "welltory": ROOT / "welltory-summary.json",
+    "recent": ROOT / "recent-files.json",
+    "downloads": ROOT / "downloads-feed.json",
+    "calendar": ROOT / "Resources" / "calendar.ics",
+}
+STEPS = [
+    Step(
+        "downloads",
+        "generate_downloads_feed:main",
+        inputs=[Listing(DOWNLOADS_DIR)],
+        outputs=[FEEDS["downloads"]],
+        volatile=True,  # entries carry their age in hours
+    ),
+    Step(
+        "stats",
+        "update_dashboard_stats:main",
+        inputs=[Tree(""), Files(FEEDS["downloads"])],
+        outputs=[FEEDS["stats"], ROOT / "dashboard-stats-history.json"],
+        snapshot=True,
+        volatile=True,  # appends a history point every HISTORY_INTERVAL
+    ),
+    Step(
+        "welltory",
+        "update_welltory_summary:main",
+        inputs=[Tree("Personal/Health/Welltory")],
+        outputs=[FEEDS["welltory"], ROOT / "welltory-history.json"],
+    ),
+    Step(
+        "recent",
+        "generate_recent_files:main",
+        inputs=[Tree(*generate_recent_files.AREAS)],
+        outputs=[FEEDS["recent"]],
+        snapshot=True,
+    ),
+    Step(
+        "search",
+        "build_search_index:main",
+        inputs=[Tree(*build_search_index.INDEX_ROOTS)],
+        outputs=[build_search_index.OUTPUT_PATH, build_search_index.SHARD_DIR],
+        snapshot=True,
+    ),
+    Step(
+        "agenda",
+        "refresh_all:fetch_agenda",
+        inputs=[Files(ROOT / "automation" / "agenda" / "source.json")],
+        outputs=[FEEDS["calendar"]],
+        volatile=True,  # the feed may be remote
+    ),
+    Step(
+        "indexes",
+        "refresh_all:refresh_indexes",
+        inputs=[Tree(""), Listing(DOWNLOADS_DIR)],
+        outputs=[ROOT / "Downloads"],
+    ),
+    Step(
+        "backups",
+        "update_backup_status:main",
+        inputs=[Files(ROOT / "automation" / "backups" / "targets.json", ROOT / "automation" / "backups" / "status.json")],
+        outputs=[ROOT / "dashboard-data.js"],
+        volatile=True,  # entries carry their age
+    ),
+    Step(
+        "text-games",
+        "build_text_game_sources:main",
+        inputs=[Files(*(path for _, path in build_text_game_sources.SOURCES))],
+        outputs=[ROOT / "text-game-sources.js"],
+    ),
+]
+STEPS.append(
+    Step(
+        "inline",
+        "build_dashboard_inline_data:main",
+        inputs=[
+            Files(
+                *FEEDS.values(),
+                ROOT / "agenda-reminders.json",
+                ROOT / "automation" / "logs" / "runs.ndjson",
+                ROOT / "automation" / "backups" / "targets.json",
+                ROOT / "automation" / "backups" / "status.json",
+            )
+        ],
+        outputs=[ROOT / "dashboard-inline-data.js"],
+        after=[step.name for step in STEPS],  # the join node
+    )
+)
+
+
+def fetch_agenda() -> None:
+    """Agenda fetch failures (offline, bad URL) are reported but never fail the refresh."""
+    try:
+        fetch_agenda_ics.main()
+    except Exception as error:  # noqa: BLE001
+        print(f"Agenda fetch skipped/failed — {error}")
+
+
+def refresh_indexes() -> None:
+    """Python port of scripts/refresh_indexes.sh."""
+    print("[LifeHub] Updating local directory indexes...")
+    generate_directory_indexes.main(["--jobs", "0"])
+    if refresh_downloads_index():
+        print(f"Directory indexes refreshed for LifeHub and {DOWNLOADS_DIR}")
+
+
+def refresh_downloads_index() -> bool:
+    """Rebuild the ~/Downloads pretty index and mirror it into LifeHub/Downloads."""
+    if not DOWNLOADS_DIR.exists():
+        print(f"[Downloads] {DOWNLOADS_DIR} missing; skipping pretty index.")
+        return False
+    print("[Downloads] Updating pretty index...")
+    generate_directory_indexes.main(["--path", str(DOWNLOADS_DIR), "--max-depth", "1", "--jobs", "0"])
+
+    css_source = ROOT / CSS_NAME
+    if css_source.exists():
+        copy_if_changed(css_source, DOWNLOADS_DIR / CSS_NAME)
+    mirror = ROOT / "Downloads"
+    mirror.mkdir(parents=True, exist_ok=True)
+    for name in ("index.html", CSS_NAME):
+        source = DOWNLOADS_DIR / name
+        if source.exists():
+            copy_if_changed(source, mirror / name)
+    return True
+
+
+def copy_if_changed(source: Path, target: Path) -> None:
+    """Copy unless ``target`` already has the same bytes, so unchanged pages keep their mtime."""
+    try:
+        if target.read_bytes() == source.read_bytes():
+            return
+    except OSError:
+        pass
+    shutil.copyfile(source, target)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Regenerate every LifeHub dashboard feed.")
+    parser.add_argument(
+        "--full-scan",
+        action="store_true",
+        help="Re-list every folder instead of only those whose mtime changed",
+    )
+    parser.add_argument("--force", action="store_true", help="Run every step even if its inputs are unchanged")
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=max(2, default_workers()),
+        help="Steps to run at once in worker processes (1 = sequentially in this process)",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=["cpu", "memory", "all"],
+        help="Profile every step that runs (cProfile dumps go to automation/cache/profiles/)",
+    )
+    return parser.parse_args()
+
+
+def print_result(result: StepResult) -> None:
+    if result.output:
+        print(result.output, end="" if result.output.endswith("\n") else "\n")
+    print(f"[{result.name}] {result.status}" + (f" in {result.seconds:.2f}s" if result.status != "skipped" else ""))
+    for line in result.metrics.get("hotspots", []):
+        print(f"    {line}")
+    sys.stdout.flush()
+
+
+def main() -> None:
+    args = parse_args()
+    if args.profile:
+        os.environ[metrics.PROFILE_ENV] = args.profile  # inherited by the step workers
+    print("Refreshing LifeHub dashboard data...")
+    started = time.perf_counter()
+    snapshot = open_catalog(ROOT, full=args.full_scan)
+    print(f"Catalog holds {len(snapshot)} entries under {ROOT} ({time.perf_counter() - started:.2f}s)")
+    try:
+        pipeline = Pipeline(STEPS, snapshot, STATE_PATH, METRICS_PATH)
+        report = pipeline.run(jobs=max(1, args.jobs), force=args.force, on_result=print_result)
+    finally:
+        snapshot.close()
+
+    print("Step timings:")
+    print(format_report(report, [step.name for step in STEPS]))
+    if report.failed:
+        print(f"Finished with failures: {', '.join(report.failed)}")
+        raise SystemExit(1)
+    print("All dashboard feeds regenerated.")
+
+
+if __name__ == "__main__":
+    main()
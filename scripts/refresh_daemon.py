@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""Keep the dashboard feeds fresh by refreshing only what changed.
+
+Watches the LifeHub areas and ~/Downloads (inotify on Linux, mtime polling
+elsewhere or with --poll), waits for a burst of changes to settle, re-lists
+just the changed folders in the catalog and reruns only the producers those
+folders feed:
+
+    python3 scripts/refresh_daemon.py [--poll] [--interval 2] [--quiet 1.5] [--max-wait 15]
+
+  ~/Downloads          -> downloads feed + Downloads index, stats (backlog)
+  any watched area     -> stats, directory indexes of the changed folders
+  recent-files areas   -> recent files
+  search-index roots   -> search index (incremental via its manifest)
+  any of the above     -> inline dashboard data
+
+Index pages and feeds the producers write are ignored, so a refresh never
+triggers another. Each refresh is appended to refresh-metrics.json (source
+"daemon") like the refresh_all runs. Keep a nightly ``refresh_all.py --full-scan`` for the things
+watching cannot see (new top-level areas, agenda, backups, text games).
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, List, Set
+
+import build_dashboard_inline_data
+import build_search_index
+import generate_directory_indexes
+import generate_downloads_feed
+import generate_recent_files
+import update_dashboard_stats
+from lib import metrics
+from lib.catalog import Catalog, open_catalog
+from lib.scanner import is_generated_page
+from lib.watcher import coalesce, open_watcher
+from refresh_all import DOWNLOADS_DIR, METRICS_PATH, refresh_downloads_index
+
+ROOT = Path(__file__).resolve().parents[1]
+WATCHED_AREAS = sorted(set(generate_recent_files.AREAS) | set(build_search_index.INDEX_ROOTS))
+TEMP_SUFFIXES = (".tmp", ".partial")
+
+
+def is_generated(path: Path) -> bool:
+    """Files the refresh writes itself (or half-written temp files) — never a reason to refresh."""
+    name = path.name
+    if name == "directory.css" or (name.startswith(".") and name.endswith(TEMP_SUFFIXES)):
+        return True
+    return is_generated_page(path)
+
+
+@dataclass
+class RefreshPlan:
+    dirs: Set[str] = field(default_factory=set)  # ROOT-relative folders to re-list
+    pages: Set[Path] = field(default_factory=set)  # index.html pages to rewrite
+    producers: List[str] = field(default_factory=list)
+
+
+def plan_refresh(changed: Iterable[Path]) -> RefreshPlan:
+    plan = RefreshPlan()
+    downloads = False
+    for path in changed:
+        if path == DOWNLOADS_DIR or DOWNLOADS_DIR in path.parents:
+            downloads = True
+            continue
+        try:
+            rel = path.relative_to(ROOT).as_posix()
+        except ValueError:
+            continue
+        plan.dirs.add("" if rel == "." else rel)
+    areas = {rel.split("/", 1)[0] for rel in plan.dirs}
+    for rel in plan.dirs:
+        plan.pages |= generate_directory_indexes.pages_affected_by(ROOT / rel if rel else ROOT, ROOT)
+
+    if downloads:
+        plan.producers.append("downloads")
+    if downloads or plan.dirs:
+        plan.producers.append("stats")
+    if areas & set(generate_recent_files.AREAS):
+        plan.producers.append("recent")
+    if areas & set(build_search_index.INDEX_ROOTS):
+        plan.producers.append("search")
+    if plan.pages:
+        plan.producers.append("indexes")
+    if plan.producers:
+        plan.producers.append("inline")
+    return plan
+
+
+def run_plan(plan: RefreshPlan, catalog: Catalog) -> None:
+    started = time.perf_counter()
+    if plan.dirs:
+        counts = catalog.refresh(dirs=plan.dirs)
+        print(f"[catalog] re-listed {counts['dirsListed']} folder(s): +{counts['inserted']} ~{counts['updated']} -{counts['deleted']}")
+    steps = {
+        "downloads": lambda: (generate_downloads_feed.main(), refresh_downloads_index()),
+        "stats": lambda: update_dashboard_stats.main(catalog),
+        "recent": lambda: generate_recent_files.main(catalog),
+        "search": lambda: build_search_index.main(catalog),
+        "indexes": lambda: generate_directory_indexes.main([], only=plan.pages),
+        "inline": build_dashboard_inline_data.main,
+    }
+    timings = []
+    recorded = {}
+    for name in plan.producers:
+        step_started = time.perf_counter()
+        status = "ran"
+        with metrics.collect(name) as recorder:
+            try:
+                steps[name]()
+            except Exception as error:  # noqa: BLE001
+                print(f"[{name}] failed — {error}")
+                status = "failed"
+        seconds = time.perf_counter() - step_started
+        timings.append(f"{name} {seconds:.2f}s")
+        recorded[name] = {"status": status, "seconds": round(seconds, 3), **recorder.as_dict()}
+    elapsed = time.perf_counter() - started
+    print(f"[refresh] {len(plan.dirs)} folder(s) changed -> {', '.join(timings)} ({elapsed:.2f}s)")
+    metrics.record_run(recorded, seconds=elapsed, source="daemon", path=METRICS_PATH)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Watch LifeHub and ~/Downloads and refresh affected feeds.")
+    parser.add_argument("--poll", action="store_true", help="Use mtime polling even where inotify is available")
+    parser.add_argument("--interval", type=float, default=2.0, help="Polling interval in seconds (default: 2)")
+    parser.add_argument(
+        "--quiet",
+        type=float,
+        default=1.5,
+        help="Seconds without new events before a burst is processed (default: 1.5)",
+    )
+    parser.add_argument(
+        "--max-wait",
+        type=float,
+        default=15.0,
+        help="Longest a steady stream of events may delay a refresh (default: 15)",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    catalog = open_catalog(ROOT)
+    roots = [ROOT / area for area in WATCHED_AREAS] + [DOWNLOADS_DIR]
+    watcher = open_watcher(roots, ignore=is_generated, polling=args.poll, interval=args.interval)
+    print(f"Watching {', '.join(WATCHED_AREAS)} and {DOWNLOADS_DIR} ({type(watcher).__name__})")
+    try:
+        while True:
+            plan = plan_refresh(coalesce(watcher, quiet=args.quiet, max_wait=args.max_wait))
+            if plan.producers:
+                run_plan(plan, catalog)
+    except KeyboardInterrupt:
+        print("\nStopping refresh daemon.")
+    finally:
+        watcher.close()
+        catalog.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -6,10 +6,10 @@ ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
 DOWNLOADS_DIR="${HOME}/Downloads"
 
 echo "[LifeHub] Updating local directory indexes..."
-python3 "${ROOT_DIR}/scripts/generate_directory_indexes.py"
+python3 "${ROOT_DIR}/scripts/generate_directory_indexes.py" --jobs 0
 
 echo "[Downloads] Updating pretty index..."
-python3 "${ROOT_DIR}/scripts/generate_directory_indexes.py" --path "${DOWNLOADS_DIR}" --max-depth 1
+python3 "${ROOT_DIR}/scripts/generate_directory_indexes.py" --path "${DOWNLOADS_DIR}" --max-depth 1 --jobs 0
 
 if [[ -f "${ROOT_DIR}/directory.css" ]]; then
   cp "${ROOT_DIR}/directory.css" "${DOWNLOADS_DIR}/directory.css"
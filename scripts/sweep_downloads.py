@@ -2,9 +2,16 @@
 """Move files from ~/Downloads into LifeHub/Inbox, skipping installer artifacts."""
 from __future__ import annotations
 
-import shutil
+import argparse
 from pathlib import Path
+from typing import List, Optional, Set, Tuple
 
+from lib.catalog import Catalog
+from lib.dedup import ON_DUPLICATE, HashIndex, find_existing_copy, link_duplicate
+from lib.moves import move_path
+from lib.parallel import ordered_map
+
+ROOT = Path(__file__).resolve().parents[1]
 DOWNLOADS = Path.home() / "Downloads"
 LIFEHUB = Path.home() / "LifeHub"
 DEST = LIFEHUB / "Inbox"
@@ -19,32 +26,105 @@ def should_skip(path: Path) -> bool:
     return False
 
 
-def move_item(path: Path) -> None:
+def unique_target(path: Path, reserved: Set[Path]) -> Path:
+    """Pick a free Inbox name, also avoiding names claimed by moves still in flight."""
     target = DEST / path.name
     counter = 1
-    while target.exists():
+    while target in reserved or target.exists():
         target = DEST / f"{path.stem} ({counter}){path.suffix}"
         counter += 1
-    if path.is_dir():
-        shutil.move(str(path), target)
-    else:
-        target.write_bytes(path.read_bytes())
-        path.unlink()
-    print(f"Moved {path} -> {target}")
+    reserved.add(target)
+    return target
+
+
+def plan_item(
+    path: Path,
+    reserved: Set[Path],
+    on_duplicate: str = "skip",
+    index: Optional[HashIndex] = None,
+    catalog: Optional[Catalog] = None,
+) -> Tuple[str, Optional[Path]]:
+    """Decide what happens to ``path``: ``("move", target)``, ``("linked", target)`` or ``("skipped", None)``."""
+    if on_duplicate != "keep" and index is not None and path.is_file():
+        existing = find_existing_copy(path, index, folders=[DEST], catalog=catalog, exclude=[DOWNLOADS], root=LIFEHUB)
+        if existing is not None:
+            if on_duplicate == "link":
+                target = unique_target(path, reserved)
+                if link_duplicate(existing, target):
+                    path.unlink()
+                    print(f"Linked {path} -> {target} (identical to {existing})")
+                    return "linked", target
+                return "move", target
+            print(f"Skipped {path}: identical to {existing}")
+            return "skipped", None
+    return "move", unique_target(path, reserved)
+
+
+def move_item(job: Tuple[Path, Path]) -> Optional[str]:
+    """Move one planned item; returns an error message instead of raising."""
+    path, target = job
+    try:
+        method = move_path(path, target)
+    except OSError as error:
+        return f"Failed to move {path}: {error}"
+    print(f"Moved {path} -> {target}" + (" (copied across filesystems)" if method == "copy" else ""))
+    return None
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Sweep ~/Downloads into LifeHub/Inbox.")
+    parser.add_argument(
+        "--on-duplicate",
+        choices=ON_DUPLICATE,
+        default="skip",
+        help="What to do with a download identical to a file already in LifeHub (default: skip)",
+    )
+    parser.add_argument(
+        "--parallel",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Move up to N items at once (helps with many small files or a slow destination disk)",
+    )
+    return parser.parse_args()
 
 
 def main() -> None:
+    args = parse_args()
     DEST.mkdir(parents=True, exist_ok=True)
     if not DOWNLOADS.exists():
         print("Downloads folder missing; nothing to do.")
         return
-    moved = 0
-    for item in DOWNLOADS.iterdir():
-        if should_skip(item):
-            continue
-        move_item(item)
-        moved += 1
-    print(f"Swept {moved} item(s) into {DEST}")
+    index = HashIndex() if args.on_duplicate != "keep" else None
+    # The catalog only describes this checkout, so it is consulted only when
+    # ~/LifeHub is that checkout.
+    catalog = Catalog(ROOT) if index is not None and LIFEHUB.resolve() == ROOT else None
+    reserved: Set[Path] = set()
+    jobs: List[Tuple[Path, Path]] = []
+    linked = skipped = 0
+    try:
+        for item in DOWNLOADS.iterdir():
+            if should_skip(item):
+                continue
+            action, target = plan_item(item, reserved, args.on_duplicate, index, catalog)
+            if action == "move" and target is not None:
+                jobs.append((item, target))
+            elif action == "linked":
+                linked += 1
+            else:
+                skipped += 1
+    finally:
+        if index is not None:
+            index.close()
+        if catalog is not None:
+            catalog.close()
+    failures = [error for error in ordered_map(move_item, jobs, workers=args.parallel) if error]
+    for error in failures:
+        print(error)
+    moved = len(jobs) - len(failures) + linked
+    print(f"Swept {moved} item(s) into {DEST}; left {skipped} duplicate(s) in place")
+    if failures:
+        raise SystemExit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,194 @@
+from pathlib import Path
+import importlib.util
+import os
+import sys
+import time
+
+
+def load_server_module():
+    repo_root = Path(__file__).resolve().parents[2]
+    script_path = repo_root / "automation" / "automation_server.py"
+    spec = importlib.util.spec_from_file_location("automation_server", script_path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_run_tasks_runs_independent_tasks_concurrently_and_respects_dependencies(tmp_path):
+    server = load_server_module()
+    allowed = server.CommandAllowlist(
+        [
+            server.AllowedCommand("sleep 0.4"),
+            server.AllowedCommand("echo", allow_arguments=True),
+            server.AllowedCommand("false"),
+        ]
+    )
+    tasks = [
+        {"id": "sweep", "command": "sleep 0.4"},
+        {"id": "recent", "command": "sleep 0.4"},
+        {"id": "stats", "command": "echo stats", "dependsOn": ["sweep", "not-in-batch"]},
+        {"id": "broken", "command": "false"},
+        {"id": "after-broken", "command": "echo never", "dependsOn": "broken"},
+        {"id": "rogue", "command": "rm -rf /"},
+    ]
+
+    started = time.monotonic()
+    runs = server.run_tasks(tasks, tmp_path, allowed)
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 0.75  # the two sleeps overlapped
+    assert [run["id"] for run in runs] == [task["id"] for task in tasks]
+    by_id = {run["id"]: run for run in runs}
+    assert by_id["stats"]["stdout"] == "stats\n"
+    assert by_id["stats"]["startedAt"] >= by_id["sweep"]["finishedAt"]
+    assert by_id["after-broken"]["exitCode"] == 125
+    assert by_id["rogue"]["exitCode"] == 126
+
+
+def test_run_tasks_skips_dependency_cycles(tmp_path):
+    server = load_server_module()
+    allowed = server.CommandAllowlist([server.AllowedCommand("echo", allow_arguments=True)])
+    tasks = [
+        {"id": "a", "command": "echo a", "dependsOn": ["b"]},
+        {"id": "b", "command": "echo b", "dependsOn": ["a"]},
+        {"id": "c", "command": "echo c"},
+    ]
+    runs = server.run_tasks(tasks, tmp_path, allowed)
+    assert [run["exitCode"] for run in runs] == [125, 125, 0]
+
+
+def test_jobs_record_streamed_output_and_finish_in_background(tmp_path):
+    server = load_server_module()
+    server.RUN_LOG = server.RunLog(tmp_path / "logs")
+    allowed = server.CommandAllowlist([server.AllowedCommand("printf", allow_arguments=True)])
+    job = server.start_job([{"command": "printf 'one\\ntwo\\n'"}], tmp_path, allowed)
+    assert server.get_job(job.id) is job
+
+    seen, seq, finished = [], 0, False
+    deadline = time.monotonic() + 5
+    while not finished and time.monotonic() < deadline:
+        events, finished = job.events_after(seq, 1)
+        if events:
+            seq = events[-1][0]
+            seen.extend(events)
+
+    kinds = [kind for _, kind, _ in seen]
+    assert kinds[0] == "status" and kinds[-1] == "done"
+    assert [data["text"] for _, kind, data in seen if kind == "output"] == ["one\n", "two\n"]
+    summary = job.summary()
+    assert summary["status"] == "done"
+    assert summary["tasks"][0]["id"] == "task-0" and summary["tasks"][0]["status"] == "done"
+    assert summary["runs"][0]["stdout"] == "one\ntwo\n"
+    logged = server.RUN_LOG.query(limit=5)
+    assert [run["jobId"] for run in logged] == [job.id]
+
+
+def test_output_tail_keeps_only_the_end():
+    server = load_server_module()
+    tail = server.OutputTail(limit=10)
+    for line in ("aaaa\n", "bbbb\n", "cccc\n"):
+        tail.add(line)
+    assert tail.text().endswith("bbbb\ncccc\n")
+    assert "5 earlier characters omitted" in tail.text()
+
+
+def test_allowlist_matches_like_linear_scan_and_reloads_on_change(tmp_path):
+    server = load_server_module()
+    entries = [
+        server.AllowedCommand("python3 scripts/a.py"),
+        server.AllowedCommand("python3 scripts/move.py", allow_arguments=True),
+        server.AllowedCommand("python3 scripts/move.py --dry-run"),
+    ]
+    allowlist = server.CommandAllowlist(entries)
+    for candidate in [
+        "python3 scripts/a.py",
+        " python3 scripts/a.py ",
+        "python3 scripts/a.py --x",
+        "python3 scripts/move.py",
+        "python3 scripts/move.py Downloads/x.pdf",
+        "python3 scripts/move.pyc",
+        "python3 scripts/mo",
+        "python3",
+    ]:
+        assert allowlist.matches(candidate) == any(entry.matches(candidate) for entry in entries), candidate
+
+    path = tmp_path / "allowed_commands.json"
+    path.write_text('["echo hi"]')
+    source = server.AllowlistFile(path)
+    assert source.current().matches("echo hi")
+    path.write_text('[{"command": "echo", "allowArguments": true}, "ls"]')
+    os.utime(path, ns=(1, 1))
+    assert source.current().matches("echo anything") and len(source.current()) == 2
+    path.write_text("[{broken")
+    os.utime(path, ns=(2, 2))
+    assert source.current().matches("ls")  # keeps the last good list
+
+
+def test_python_scripts_run_in_warm_workers_with_captured_output(tmp_path):
+    server = load_server_module()
+    repo_root = Path(server.ROOT)
+    try:
+        help_run = server.execute_task({"id": "help", "command": "python3 scripts/dedup.py --help"}, repo_root)
+        bad_run = server.execute_task({"id": "bad", "command": "python3 scripts/dedup.py bogus"}, repo_root)
+        # runner.py has no main(), so it falls back to a real interpreter.
+        shell_run = server.execute_task({"id": "shell", "command": "python3 scripts/runner.py"}, repo_root)
+        assert server.SCRIPT_POOL is not None
+    finally:
+        if server.SCRIPT_POOL is not None:
+            server.SCRIPT_POOL.shutdown()
+    assert help_run["exitCode"] == 0 and help_run["stdout"].startswith("usage:")
+    assert bad_run["exitCode"] == 2 and "invalid choice" in bad_run["stderr"]
+    assert shell_run["exitCode"] == 1 and shell_run["stdout"].startswith("Usage: runner.py")
+
+
+def test_worker_output_streams_while_running_and_a_crash_is_not_rerun(tmp_path):
+    server = load_server_module()
+    release = tmp_path / "release"
+    script = tmp_path / "slow.py"
+    script.write_text(
+        "import os, time\n"
+        "from pathlib import Path\n"
+        "def main():\n"
+        "    print('first', flush=True)\n"
+        f"    while not Path({str(release)!r}).exists():\n"
+        "        time.sleep(0.01)\n"
+        "    print('second')\n"
+        f"    if Path({str(tmp_path / 'crash')!r}).exists():\n"
+        "        os._exit(3)\n"
+    )
+    lines = []
+
+    def emit(kind, data):
+        lines.append(data["text"])
+        release.touch()  # only possible if "first" arrives before the script ends
+
+    try:
+        outcome = server.run_in_worker(script, [], tmp_path, "slow", emit)
+        assert outcome == (0, "first\nsecond\n", "")
+        assert lines == ["first\n", "second\n"]
+
+        release.unlink()
+        lines.clear()
+        (tmp_path / "crash").touch()
+        code, stdout, stderr = server.run_in_worker(script, [], tmp_path, "crash", emit)
+        assert code == 1 and stdout == "first\nsecond\n" and "not retried" in stderr
+    finally:
+        if server.SCRIPT_POOL is not None:
+            server.SCRIPT_POOL.shutdown()
+
+
+def test_shipped_python_commands_resolve_to_scripts_for_the_warm_pool():
+    server = load_server_module()
+    allowlist = server.ALLOWLIST.current()  # automation/allowed_commands.json
+    plain = [command for command in allowlist.commands if command.startswith("python3 ") and "&&" not in command]
+    assert plain
+    for command in plain:
+        script, args = server.parse_script_command(command, server.ROOT)
+        assert script.is_file() and args == [], command
+
+    # The dashboard's move commands append arguments to an allowArguments entry.
+    command = "python3 scripts/move_inbox_item.py --source-b64 SW5ib3gvYS50eHQ= --destination Finance"
+    assert allowlist.matches(command)
+    script, args = server.parse_script_command(command, server.ROOT)
+    assert script.name == "move_inbox_item.py" and args[0] == "--source-b64"
@@ -0,0 +1,75 @@
+from pathlib import Path
+import io
+import os
+import random
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from lib import backup_repo  # noqa: E402
+
+
+def test_chunk_boundaries_follow_content():
+    rng = random.Random(7)
+    data = bytes(rng.getrandbits(8) for _ in range(3 * 1024 * 1024))
+    chunks = list(backup_repo.iter_chunks(io.BytesIO(data)))
+    assert b"".join(chunks) == data
+    assert all(len(chunk) <= backup_repo.MAX_CHUNK for chunk in chunks)
+
+    # Inserting bytes at the front only changes the chunks around the edit.
+    shifted = list(backup_repo.iter_chunks(io.BytesIO(b"prefix!" + data)))
+    assert set(chunks[1:]) <= set(shifted)
+
+
+def test_chunking_resists_shifts_in_text_and_structured_data():
+    rng = random.Random(11)
+    words = ["invoice", "total", "paid", "due", "LifeHub", "amount", "note", "account"]
+    lines = [
+        f"{number:07d},{rng.choice(words)},{rng.randrange(10**6)},{' '.join(rng.choices(words, k=4))}\n"
+        for number in range(160_000)
+    ]
+    data = "".join(lines).encode()
+    chunks = list(backup_repo.iter_chunks(io.BytesIO(data)))
+    assert b"".join(chunks) == data
+    # Cut by content, not by falling back to MAX_CHUNK slices.
+    assert len(chunks) > 2 * len(data) // backup_repo.MAX_CHUNK
+    assert max(len(chunk) for chunk in chunks[:-1]) < backup_repo.MAX_CHUNK
+
+    edited = list(backup_repo.iter_chunks(io.BytesIO(b"0000000,header,1,inserted line\n" + data)))
+    assert len(set(chunks) - set(edited)) <= 1
+
+    # Runs of one byte value never match, so zero-filled data still splits at MAX_CHUNK into identical chunks.
+    zeros = list(backup_repo.iter_chunks(io.BytesIO(bytes(3 * backup_repo.MAX_CHUNK))))
+    assert len(set(zeros)) == 1 and len(zeros) == 3
+
+
+def test_snapshot_restore_verify_roundtrip(tmp_path):
+    source = tmp_path / "LifeHub"
+    (source / "Finance").mkdir(parents=True)
+    (source / "Media").mkdir()
+    (source / "Finance" / "bill.pdf").write_bytes(b"invoice" * 1000)
+    (source / "Media" / "song.mp3").write_bytes(os.urandom(600_000))
+    (source / "Media" / "copy.mp3").write_bytes((source / "Media" / "song.mp3").read_bytes())
+    store = backup_repo.ChunkStore(tmp_path / "repo")
+
+    first = backup_repo.create_snapshot(store, source)
+    assert first["stats"]["read"] == 3
+    chunk_count = sum(1 for path in store.chunks_dir.rglob("*") if path.is_file())
+
+    (source / "Finance" / "bill.pdf").write_bytes(b"invoice v2")
+    second = backup_repo.create_snapshot(store, source)
+    assert second["parent"] == first["id"]
+    assert second["stats"]["reused"] == 2 and second["stats"]["read"] == 1
+    assert sum(1 for path in store.chunks_dir.rglob("*") if path.is_file()) == chunk_count + 1
+
+    restored = tmp_path / "restored"
+    assert backup_repo.restore_snapshot(store, store.load_snapshot(first["id"]), restored) == 3
+    assert (restored / "Finance" / "bill.pdf").read_bytes() == b"invoice" * 1000
+    assert (restored / "Media" / "copy.mp3").read_bytes() == (source / "Media" / "song.mp3").read_bytes()
+    assert (restored / "Media" / "song.mp3").stat().st_mtime_ns == (source / "Media" / "song.mp3").stat().st_mtime_ns
+
+    assert backup_repo.verify_snapshot(store, second, read_data=True) == []
+    victim = store.chunk_path(second["files"][0]["chunks"][0])
+    victim.write_bytes(victim.read_bytes()[:-1] + b"!")
+    assert backup_repo.verify_snapshot(store, second) == []
+    assert backup_repo.verify_snapshot(store, second, read_data=True)
@@ -0,0 +1,58 @@
+from pathlib import Path
+import os
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from lib.backup_repo import walk_tree  # noqa: E402
+from lib.backup_targets import PathRules, copies_files, load_backup_targets, plan_backup  # noqa: E402
+
+
+def test_path_rules_follow_gitignore_conventions():
+    rules = PathRules(exclude=["**/index.html", "/search-index/", "*.tmp"])
+    assert not rules.wants_file("index.html")
+    assert not rules.wants_file("Finance/2025/index.html")
+    assert not rules.wants_file("Work/draft.tmp")
+    assert rules.wants_file("Finance/bill.pdf")
+    assert rules.skip_dir("search-index")
+    assert not rules.skip_dir("Work/search-index")
+    assert rules.skip_dir("Projects/app/node_modules")  # built-in exclude
+    assert rules.skip_dir("backups") and not rules.skip_dir("Finance/backups")
+
+    only_finance = PathRules(include=["Finance/", "*.md"])
+    assert only_finance.wants_file("Finance/2025/tax.pdf")
+    assert only_finance.wants_file("Work/notes.md")
+    assert not only_finance.wants_file("Work/photo.jpg")
+
+
+def test_plan_counts_only_wanted_and_changed_files(tmp_path):
+    (tmp_path / "Finance").mkdir()
+    (tmp_path / "Media" / "node_modules").mkdir(parents=True)
+    (tmp_path / "Finance" / "bill.pdf").write_bytes(b"x" * 300)
+    (tmp_path / "Finance" / "index.html").write_bytes(b"x" * 50)
+    (tmp_path / "Media" / "song.mp3").write_bytes(b"x" * 1000)
+    (tmp_path / "Media" / "node_modules" / "dep.js").write_bytes(b"x" * 70)
+    rules = PathRules(exclude=["**/index.html"])
+
+    plan = plan_backup(walk_tree(tmp_path, rules=rules))
+    assert (plan["files"], plan["bytes"]) == (2, 1300)
+    assert plan["changedBytes"] == 1300
+    assert list(plan["areas"]) == ["Media", "Finance"]
+
+    song = os.stat(tmp_path / "Media" / "song.mp3")
+    previous = {"Media/song.mp3": (song.st_size, song.st_mtime_ns, song.st_ino)}
+    plan = plan_backup(walk_tree(tmp_path, rules=rules), previous=previous, throughput_mb_s=1)
+    assert (plan["changedFiles"], plan["changedBytes"]) == (1, 300)
+    assert plan["estimatedSeconds"] == 0.0
+
+
+def test_targets_share_default_excludes_and_only_file_targets_are_planned():
+    rules = PathRules.from_target({"id": "snap", "mode": "incremental", "exclude": ["*.tmp"]})
+    for generated in ("index.html", "Media/index-3.html", "Media/index-listing.js", "search-index.json"):
+        assert not rules.wants_file(generated), generated
+    assert rules.skip_dir("Downloads") and not rules.wants_file("Work/draft.tmp")
+    assert rules.wants_file("Finance/bill.pdf")
+
+    targets = load_backup_targets(Path(__file__).resolve().parents[2] / "automation" / "backups" / "targets.json")
+    assert [target["id"] for target in targets if copies_files(target)] == ["lifehub-snapshots"]
+    assert not any("exclude" in target for target in targets if not copies_files(target))
@@ -0,0 +1,112 @@
+from pathlib import Path
+import os
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from lib import catalog as catalog_module  # noqa: E402
+from lib.scanner import scan_tree  # noqa: E402
+
+
+def make_tree(root: Path) -> None:
+    (root / "Finance" / "2025").mkdir(parents=True)
+    (root / "Finance" / "Library").mkdir()
+    (root / "Inbox").mkdir()
+    (root / "Finance" / "invoice.pdf").write_bytes(b"12345")
+    (root / "Finance" / "2025" / "tax.txt").write_bytes(b"123")
+    (root / "Finance" / "Library" / "cache.db").write_bytes(b"1")
+    (root / "Inbox" / "note.md").write_text("hello")
+    (root / "README.md").write_text("top")
+
+
+def age_tree(root: Path, seconds: float = 60) -> None:
+    """Push mtimes back so folders fall outside the racy window."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        for name in dirnames + filenames + [""]:
+            path = os.path.join(dirpath, name) if name else dirpath
+            stat = os.stat(path)
+            os.utime(path, (stat.st_atime - seconds, stat.st_mtime - seconds))
+
+
+def test_catalog_matches_scan(tmp_path):
+    tree = tmp_path / "tree"
+    tree.mkdir()
+    make_tree(tree)
+    catalog = catalog_module.open_catalog(tree, db_path=tmp_path / "catalog.sqlite")
+    snapshot = scan_tree(tree)
+
+    assert sorted(catalog.records, key=lambda r: r.path) == sorted(snapshot.records, key=lambda r: r.path)
+    for base in ("", "Finance", "Inbox"):
+        assert catalog.count_files(base, {"Library"}) == snapshot.count_files(base, {"Library"})
+        assert catalog.total_size(base, {"Library"}) == snapshot.total_size(base, {"Library"})
+    assert [r.path for r in catalog.iter_files("Inbox")] == ["Inbox/note.md"]
+
+
+def test_catalog_refresh_only_relists_changed_folders(tmp_path):
+    tree = tmp_path / "tree"
+    tree.mkdir()
+    make_tree(tree)
+    age_tree(tree)
+    db_path = tmp_path / "catalog.sqlite"
+    catalog_module.open_catalog(tree, db_path=db_path).close()
+
+    catalog = catalog_module.Catalog(tree, db_path)
+    quiet = catalog.refresh()
+    assert quiet["dirsListed"] == 0
+    assert quiet["inserted"] == quiet["updated"] == quiet["deleted"] == 0
+
+    # Rewritten in place: no folder mtime moves, so only a refresh that re-stats files sees it.
+    (tree / "Finance" / "2025" / "tax.txt").write_text("twenty-three bytes long")
+    assert catalog.refresh()["updated"] == 0
+    edited = catalog.refresh(restat=True)
+    assert edited["dirsListed"] == 0 and edited["updated"] == 1
+    assert [r.size for r in catalog.iter_files("Finance/2025")] == [23]
+
+    (tree / "Inbox" / "note.md").unlink()
+    (tree / "Inbox" / "new.txt").write_text("fresh")
+    counts = catalog.refresh()
+    assert counts["dirsListed"] == 1
+    assert counts["inserted"] == 1 and counts["deleted"] == 1
+    assert [r.path for r in catalog.iter_files("Inbox")] == ["Inbox/new.txt"]
+
+
+def test_catalog_refresh_dirs_relists_named_folders_only(tmp_path):
+    tree = tmp_path / "tree"
+    tree.mkdir()
+    make_tree(tree)
+    age_tree(tree)
+    catalog = catalog_module.open_catalog(tree, db_path=tmp_path / "catalog.sqlite")
+
+    # Rewritten in place: the folder mtime does not move, so a plain refresh misses it.
+    (tree / "Inbox" / "note.md").write_text("hello, longer")
+    (tree / "Finance" / "2025" / "late.txt").write_text("x")
+    counts = catalog.refresh(dirs=["Inbox"])
+    assert counts["dirsChecked"] == 1 and counts["updated"] == 1
+    assert [r.size for r in catalog.iter_files("Inbox")] == [13]
+    assert [r.path for r in catalog.iter_files("Finance/2025")] == ["Finance/2025/tax.txt"]
+
+
+def test_quiet_refresh_stats_folders_only_until_the_restat_interval(tmp_path, monkeypatch):
+    tree = tmp_path / "tree"
+    tree.mkdir()
+    make_tree(tree)
+    age_tree(tree)
+    catalog = catalog_module.open_catalog(tree, db_path=tmp_path / "catalog.sqlite")
+    stats = []
+    real_stat = os.stat
+
+    def counting_stat(path, *args, **kwargs):
+        stats.append(path)
+        return real_stat(path, *args, **kwargs)
+
+    monkeypatch.setattr(catalog_module.os, "stat", counting_stat)
+    quiet = catalog.refresh()
+    assert quiet["dirsListed"] == quiet["filesChecked"] == 0
+    assert len(stats) == quiet["dirsChecked"] == len(list(catalog.iter_dirs())) + 1  # folders and the root
+
+    stats.clear()
+    (tree / "Inbox" / "note.md").write_text("hello, longer")
+    monkeypatch.setattr(catalog_module, "RESTAT_INTERVAL_SECONDS", 0.0)
+    due = catalog.refresh()
+    assert due["filesChecked"] == len(list(catalog.iter_files())) and due["updated"] == 1
+    assert len(stats) == due["dirsChecked"] + due["filesChecked"]
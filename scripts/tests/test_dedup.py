@@ -0,0 +1,66 @@
+from pathlib import Path
+import os
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from lib import dedup  # noqa: E402
+
+
+def test_staged_hashing_finds_identical_files(tmp_path, monkeypatch):
+    calls = []
+    real_full_hash = dedup.full_hash
+    monkeypatch.setattr(dedup, "full_hash", lambda path: calls.append(Path(path).name) or real_full_hash(path))
+
+    body = os.urandom(3 * dedup.PARTIAL_BYTES)
+    (tmp_path / "a.bin").write_bytes(body)
+    (tmp_path / "b.bin").write_bytes(body)
+    # Same size and same head/tail, different middle: only the full hash tells them apart.
+    (tmp_path / "c.bin").write_bytes(body[: dedup.PARTIAL_BYTES] + b"x" * dedup.PARTIAL_BYTES + body[-dedup.PARTIAL_BYTES :])
+    # Same size, different head: rejected by the partial hash.
+    (tmp_path / "d.bin").write_bytes(b"y" + body[1:])
+    os.link(tmp_path / "a.bin", tmp_path / "a-link.bin")
+
+    with dedup.HashIndex(tmp_path / "dedup.sqlite") as index:
+        groups = list(index.duplicate_groups([sorted(tmp_path.glob("*.bin"))]))
+        assert len(groups) == 1
+        assert {path.name for path in groups[0]} in ({"a.bin", "b.bin"}, {"a-link.bin", "b.bin"})
+        assert "d.bin" not in calls
+
+        calls.clear()
+        assert index.find_duplicate(tmp_path / "b.bin", [tmp_path / "c.bin", tmp_path / "a.bin"]) == tmp_path / "a.bin"
+        assert "b.bin" not in calls and "c.bin" not in calls  # reused from the index
+        assert index.find_duplicate(tmp_path / "a.bin", [tmp_path / "a-link.bin"]) is None
+
+
+def test_find_existing_copy_respects_exclude(tmp_path):
+    inbox = tmp_path / "Inbox"
+    finance = tmp_path / "Finance"
+    inbox.mkdir()
+    finance.mkdir()
+    (inbox / "bill.pdf").write_bytes(b"invoice 42")
+    (inbox / "bill (1).pdf").write_bytes(b"invoice 42")
+
+    with dedup.HashIndex(tmp_path / "dedup.sqlite") as index:
+        source = inbox / "bill.pdf"
+        assert dedup.find_existing_copy(source, index, folders=[inbox, finance], exclude=[inbox]) is None
+        (finance / "bill-2025.pdf").write_bytes(b"invoice 42")
+        assert dedup.find_existing_copy(source, index, folders=[finance]) == finance / "bill-2025.pdf"
+
+
+def test_hashed_sources_outside_root_are_not_existing_copies(tmp_path):
+    downloads = tmp_path / "Downloads"
+    lifehub = tmp_path / "LifeHub"
+    inbox = lifehub / "Inbox"
+    downloads.mkdir()
+    inbox.mkdir(parents=True)
+    (downloads / "report.pdf").write_bytes(b"quarterly report")
+    (downloads / "report (1).pdf").write_bytes(b"quarterly report")
+    (inbox / "other.pdf").write_bytes(b"something else!!")
+
+    with dedup.HashIndex(tmp_path / "dedup.sqlite") as index:
+        lookup = dict(folders=[inbox], exclude=[downloads], root=lifehub)
+        assert dedup.find_existing_copy(downloads / "report (1).pdf", index, **lookup) is None
+        # The first lookup hashed the Downloads file; it must not turn up as a LifeHub copy.
+        assert downloads / "report (1).pdf" in index.paths_with_size(16)
+        assert dedup.find_existing_copy(downloads / "report.pdf", index, folders=[inbox], root=lifehub) is None
@@ -0,0 +1,170 @@
+from pathlib import Path
+import json
+import os
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import generate_directory_indexes  # noqa: E402
+from lib import scanner, thumbnails  # noqa: E402
+
+
+def build_tree(root: Path) -> None:
+    deep = root / "Media" / "Photos" / "2024" / "Trip"
+    deep.mkdir(parents=True)
+    (deep / "beach.jpg").write_bytes(b"jpg")
+    (root / "Media" / "notes.txt").write_text("notes")
+    (root / "Finance").mkdir()
+    (root / "Finance" / "budget.csv").write_text("a,b")
+
+
+def page_mtimes(root: Path) -> dict:
+    return {page.relative_to(root).as_posix(): page.stat().st_mtime_ns for page in root.rglob("index.html")}
+
+
+def test_pages_stop_at_max_depth_and_skip_unchanged(tmp_path, capsys):
+    build_tree(tmp_path)
+    generate_directory_indexes.main(["--path", str(tmp_path), "--max-depth", "2"])
+    first = page_mtimes(tmp_path)
+    assert set(first) == {"index.html", "Media/index.html", "Media/Photos/index.html", "Finance/index.html"}
+
+    capsys.readouterr()
+    generate_directory_indexes.main(["--path", str(tmp_path), "--max-depth", "2"])
+    assert page_mtimes(tmp_path) == first
+    assert "4 index page(s)" in capsys.readouterr().out
+
+    # A new file in Finance changes Finance's page and its card on the root page only.
+    (tmp_path / "Finance" / "taxes.pdf").write_bytes(b"pdf")
+    os.utime(tmp_path / "Finance", ns=(1, 1))
+    generate_directory_indexes.main(["--path", str(tmp_path), "--max-depth", "2"])
+    changed = {name for name, mtime in page_mtimes(tmp_path).items() if mtime != first[name]}
+    assert changed == {"index.html", "Finance/index.html"}
+    assert "taxes.pdf" in (tmp_path / "Finance" / "index.html").read_text()
+
+    generate_directory_indexes.main(["--path", str(tmp_path), "--max-depth", "2", "--force"])
+    assert all(mtime != first[name] for name, mtime in page_mtimes(tmp_path).items() if name != "Finance/index.html")
+
+
+def test_worker_pool_renders_the_same_pages(tmp_path):
+    build_tree(tmp_path)
+
+    def pages():
+        return {page: page.read_text().split("<footer>")[0] for page in tmp_path.rglob("index.html")}
+
+    generate_directory_indexes.main(["--path", str(tmp_path), "--jobs", "1"])
+    serial = pages()
+    generate_directory_indexes.main(["--path", str(tmp_path), "--jobs", "2", "--force"])
+    assert len(serial) == 5
+    assert pages() == serial
+
+
+def test_big_folders_are_paginated_with_a_listing_sidecar(tmp_path):
+    big = tmp_path / "Big"
+    big.mkdir()
+    for number in range(7):
+        (big / f"file-{number}.txt").write_text("x" * number)
+    args = ["--path", str(tmp_path), "--page-size", "3"]
+
+    generate_directory_indexes.main(args)
+    pages = sorted(page.name for page in big.glob("index*"))
+    assert pages == ["index-2.html", "index-3.html", "index-listing.js", "index.html"]
+    last = (big / "index-3.html").read_text()
+    assert "file-6.txt" in last and "file-0.txt" not in last
+    assert "Page 3 of 3" in last and 'data-first-row="6"' in last
+    listing = (big / "index-listing.js").read_text()
+    assert listing.startswith("window.LIFEHUB_LISTING = ")
+    rows = json.loads(listing.split("=", 1)[1].rstrip(";\n"))["rows"]
+    assert [row[:2] for row in rows] == [[f"file-{number}.txt", number] for number in range(7)]
+    assert "index-listing.js" not in (tmp_path / "index.html").read_text()
+
+    for number in range(3, 7):
+        (big / f"file-{number}.txt").unlink()
+    generate_directory_indexes.main(args)
+    assert sorted(page.name for page in big.glob("index*")) == ["index.html"]
+    assert "pagination" not in (big / "index.html").read_text()
+
+
+def test_card_heroes_use_cached_thumbnails_and_orphans_are_evicted(tmp_path, monkeypatch):
+    album = tmp_path / "Media" / "Album"
+    album.mkdir(parents=True)
+    (album / "big.jpg").write_bytes(b"j" * (thumbnails.SMALL_IMAGE_BYTES + 1))
+    (tmp_path / "Media" / "small.png").write_bytes(b"png")
+
+    def fake_thumbnail(source, target, size=thumbnails.THUMB_SIZE, tool=None):
+        target.write_bytes(b"thumb")
+        return True
+
+    monkeypatch.setattr(thumbnails, "backend", lambda: "fake")
+    monkeypatch.setattr(thumbnails, "make_thumbnail", fake_thumbnail)
+    generate_directory_indexes.main(["--path", str(tmp_path)])
+    thumbs = list((tmp_path / ".thumbs").iterdir())
+    assert len(thumbs) == 1
+    media = (tmp_path / "Media" / "index.html").read_text()
+    assert f"url('../.thumbs/{thumbs[0].name}')" in media
+    assert ".thumbs" not in (tmp_path / "index.html").read_text().split("Subfolders")[1].split("<footer>")[0]
+
+    # Editing the image gives it a new thumbnail; the old one is an orphan.
+    (album / "big.jpg").write_bytes(b"k" * (thumbnails.SMALL_IMAGE_BYTES + 2))
+    generate_directory_indexes.main(["--path", str(tmp_path)])
+    (replacement,) = list((tmp_path / ".thumbs").iterdir())
+    assert replacement.name != thumbs[0].name
+    assert replacement.name in (tmp_path / "Media" / "index.html").read_text()
+
+    monkeypatch.setattr(thumbnails, "backend", lambda: None)
+    (album / "big.jpg").unlink()
+    (album / "other.jpg").write_bytes(b"o" * (thumbnails.SMALL_IMAGE_BYTES + 1))
+    generate_directory_indexes.main(["--path", str(tmp_path)])
+    assert list((tmp_path / ".thumbs").iterdir()) == []
+    assert "url('Album/other.jpg')" in (tmp_path / "Media" / "index.html").read_text()
+
+
+def test_user_files_named_like_generated_pages_are_kept(tmp_path):
+    site = tmp_path / "Site"
+    site.mkdir()
+    (site / "index-2.html").write_text("<p>my own page</p>")
+    (site / "index-listing.js").write_text("console.log('mine');")
+    for number in range(5):
+        (site / f"page-{number}.txt").write_text("x")
+
+    generate_directory_indexes.main(["--path", str(tmp_path), "--page-size", "2"])
+    assert (site / "index-2.html").read_text() == "<p>my own page</p>"
+    assert (site / "index-listing.js").read_text() == "console.log('mine');"
+    page = (site / "index.html").read_text()
+    assert 'href="index-2.html"' in page and "page-4.txt" in page
+    assert not scanner.is_generated_page(site / "index-2.html")
+
+    # Once the user's files are gone the generator paginates, and owns (and may remove) its pages.
+    (site / "index-2.html").unlink()
+    (site / "index-listing.js").unlink()
+    generate_directory_indexes.main(["--path", str(tmp_path), "--page-size", "2"])
+    assert scanner.is_generated_page(site / "index-3.html")
+    assert scanner.is_generated_page(site / "index-listing.js")
+
+
+def test_thumbnail_decode_failures_are_not_retried_until_the_image_changes(tmp_path, monkeypatch):
+    image = tmp_path / "broken.jpg"
+    image.write_bytes(b"x" * (thumbnails.SMALL_IMAGE_BYTES + 1))
+    attempts = []
+
+    def failing_thumbnail(source, target, size=thumbnails.THUMB_SIZE, tool=None):
+        attempts.append(source)
+        return False
+
+    monkeypatch.setattr(thumbnails, "backend", lambda: "fake")
+    monkeypatch.setattr(thumbnails, "make_thumbnail", failing_thumbnail)
+
+    def ensure():
+        stat = image.stat()
+        store = thumbnails.ThumbnailStore(tmp_path)
+        result = store.ensure([thumbnails.Source(image, stat.st_size, stat.st_mtime_ns)])
+        store.evict()
+        return result
+
+    assert ensure() == {} and ensure() == {}
+    assert len(attempts) == 1
+    assert [path.suffix for path in (tmp_path / ".thumbs").iterdir()] == [thumbnails.FAILED_SUFFIX]
+
+    image.write_bytes(b"y" * (thumbnails.SMALL_IMAGE_BYTES + 2))
+    assert ensure() == {}
+    assert len(attempts) == 2
+    assert len(list((tmp_path / ".thumbs").iterdir())) == 1
@@ -0,0 +1,41 @@
+from pathlib import Path
+import sys
+
+SCRIPTS = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(SCRIPTS))
+
+from lib.inprocess import parse_script_command, run_script  # noqa: E402
+
+
+def test_parse_script_command_only_accepts_plain_script_invocations():
+    root = SCRIPTS.parent
+    assert parse_script_command("python3 scripts/dedup.py report --json", root) == (
+        SCRIPTS / "dedup.py",
+        ["report", "--json"],
+    )
+    assert parse_script_command("python3 dedup.py 'a b'", SCRIPTS) == (SCRIPTS / "dedup.py", ["a b"])
+    for command in [
+        "python3 scripts/dedup.py report && echo done",
+        "python3 scripts/dedup.py $HOME",
+        "bash scripts/start_welltory_daemon.sh",
+        "python3 scripts/tests/test_inprocess.py",
+        "python3 scripts/missing.py",
+        "python3 scripts/dedup.py 'unbalanced",
+    ]:
+        assert parse_script_command(command, root) is None, command
+
+
+def test_run_script_reports_exit_codes_and_restores_process_state(tmp_path):
+    before = (list(sys.argv), Path.cwd())
+    code, stdout, stderr = run_script(str(SCRIPTS / "dedup.py"), ["--help"], str(tmp_path))
+    assert code == 0 and "report" in stdout and stderr == ""
+    code, stdout, stderr = run_script(str(SCRIPTS / "dedup.py"), [], str(tmp_path))
+    assert code == 2 and "required" in stderr
+    assert (list(sys.argv), Path.cwd()) == before
+
+
+def test_run_script_passes_flags_to_main_and_leaves_scripts_without_main_to_the_shell(tmp_path):
+    # The flags must reach main(): a bad choice is rejected before any indexing starts.
+    code, _, stderr = run_script(str(SCRIPTS / "build_search_index.py"), ["--executor", "bogus"], str(tmp_path))
+    assert code == 2 and "invalid choice" in stderr
+    assert run_script(str(SCRIPTS / "runner.py"), ["run", "missing"], str(tmp_path)) is None
@@ -0,0 +1,52 @@
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from lib import inverted_index  # noqa: E402
+
+
+def build_sample():
+    texts = [
+        "RACV invoice for car insurance, the invoice total",
+        "Home insurance renewal notes",
+        "Tabletop campaign notes",
+    ]
+    docs, doc_terms = [], []
+    for idx, text in enumerate(texts):
+        terms, length = inverted_index.term_positions(text)
+        docs.append({"path": f"doc-{idx}.txt", "length": length})
+        doc_terms.append(terms)
+    return inverted_index.build_index(docs, doc_terms), doc_terms
+
+
+def test_postings_round_trip():
+    postings = [(0, [1, 4, 9]), (3, [0]), (10, [2, 3])]
+    encoded = inverted_index.encode_postings(postings)
+    assert encoded == [0, 3, 1, 3, 5, 3, 1, 0, 7, 2, 2, 1]
+    assert list(inverted_index.decode_postings(encoded)) == postings
+
+
+def test_index_explodes_back_to_document_terms():
+    index, doc_terms = build_sample()
+    assert index["terms"]["invoice"] == [0, 2, 1, 5]
+    assert inverted_index.explode_index(index) == doc_terms
+
+
+def test_bm25_requires_every_query_term():
+    index, _ = build_sample()
+    assert sorted(doc for doc, _ in inverted_index.bm25_search(index, "insurance")) == [0, 1]
+    assert [doc for doc, _ in inverted_index.bm25_search(index, "insurance notes")] == [1]
+    assert inverted_index.bm25_search(index, "insurance missing") == []
+
+
+def test_shard_index_splits_terms_by_prefix():
+    index, _ = build_sample()
+    shards = inverted_index.shard_index(index)
+    manifest = shards["manifest"]
+    assert manifest["docCount"] == 3
+    assert "in" in manifest["termShards"]
+    assert shards["terms-in"]["invoice"] == index["terms"]["invoice"]
+    assert shards["lengths"] == [doc["length"] for doc in index["docs"]]
+    assert shards["docs-0"][0] == {"path": "doc-0.txt"}
+    assert inverted_index.shard_key("épargne") == "u" + "ép".encode("utf-8").hex()
@@ -0,0 +1,45 @@
+from pathlib import Path
+import json
+import sys
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from lib.jsonstream import StreamedArray, StreamedObject, write_json, write_ndjson  # noqa: E402
+
+
+def test_write_json_streams_nested_generators(tmp_path):
+    target = tmp_path / "feed.json"
+    payload = {
+        "generatedAt": "2025-01-01T00:00:00+00:00",
+        "files": StreamedArray({"name": f"file-{idx}"} for idx in range(3)),
+        "terms": StreamedObject((term, [1, 2]) for term in ("a", "b")),
+    }
+    write_json(target, payload)
+    assert json.loads(target.read_text()) == {
+        "generatedAt": "2025-01-01T00:00:00+00:00",
+        "files": [{"name": "file-0"}, {"name": "file-1"}, {"name": "file-2"}],
+        "terms": {"a": [1, 2], "b": [1, 2]},
+    }
+    assert list(tmp_path.iterdir()) == [target]
+
+
+def test_failed_write_keeps_previous_file(tmp_path):
+    target = tmp_path / "feed.json"
+    write_json(target, {"ok": True})
+
+    def broken():
+        yield 1
+        raise RuntimeError("producer crashed")
+
+    with pytest.raises(RuntimeError):
+        write_json(target, StreamedArray(broken()))
+    assert json.loads(target.read_text()) == {"ok": True}
+    assert list(tmp_path.iterdir()) == [target]
+
+
+def test_write_ndjson(tmp_path):
+    target = tmp_path / "runs.ndjson"
+    assert write_ndjson(target, [{"id": 1}, {"id": 2}]) == 2
+    assert target.read_text() == '{"id":1}\n{"id":2}\n'
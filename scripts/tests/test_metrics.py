@@ -0,0 +1,52 @@
+from pathlib import Path
+import json
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from lib import metrics  # noqa: E402
+from lib.jsonstream import write_json  # noqa: E402
+
+
+@metrics.timed()
+def render():
+    metrics.count("pages", 2)
+
+
+def test_collect_scopes_timers_counters_and_writes(tmp_path):
+    outer = metrics.current()
+    with metrics.collect("step", profile=set()) as recorder:
+        with metrics.timer("scan"):
+            metrics.count("files", 3)
+        render()
+        render()
+        write_json(tmp_path / "feed.json", {"a": 1})
+    assert metrics.current() is outer
+
+    data = recorder.as_dict()
+    assert set(data["timers"]) == {"scan", "render"}
+    assert data["counters"]["files"] == 3
+    assert data["counters"]["pages"] == 4
+    assert data["counters"]["filesWritten"] == 1
+    assert data["counters"]["bytesWritten"] == (tmp_path / "feed.json").stat().st_size
+
+
+def test_profile_modes_and_memory_peak(monkeypatch):
+    monkeypatch.setenv(metrics.PROFILE_ENV, "all")
+    assert metrics.profile_modes() == {"cpu", "memory"}
+    assert metrics.profile_modes("memory, bogus") == {"memory"}
+    assert metrics.profile_modes("") == set()
+
+    with metrics.collect("alloc", profile={"memory"}) as recorder:
+        blob = bytearray(512 * 1024)
+    del blob
+    assert recorder.as_dict()["peakMemoryKiB"] >= 512
+
+
+def test_record_run_keeps_the_latest_runs(tmp_path):
+    path = tmp_path / "refresh-metrics.json"
+    for number in range(4):
+        metrics.record_run({"stats": {"status": "ran", "seconds": number}}, seconds=number, source="test", path=path, keep=3)
+    runs = json.loads(path.read_text())["runs"]
+    assert [run["seconds"] for run in runs] == [1, 2, 3]
+    assert runs[-1]["steps"]["stats"]["status"] == "ran"
@@ -0,0 +1,55 @@
+from pathlib import Path
+import errno
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from lib import moves  # noqa: E402
+
+
+def fake_cross_device(monkeypatch):
+    def rename(source, target):
+        raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+    monkeypatch.setattr(moves.os, "rename", rename)
+
+
+def test_move_path_renames_on_same_device(tmp_path):
+    source = tmp_path / "movie.mp4"
+    source.write_bytes(b"frames")
+    assert moves.move_path(source, tmp_path / "Inbox.mp4") == "rename"
+    assert not source.exists()
+    assert (tmp_path / "Inbox.mp4").read_bytes() == b"frames"
+
+
+@pytest.mark.parametrize("kernel_copy", [True, False])
+def test_move_path_copies_across_devices(tmp_path, monkeypatch, kernel_copy):
+    fake_cross_device(monkeypatch)
+    monkeypatch.setattr(moves, "COPY_CHUNK", 1000)
+    if not kernel_copy:
+        monkeypatch.delattr(moves.os, "copy_file_range", raising=False)
+        monkeypatch.setattr(moves, "_send_file", lambda *args: False)
+
+    payload = os.urandom(4321)
+    folder = tmp_path / "Album"
+    (folder / "disc1").mkdir(parents=True)
+    (folder / "disc1" / "track.flac").write_bytes(payload)
+    (folder / "cover.jpg").write_bytes(b"jpg")
+    os.utime(folder / "cover.jpg", (1_600_000_000, 1_600_000_000))
+
+    assert moves.move_path(folder, tmp_path / "Media") == "copy"
+    assert not folder.exists()
+    assert (tmp_path / "Media" / "disc1" / "track.flac").read_bytes() == payload
+    assert (tmp_path / "Media" / "cover.jpg").stat().st_mtime == 1_600_000_000
+    assert not list(tmp_path.rglob("*.partial"))
+
+
+def test_move_path_refuses_to_overwrite(tmp_path):
+    (tmp_path / "a").write_text("new")
+    (tmp_path / "b").write_text("old")
+    with pytest.raises(FileExistsError):
+        moves.move_path(tmp_path / "a", tmp_path / "b")
+    assert (tmp_path / "b").read_text() == "old"
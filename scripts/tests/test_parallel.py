@@ -0,0 +1,21 @@
+from pathlib import Path
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from lib.parallel import ordered_map  # noqa: E402
+
+
+def slow_square(value):
+    # Later items finish first so ordering has to be restored by ordered_map.
+    time.sleep(0.001 * (10 - value))
+    return value * value
+
+
+def test_ordered_map_preserves_input_order():
+    items = list(range(10))
+    expected = [value * value for value in items]
+    assert list(ordered_map(slow_square, items)) == expected
+    assert list(ordered_map(slow_square, items, workers=4, max_pending=3)) == expected
+    assert list(ordered_map(slow_square, items, workers=2, executor="process")) == expected
@@ -0,0 +1,31 @@
+from pathlib import Path
+import gzip
+import hashlib
+import io
+import os
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from lib.pgzip import HashingWriter, ParallelGzipWriter  # noqa: E402
+
+
+def test_parallel_gzip_roundtrip_and_streaming_hash():
+    payload = os.urandom(50_000) + b"LifeHub " * 40_000
+    raw = io.BytesIO()
+    sink = HashingWriter(raw)
+    with ParallelGzipWriter(sink, workers=4, block_size=16 * 1024) as gz:
+        for start in range(0, len(payload), 7_000):
+            gz.write(payload[start : start + 7_000])
+
+    data = raw.getvalue()
+    assert gzip.decompress(data) == payload
+    assert sink.hexdigest() == hashlib.sha256(data).hexdigest()
+    assert sink.bytes_written == len(data) < len(payload)
+
+
+def test_empty_stream_is_valid_gzip():
+    raw = io.BytesIO()
+    with ParallelGzipWriter(raw, workers=2):
+        pass
+    assert gzip.decompress(raw.getvalue()) == b""
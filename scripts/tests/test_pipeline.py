@@ -0,0 +1,106 @@
+import os
+from pathlib import Path
+import sys
+import textwrap
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from lib.catalog import open_catalog  # noqa: E402
+from lib.pipeline import Files, Pipeline, Step, Tree  # noqa: E402
+
+PRODUCERS = """
+from pathlib import Path
+
+OUT = Path({out!r})
+
+
+def count(snapshot):
+    (OUT / "count.txt").write_text(str(snapshot.count_files("Inbox")))
+    print("counted")
+
+
+def copy():
+    (OUT / "copy.txt").write_text((OUT / "count.txt").read_text())
+
+
+def join():
+    (OUT / "log.txt").open("a").write("join\\n")
+
+
+def broken():
+    raise RuntimeError("boom")
+"""
+
+
+def make_pipeline(tmp_path, module_name):
+    tree, out = tmp_path / "tree", tmp_path / "out"
+    (tree / "Inbox").mkdir(parents=True)
+    (tree / "Inbox" / "a.txt").write_text("a")
+    out.mkdir()
+    (tmp_path / f"{module_name}.py").write_text(textwrap.dedent(PRODUCERS.format(out=str(out))))
+    sys.path.insert(0, str(tmp_path))
+    steps = [
+        Step("count", f"{module_name}:count", [Tree("Inbox")], [out / "count.txt"], snapshot=True),
+        Step("copy", f"{module_name}:copy", [Files(out / "count.txt")], [out / "copy.txt"]),
+        Step("broken", f"{module_name}:broken"),
+        Step("join", f"{module_name}:join", [], [out / "log.txt"], after=["count", "copy", "broken"]),
+    ]
+    return tree, out, steps
+
+
+def test_pipeline_orders_skips_and_reruns_on_change(tmp_path):
+    tree, out, steps = make_pipeline(tmp_path, "pipeline_producers_seq")
+    db = tmp_path / "catalog.sqlite"
+    state = tmp_path / "state.json"
+
+    catalog = open_catalog(tree, db_path=db)
+    order = []
+    report = Pipeline(steps, catalog, state).run(on_result=lambda result: order.append(result.name))
+    assert order.index("copy") > order.index("count") and order[-1] == "join"
+    assert report.failed == ["broken"] and "boom" in report.results["broken"].error
+    assert report.results["count"].output == "counted\n"
+    assert (out / "copy.txt").read_text() == "1"
+
+    report = Pipeline(steps, catalog, state).run()
+    assert {name: result.status for name, result in report.results.items()} == {
+        "count": "skipped",
+        "copy": "skipped",
+        "broken": "failed",
+        "join": "skipped",
+    }
+    catalog.close()
+
+    (tree / "Inbox" / "b.txt").write_text("b")
+    catalog = open_catalog(tree, db_path=db)
+    report = Pipeline(steps, catalog, state).run(jobs=2)
+    catalog.close()
+    assert report.results["count"].status == report.results["copy"].status == "ran"
+    assert (out / "copy.txt").read_text() == "2"
+
+
+def test_tree_fingerprint_ignores_generated_pages_and_outputs(tmp_path):
+    tree = tmp_path / "tree"
+    (tree / "Inbox").mkdir(parents=True)
+    (tree / "Inbox" / "a.txt").write_text("a")
+    (tree / "Inbox" / "index-2.html").write_text("my own page")
+    step = Step("count", "unused:count", [Tree("")], [tree / "summary.json"], snapshot=True)
+    db = tmp_path / "catalog.sqlite"
+
+    def fingerprint():
+        catalog = open_catalog(tree, db_path=db, full=True)
+        try:
+            return Pipeline([step], catalog, tmp_path / "state.json").fingerprint(step)
+        finally:
+            catalog.close()
+
+    before = fingerprint()
+    (tree / "Inbox" / "index.html").write_text("<html>")
+    (tree / "Inbox" / "index-3.html").write_text('<meta name="lifehub-index">')
+    (tree / "summary.json").write_text("{}")
+    assert fingerprint() == before
+
+    (tree / "Inbox" / "index-2.html").write_text("my own page, edited")
+    edited = fingerprint()
+    assert edited != before
+    os.utime(tree / "Inbox" / "a.txt", (1, 1))
+    assert fingerprint() != edited
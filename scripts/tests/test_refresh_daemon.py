@@ -0,0 +1,24 @@
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import refresh_daemon  # noqa: E402
+
+
+def test_plan_refresh_runs_only_affected_producers():
+    root = refresh_daemon.ROOT
+    plan = refresh_daemon.plan_refresh([root / "Finance" / "2025"])
+    assert plan.dirs == {"Finance/2025"}
+    assert plan.pages == {root, root / "Finance", root / "Finance" / "2025"}
+    assert plan.producers == ["stats", "recent", "search", "indexes", "inline"]
+
+    downloads = refresh_daemon.plan_refresh([refresh_daemon.DOWNLOADS_DIR / "sub"])
+    assert downloads.dirs == set() and downloads.producers == ["downloads", "stats", "inline"]
+    assert refresh_daemon.plan_refresh([Path("/elsewhere")]).producers == []
+
+
+def test_generated_and_temporary_files_are_ignored():
+    assert refresh_daemon.is_generated(Path("Finance/index.html"))
+    assert refresh_daemon.is_generated(Path("Finance/.recent-files.json.abc.tmp"))
+    assert not refresh_daemon.is_generated(Path("Finance/report.tmp"))
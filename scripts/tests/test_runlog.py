@@ -0,0 +1,55 @@
+from pathlib import Path
+import json
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from lib.runlog import RunLog, read_lines_backwards  # noqa: E402
+
+
+def make_run(idx, stdout=""):
+    return {
+        "id": f"task-{idx}",
+        "command": f"echo {idx}",
+        "exitCode": idx % 2,
+        "stdout": stdout,
+        "stderr": "",
+        "finishedAt": f"2026-01-01T00:00:{idx:02d}+00:00",
+    }
+
+
+def test_append_rotates_and_stores_large_output_out_of_line(tmp_path):
+    log = RunLog(tmp_path, max_bytes=600, keep=1, inline_chars=16)
+    log.append([make_run(0, stdout="x" * 100)])
+    first = log.tail(1)[0]
+    assert first["stdout"] == "x" * 16
+    assert (tmp_path / first["stdoutFile"]).read_text() == "x" * 100
+    assert log.get(first["runId"])["stdout"] == "x" * 100
+
+    for idx in range(1, 30):
+        log.append([make_run(idx)])
+
+    assert not (tmp_path / "runs.2.ndjson").exists()
+    assert not (tmp_path / first["stdoutFile"]).exists()  # dropped with its segment
+    assert [run["id"] for run in log.tail(3)] == ["task-29", "task-28", "task-27"]
+    total = sum(1 for number in range(2) for _ in read_lines_backwards(log.segment(number)))
+    assert len(log.tail(100)) == total < 30
+
+
+def test_query_filters_and_sees_appends_from_other_writers(tmp_path):
+    log = RunLog(tmp_path)
+    log.append([make_run(idx) for idx in range(6)], job_id="job1")
+    assert [run["id"] for run in log.query(status="failed", limit=2)] == ["task-5", "task-3"]
+    assert [run["id"] for run in log.query(before="2026-01-01T00:00:02+00:00")] == ["task-1", "task-0"]
+    assert "stdout" not in log.query(limit=1)[0]
+
+    RunLog(tmp_path).append([make_run(7)])
+    assert log.query(limit=1)[0]["id"] == "task-7"
+    lines = (tmp_path / "runs.ndjson").read_text().splitlines()
+    assert json.loads(lines[0])["jobId"] == "job1"
+
+
+def test_read_lines_backwards_handles_small_blocks(tmp_path):
+    path = tmp_path / "log.ndjson"
+    path.write_bytes(b"alpha\nbeta\n\ngamma")
+    assert list(read_lines_backwards(path, block_size=3)) == [b"gamma", b"beta", b"alpha"]
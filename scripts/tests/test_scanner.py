@@ -0,0 +1,42 @@
+from pathlib import Path
+import importlib.util
+import sys
+
+
+def load_scanner_module():
+    repo_root = Path(__file__).resolve().parents[2]
+    script_path = repo_root / "scripts" / "lib" / "scanner.py"
+    spec = importlib.util.spec_from_file_location("lifehub_scanner", script_path)
+    module = importlib.util.module_from_spec(spec)
+    # dataclasses resolve their module through sys.modules
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_snapshot_counts_respect_skip_dirs(tmp_path):
+    (tmp_path / "Finance" / "Library").mkdir(parents=True)
+    (tmp_path / "Finance" / "2025").mkdir()
+    (tmp_path / "Finance" / "invoice.pdf").write_bytes(b"12345")
+    (tmp_path / "Finance" / "2025" / "tax.txt").write_bytes(b"123")
+    (tmp_path / "Finance" / "Library" / "cache.db").write_bytes(b"1")
+    (tmp_path / "node_modules").mkdir()
+    (tmp_path / "node_modules" / "pkg.js").write_text("x")
+
+    scanner = load_scanner_module()
+    snapshot = scanner.scan_tree(tmp_path)
+
+    assert snapshot.count_files("Finance") == 3
+    assert snapshot.count_files("Finance", skip_dirs={"Library"}) == 2
+    assert snapshot.total_size("Finance", skip_dirs={"Library"}) == 8
+    # node_modules is pruned during the walk itself
+    assert all(not record.path.startswith("node_modules") for record in snapshot.records)
+    areas = {record.area for record in snapshot.iter_files()}
+    assert areas == {"Finance"}
+
+
+def test_scan_tree_max_depth(tmp_path):
+    (tmp_path / "a" / "b" / "c").mkdir(parents=True)
+    scanner = load_scanner_module()
+    snapshot = scanner.scan_tree(tmp_path, max_depth=2)
+    assert sorted(record.path for record in snapshot.iter_dirs()) == ["a", "a/b"]
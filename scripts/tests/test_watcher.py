@@ -0,0 +1,44 @@
+from pathlib import Path
+import sys
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from lib.watcher import InotifyWatcher, PollingWatcher, coalesce  # noqa: E402
+
+
+def ignore_index(path: Path) -> bool:
+    return path.name == "index.html"
+
+
+def make_watchers(root: Path):
+    watchers = [PollingWatcher([root], ignore=ignore_index, interval=0.05)]
+    if sys.platform.startswith("linux"):
+        watchers.append(InotifyWatcher([root], ignore=ignore_index))
+    return watchers
+
+
+@pytest.mark.parametrize("kind", ["polling", "inotify"])
+def test_watchers_report_changed_folders_but_not_ignored_files(tmp_path, kind):
+    (tmp_path / "Inbox").mkdir()
+    watchers = {type(watcher).__name__: watcher for watcher in make_watchers(tmp_path)}
+    watcher = watchers.get("PollingWatcher" if kind == "polling" else "InotifyWatcher")
+    if watcher is None:
+        pytest.skip("inotify needs Linux")
+    try:
+        (tmp_path / "Inbox" / "index.html").write_text("generated")
+        assert watcher.poll(0.2) == set()
+
+        (tmp_path / "Inbox" / "note.md").write_text("hi")
+        (tmp_path / "Inbox" / "New").mkdir()
+        assert watcher.poll(1.0) >= {tmp_path / "Inbox"}
+        watcher.poll(0.1)
+
+        # Folders created after start are watched too; bursts come back as one batch.
+        (tmp_path / "Inbox" / "New" / "a.txt").write_text("a")
+        (tmp_path / "Inbox" / "b.txt").write_text("b")
+        assert coalesce(watcher, quiet=0.2, max_wait=2, timeout=1.0) == {tmp_path / "Inbox", tmp_path / "Inbox" / "New"}
+    finally:
+        for each in watchers.values():
+            each.close()
@@ -6,6 +6,7 @@ from __future__ import annotations
 from datetime import datetime
 from pathlib import Path
 
+from lib import metrics
 from lib.backup_targets import (
     compute_backup_status,
     format_backups_js,
@@ -28,6 +29,7 @@ def main() -> None:
     original = DASHBOARD_DATA_PATH.read_text(encoding="utf-8")
     updated = replace_backups_block(original, replacement)
     DASHBOARD_DATA_PATH.write_text(updated, encoding="utf-8")
+    metrics.count("targets", len(backups))
     print(f"Updated backup entries for {len(backups)} targets in dashboard-data.js")
 
 
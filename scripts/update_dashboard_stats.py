@@ -3,18 +3,23 @@
 Rebuild the LifeHub dashboard stats JSON by counting files inside key areas.
 Run from the repo root:
 
-    python3 LifeHub/scripts/update_dashboard_stats.py
+    python3 scripts/update_dashboard_stats.py
 """
 
 from __future__ import annotations
 
 import json
-import os
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
+from lib import metrics
+from lib.catalog import open_catalog
+from lib.jsonstream import write_json
+from lib.scanner import Snapshot
+
 ROOT = Path(__file__).resolve().parents[1]
 LIFEHUB = ROOT
+HISTORY_INTERVAL = timedelta(hours=1)
 
 EXCLUDED_DIRS = {
     ".git",
@@ -27,30 +32,12 @@ EXCLUDED_DIRS = {
 }
 
 
-def count_files(path: Path) -> int:
-    total = 0
-    if not path.exists():
-        return total
-
-    for dirpath, dirnames, filenames in os.walk(path):
-        dirnames[:] = [d for d in dirnames if d not in EXCLUDED_DIRS]
-        total += len(filenames)
-    return total
+def count_files(path: Path, snapshot: Snapshot) -> int:
+    return snapshot.count_files(snapshot.relative(path), skip_dirs=EXCLUDED_DIRS)
 
 
-def folder_size(path: Path) -> int:
-    total = 0
-    if not path.exists():
-        return total
-    for dirpath, dirnames, filenames in os.walk(path):
-        dirnames[:] = [d for d in dirnames if d not in EXCLUDED_DIRS]
-        for filename in filenames:
-            file_path = Path(dirpath) / filename
-            try:
-                total += file_path.stat().st_size
-            except OSError:
-                continue
-    return total
+def folder_size(path: Path, snapshot: Snapshot) -> int:
+    return snapshot.total_size(snapshot.relative(path), skip_dirs=EXCLUDED_DIRS)
 
 
 def read_json(path: Path, default):
@@ -121,20 +108,27 @@ def build_weekly_inbox_trend(history: list[dict], weeks: int = 4) -> list[dict]:
     return trend
 
 
-def main() -> None:
+def main(snapshot: Snapshot | None = None) -> None:
+    if snapshot is None:
+        catalog = open_catalog(LIFEHUB)
+        try:
+            main(catalog)
+        finally:
+            catalog.close()
+        return
     downloads_backlog = compute_downloads_backlog(LIFEHUB / "downloads-feed.json")
-    stats = {
-        "inboxCount": count_files(LIFEHUB / "Inbox"),
-        "familyHealthCount": count_files(LIFEHUB / "Family" / "Health"),
-        "financeCount": count_files(LIFEHUB / "Finance"),
-        "projectsCount": count_files(LIFEHUB / "Projects"),
-        "housingCount": count_files(LIFEHUB / "Housing"),
-        "mediaCount": count_files(LIFEHUB / "Media"),
-        "archiveCount": count_files(LIFEHUB / "Archive"),
-        "templatesCount": count_files(LIFEHUB / "Templates"),
-    }
-
-    stats["lifehubSizeBytes"] = folder_size(LIFEHUB)
+    with metrics.timer("count"):
+        stats = {
+            "inboxCount": count_files(LIFEHUB / "Inbox", snapshot),
+            "familyHealthCount": count_files(LIFEHUB / "Family" / "Health", snapshot),
+            "financeCount": count_files(LIFEHUB / "Finance", snapshot),
+            "projectsCount": count_files(LIFEHUB / "Projects", snapshot),
+            "housingCount": count_files(LIFEHUB / "Housing", snapshot),
+            "mediaCount": count_files(LIFEHUB / "Media", snapshot),
+            "archiveCount": count_files(LIFEHUB / "Archive", snapshot),
+            "templatesCount": count_files(LIFEHUB / "Templates", snapshot),
+        }
+        stats["lifehubSizeBytes"] = folder_size(LIFEHUB, snapshot)
     stats["downloadsBacklog"] = downloads_backlog
     stats["actionItemCount"] = stats["inboxCount"] + downloads_backlog
 
@@ -156,15 +150,20 @@ def main() -> None:
     previous_snapshot = previous_snapshot or {}
     stats["inboxWeeklyChange"] = stats["inboxCount"] - int(previous_snapshot.get("inboxCount", 0))
 
+    # Frequent refreshes (e.g. refresh_daemon.py) keep one snapshot per HISTORY_INTERVAL
+    # plus the latest, instead of pushing weeks of history out of the 40-entry window.
+    settled = parse_timestamp(history[-2].get("timestamp", "")) if len(history) > 1 else None
+    if settled and now - settled < HISTORY_INTERVAL:
+        history.pop()
     history.append({"timestamp": now.isoformat(), "stats": stats})
     history = history[-40:]
-    history_path.write_text(json.dumps(history, indent=2))
+    write_json(history_path, history)
 
     stats["inboxTrend"] = build_weekly_inbox_trend(history)
     stats["generatedAt"] = now.isoformat()
 
     output_path = LIFEHUB / "dashboard-stats.json"
-    output_path.write_text(json.dumps(stats, indent=2))
+    write_json(output_path, stats)
     print(f"Wrote {output_path} with {len(stats)} stats.")
 
 
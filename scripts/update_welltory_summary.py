@@ -4,17 +4,25 @@ Summarise the latest Welltory export into JSON for the dashboard widget.
 
 Run from the repo root:
 
-    python3 LifeHub/scripts/update_welltory_summary.py
+    python3 scripts/update_welltory_summary.py
 """
 
 from __future__ import annotations
 
 import csv
 import json
+import sys
 from copy import deepcopy
 from datetime import datetime, timezone
 from pathlib import Path
 
+# The tests load this file by path, so scripts/ is not necessarily importable yet.
+SCRIPTS_DIR = Path(__file__).resolve().parent
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+from lib import metrics  # noqa: E402
+
 ROOT = Path(__file__).resolve().parents[1]
 WELLTORY_DIR = ROOT / "Personal" / "Health" / "Welltory"
 OUTPUT_FILE = ROOT / "welltory-summary.json"
@@ -118,7 +126,8 @@ def compute_deltas(current: dict, previous: dict | None) -> dict:
 
 def main() -> None:
     latest_csv = load_latest_csv()
-    summary = summarise_csv(latest_csv)
+    with metrics.timer("parse"):
+        summary = summarise_csv(latest_csv)
     if not summary:
         print("No Welltory export found to summarise.")
         return
@@ -135,6 +144,7 @@ def main() -> None:
     history.append({"timestamp": summary["updatedAt"], "summary": deepcopy(summary)})
     write_history(history)
 
+    metrics.count("measurements", summary.get("measurementCount", 0))
     print(f"Wrote {OUTPUT_FILE} with {summary.get('measurementCount', 0)} measurements.")
 
 